@@ -5,6 +5,9 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
 
 import os
+import re
+import threading
+import time
 
 sys.path.insert(
     0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -73,6 +76,87 @@ except (ImportError, Exception):
             print("⚠️  데이터베이스 기능 없이 계속 진행합니다.")
             DatabaseManager = None
 
+# 컨텍스트 동시 조회용 asyncio 어댑터 (DatabaseManager를 import한 경우에만)
+AsyncDatabaseManager = None
+if DatabaseManager is not None:
+    try:
+        from database.async_db_manager import AsyncDatabaseManager
+    except (ImportError, Exception) as e:
+        print(f"⚠️  AsyncDatabaseManager를 import할 수 없습니다: {e}")
+
+# 원격 DB가 느리거나 끊겼을 때 사용할 로컬 컨텍스트 캐시 (SQLite)
+LocalContextCache = None
+ContextSyncer = None
+if DatabaseManager is not None:
+    try:
+        from database.local_cache import ContextSyncer, LocalContextCache, has_context
+    except (ImportError, Exception) as e:
+        print(f"⚠️  LocalContextCache를 import할 수 없습니다: {e}")
+
+# 키워드 다중 매칭 (constants.py 키워드로 만든 Aho–Corasick 오토마톤)
+try:
+    from utils.keyword_matcher import KEYWORDS
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.keyword_matcher import KEYWORDS
+
+# 토큰 예산 기반 대화 메모리 (최근 N턴 + 누적 요약)
+try:
+    from core.journal import ConversationJournal
+    from core.memory import ConversationMemory
+except ImportError:
+    from journal import ConversationJournal
+    from memory import ConversationMemory
+
+
+class SentenceSplitter:
+    """
+    스트리밍으로 들어오는 텍스트를 문장 단위로 자르기
+
+    문장 부호(. ! ? ~ …) 뒤에 공백이 오거나 줄바꿈이 오면 문장 끝으로 봅니다.
+    ("3.5도"처럼 공백 없는 마침표는 자르지 않음)
+    STREAM_MIN_SENTENCE_CHARS보다 짧은 문장은 다음 문장과 합쳐서 TTS 호출 횟수를 줄입니다.
+    """
+
+    BOUNDARY = re.compile(r"[.!?~…]+[\"'”’)\]]*\s+|\n+")
+
+    def __init__(self, min_chars=None):
+        self.min_chars = (
+            int(os.environ.get("STREAM_MIN_SENTENCE_CHARS", "8"))
+            if min_chars is None
+            else min_chars
+        )
+        self.buffer = ""
+
+    def feed(self, text):
+        """
+        텍스트 조각 추가
+
+        Returns:
+            list: 새로 완성된 문장 목록
+        """
+        self.buffer += text
+        sentences = []
+        start = 0
+        while True:
+            match = self.BOUNDARY.search(self.buffer, start)
+            if not match:
+                break
+            sentence = self.buffer[: match.end()].strip()
+            if len(sentence) < self.min_chars:
+                # 너무 짧으면 다음 문장 끝까지 이어서 봄
+                start = match.end()
+                continue
+            sentences.append(sentence)
+            self.buffer = self.buffer[match.end() :]
+            start = 0
+        return sentences
+
+    def flush(self):
+        """남은 텍스트 반환 (스트림이 끝났을 때)"""
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest
+
 
 class ChipiBrain:
     def __init__(self):
@@ -140,21 +224,40 @@ class ChipiBrain:
             self.client = None  # 0.28.x에서는 클라이언트 객체가 없음
 
         self.deployment_name = deployment_name
-        self.messages = self.load_memory()
+
+        # 대화 메모리: 오래된 대화는 요약으로 합쳐 요청 크기를 일정하게 유지
+        use_llm_summary = os.environ.get("MEMORY_LLM_SUMMARY", "true").lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        self.memory = ConversationMemory(
+            summarize=self.summarize_messages if use_llm_summary else None
+        )
+        self.journal = ConversationJournal()
+        self.messages = self.memory.load(self.load_memory())
+        # stream_run으로 마지막에 생성한 전체 응답
+        self.last_reply = ""
+        # add_msg로 받은 마지막 사용자 발화의 분류 결과
+        self._intent = None
 
         # ==========================================
         # 3. 데이터베이스 초기화
         # ==========================================
         print("   데이터베이스 연결 시도 중...", end=" ", flush=True)
+        # 연결 전 DatabaseManager (연결에 실패해도 로컬 캐시 렌더링과 재연결에 사용)
+        self._db = None
+        self._reconnect_lock = threading.Lock()
         try:
             # DatabaseManager가 없거나 import 실패한 경우 None으로 설정
             if DatabaseManager is None:
                 print("건너뜀 (DatabaseManager 없음)", flush=True)
                 self.db_manager = None
             else:
-                self.db_manager = DatabaseManager()
+                self._db = DatabaseManager()
                 # connect_timeout 파라미터로 타임아웃 설정 (5초)
-                self.db_manager.connect(timeout=5)
+                self._db.connect(timeout=5)
+                self.db_manager = self._db
                 print("✅ 완료", flush=True)
         except (ImportError, TimeoutError, Exception) as e:
             # 오류 메시지는 간단하게만 표시
@@ -169,6 +272,40 @@ class ChipiBrain:
                 print(f"❌ 실패 ({short_msg})", flush=True)
             self.db_manager = None
 
+        # 컨텍스트 조회를 백그라운드에서 시작해 다른 작업과 겹쳐 실행
+        # (prefetch_context로 미리 시작한 조회는 CONTEXT_PREFETCH_TTL초 동안 재사용)
+        self.async_db = None
+        if self.db_manager and AsyncDatabaseManager is not None:
+            self.async_db = AsyncDatabaseManager(self.db_manager)
+        self.context_prefetch_ttl = float(
+            os.environ.get("CONTEXT_PREFETCH_TTL", "5.0")
+        )
+        # 원격 조회가 이 시간(초) 안에 끝나지 않으면 로컬 캐시 사용
+        self.context_timeout = float(os.environ.get("CONTEXT_FETCH_TIMEOUT", "3.0"))
+        self._context_prefetch = None  # (serial, 시작 시각, Future)
+
+        # 로컬 컨텍스트 캐시 + 백그라운드 동기화 (원격 DB 연결 실패 시 재연결도 담당)
+        self.local_cache = None
+        self._context_syncer = None
+        if (
+            self._db is not None
+            and LocalContextCache is not None
+            and os.environ.get("LOCAL_CONTEXT_CACHE", "true").lower()
+            in ("true", "1", "yes")
+        ):
+            try:
+                self.local_cache = LocalContextCache()
+                self.local_cache.open()
+                self._context_syncer = ContextSyncer(
+                    self._sync_context,
+                    self.local_cache,
+                    serials=[os.environ.get("DEVICE_SERIAL")],
+                )
+                self._context_syncer.start()
+            except Exception as e:
+                print(f"⚠️  로컬 컨텍스트 캐시를 사용할 수 없습니다: {e}")
+                self.local_cache = None
+
         # ==========================================
         # 2. 시스템 프롬프트 설정 (.env에서 읽음)
         # ==========================================
@@ -180,7 +317,29 @@ class ChipiBrain:
         }
 
     def load_memory(self):
-        """대화 히스토리 로드"""
+        """
+        대화 히스토리 로드 (저널의 최근 JOURNAL_LOAD_TURNS 턴만 읽음)
+
+        저널이 없고 예전 memory.txt가 있으면 한 번 읽어서 저널로 옮깁니다.
+        """
+        if self.journal.exists():
+            try:
+                return self.journal.load()
+            except Exception as e:
+                print(f"히스토리 로드 오류: {e}")
+                return []
+
+        messages = self._load_legacy_memory()
+        if messages:
+            try:
+                self.journal.rewrite(messages)
+                print(f"✓ memory.txt → {self.journal.path} 변환 ({len(messages)}개)")
+            except Exception as e:
+                print(f"히스토리 변환 오류: {e}")
+        return messages
+
+    def _load_legacy_memory(self):
+        """예전 형식(memory.txt, 한 줄에 role:content) 히스토리 로드"""
         history_file = "memory.txt"
         messages = []
 
@@ -200,133 +359,261 @@ class ChipiBrain:
         return messages
 
     def save_memory(self):
-        """대화 히스토리 저장"""
-        history_file = "memory.txt"
+        """
+        대화 히스토리 전체를 저널에 새로 씀 (현재 요약 + 메시지만 남김)
+
+        평소에는 _journal()로 한 줄씩 추가하고, 저널이 길어졌을 때만 호출됩니다.
+        """
+        try:
+            self.journal.rewrite(self.memory.saved(self.messages))
+        except Exception as e:
+            print(f"히스토리 저장 오류: {e}")
+
+    def _journal(self, message):
+        """메시지 하나를 저널에 추가 (저널이 길어지면 새로 씀)"""
+        try:
+            if self.journal.append(message):
+                self.save_memory()
+        except Exception as e:
+            print(f"히스토리 저장 오류: {e}")
+
+    def _journal_summary(self):
+        """요약이 갱신되면 저널에 기록 (요약에 합쳐진 메시지는 다음 로드 때 제외됨)"""
+        with self.memory.lock:
+            keep = sum(1 for m in self.messages if m.get("role") != "system")
         try:
-            with open(history_file, "w", encoding="utf-8") as f:
-                for msg in self.messages:
-                    # 시스템 메시지는 저장하지 않음 (매번 설정에 따라 달라질 수 있으므로)
-                    if msg.get("role") != "system":
-                        # 줄바꿈 문자가 있을 경우 파일 형식이 깨질 수 있으므로 replace 처리 등을 고려할 수 있음
-                        clean_content = msg["content"].replace("\n", " ")
-                        f.write(f"{msg['role']}:{clean_content}\n")
+            if self.journal.append_summary(self.memory.summary, keep):
+                self.save_memory()
         except Exception as e:
             print(f"히스토리 저장 오류: {e}")
 
     def create_new_memory(self):
         """새 대화 히스토리 생성 (초기화)"""
-        self.messages = []
-        # 파일을 비움
-        with open("memory.txt", "w", encoding="utf-8") as f:
-            pass
+        with self.memory.lock:
+            self.messages = []
+            self.memory.clear()
+        # 저널을 비움
+        try:
+            self.journal.reset()
+        except Exception as e:
+            print(f"히스토리 초기화 오류: {e}")
+
+    def add_msg(self, msg, intent=None):
+        """
+        사용자 메시지 추가
+
+        Args:
+            msg: 사용자 메시지
+            intent: IntentRouter.route() 결과 (있으면 키워드를 다시 찾지 않고 사용)
+        """
+        if intent is not None and intent.text != msg.strip():
+            intent = None  # 다른 텍스트를 분류한 결과는 사용하지 않음
+        self._intent = intent
+        message = {"role": "user", "content": msg}
+        # 백그라운드 요약(memory.compact)이 목록을 바꾸는 동안에는 기다림
+        with self.memory.lock:
+            self.messages.append(message)
+        self._journal(message)
+
+    def summarize_messages(self, summary, messages):
+        """
+        오래된 대화를 기존 요약과 합쳐 짧게 요약 (ConversationMemory에서 호출)
+
+        Args:
+            summary: 기존 요약 (없으면 빈 문자열)
+            messages: 요약에 합칠 메시지 목록
+
+        Returns:
+            str: 새 요약
+        """
+        names = {"user": "사용자", "assistant": "치피"}
+        dialogue = "\n".join(
+            f"{names.get(m['role'], m['role'])}: {m['content']}" for m in messages
+        )
+        prompt = [
+            {
+                "role": "system",
+                "content": (
+                    "다음은 사용자와 반려식물 치피의 대화입니다. 기존 요약과 새 대화를 합쳐 "
+                    "이후 대화에 필요한 사실(사용자 이름, 관심사, 약속, 식물 상태 등)만 "
+                    "한국어로 5문장 이내로 요약하세요."
+                ),
+            },
+            {
+                "role": "user",
+                "content": f"[기존 요약]\n{summary or '없음'}\n\n[새 대화]\n{dialogue}",
+            },
+        ]
+        if HAS_AZURE_OPENAI_CLASS:
+            response = self.client.chat.completions.create(
+                model=self.deployment_name,
+                messages=prompt,
+                max_tokens=200,
+                temperature=0.2,
+            )
+            return response.choices[0].message.content
+        response = openai.ChatCompletion.create(
+            engine=self.deployment_name,
+            messages=prompt,
+            max_tokens=200,
+            temperature=0.2,
+        )
+        return response["choices"][0]["message"]["content"]
+
+    def _request_messages(self):
+        """토큰 예산에 맞춘 요청 메시지 목록 (요약 + 최근 메시지)"""
+        messages, prompt_tokens = self.memory.window(self.messages)
+        print(
+            f"🧮 프롬프트 토큰(추정): {prompt_tokens} "
+            f"(요청 메시지 {len(messages)}개 / 전체 {len(self.messages)}개)"
+        )
+        return messages
 
-    def add_msg(self, msg):
-        """사용자 메시지 추가"""
-        self.messages.append({"role": "user", "content": msg})
+    def _remember_reply(self, reply):
+        """응답을 히스토리에 추가/저장하고, 필요하면 백그라운드에서 오래된 대화 요약"""
+        message = {"role": "assistant", "content": reply}
+        with self.memory.lock:
+            self.messages.append(message)
+        self._journal(message)
+        self.memory.compact_async(self.messages, on_done=self._journal_summary)
 
     def get_run_id(self, ai_name):
         """호환성을 위한 메서드"""
         return ai_name
 
-    def wait_run(self, ai_name, device_serial=None):
-        """AI 응답 생성 및 반환
+    def _reconnect_db(self):
+        """원격 DB 재연결 (시작할 때 연결하지 못한 경우, 동기화 스레드에서 호출)"""
+        with self._reconnect_lock:
+            if self.db_manager is not None:
+                return
+            self._db.connect(timeout=5)
+            if AsyncDatabaseManager is not None:
+                self.async_db = AsyncDatabaseManager(self._db)
+            self.db_manager = self._db
+            print("✅ 데이터베이스 재연결 성공")
+
+    def _sync_context(self, device_serial):
+        """로컬 캐시 동기화용 원격 조회 (실패하면 예외)"""
+        if self.db_manager is None:
+            self._reconnect_db()
+        user_email = os.environ.get("USER_EMAIL")
+        if self.db_manager.single_query_context:
+            # 단일 쿼리는 오류를 그대로 전달 (순차 조회는 오류 시 None으로 채워서 반환)
+            return self.db_manager.fetch_context_data(device_serial, user_email)
+        return self.db_manager.get_context_data(device_serial, user_email)
+
+    def prefetch_context(self, device_serial):
+        """
+        DB 컨텍스트 조회를 백그라운드에서 시작 (결과는 wait_run에서 사용)
+
+        음성 인식 직후 호출하면 키워드 처리 등 LLM 호출 전 작업과 DB 조회가 겹쳐 실행됩니다.
+        CONTEXT_PREFETCH_TTL초 안에 이미 시작한 조회가 있으면 그대로 사용합니다.
+
+        Args:
+            device_serial: 디바이스 시리얼
+        """
+        if self._context_syncer is not None:
+            self._context_syncer.track(device_serial)
+        if not device_serial or not self.async_db:
+            return
+        now = time.monotonic()
+        if self._context_prefetch:
+            serial, started_at, _future = self._context_prefetch
+            if serial == device_serial and now - started_at < self.context_prefetch_ttl:
+                return
+        future = self.async_db.submit(self.async_db.fetch_context_data(device_serial))
+        self._context_prefetch = (device_serial, now, future)
+
+    def _take_context_data(self, device_serial):
+        """
+        prefetch_context로 시작한 조회 결과를 기다려서 반환 (한 번 사용하면 비움)
+        원격 조회가 실패하거나 CONTEXT_FETCH_TIMEOUT을 넘기면 로컬 캐시 데이터 반환
+
+        Returns:
+            dict 또는 None (원격/로컬 모두 사용할 수 없는 경우)
+        """
+        self.prefetch_context(device_serial)
+        prefetch, self._context_prefetch = self._context_prefetch, None
+        data = None
+        if prefetch:
+            try:
+                data = prefetch[2].result(timeout=self.context_timeout)
+            except Exception as e:
+                print(f"⚠️  컨텍스트 동시 조회 실패: {e or '시간 초과'}")
+
+        if self.local_cache is None:
+            return data
+        if has_context(data):
+            # 최신 데이터로 로컬 캐시 갱신 (다음 장애 때 사용)
+            self.local_cache.save(device_serial, data)
+            return data
+        if data is None and self.db_manager is not None and self.async_db is None:
+            # 비동기 조회를 쓸 수 없으면 기존 순차 조회 경로 사용 (wait_run에서 처리)
+            return None
+        cached = self.local_cache.load(device_serial)
+        if cached is None:
+            return data
+        print(f"📦 로컬 캐시 컨텍스트 사용 ({cached[1]:.0f}초 전 동기화)")
+        return cached[0]
+
+    def _prepare_run(self, ai_name, device_serial=None):
+        """
+        LLM 호출 전 준비 (특별 상황 감지, DB 컨텍스트 조회, 시스템 프롬프트 설정)
 
         Args:
             ai_name: AI 페르소나 이름 (chipi, jarvis_4 등)
             device_serial: 디바이스 시리얼 (DB 컨텍스트 추가용, 선택사항)
+
+        Returns:
+            str: 최종 시스템 프롬프트 (self.messages[0]에도 설정됨)
         """
+        # DB 컨텍스트 조회를 먼저 시작 (아래 키워드 감지와 겹쳐 실행)
+        has_db = bool(device_serial) and (
+            self.db_manager is not None or self.local_cache is not None
+        )
+        if has_db:
+            self.prefetch_context(device_serial)
+
         # 0. 최근 사용자 메시지 가져오기
         last_user_msg = ""
-        for msg in reversed(self.messages):
+        with self.memory.lock:
+            history = list(self.messages)
+        for msg in reversed(history):
             if msg.get("role") == "user":
                 last_user_msg = msg.get("content", "").lower()
                 break
 
         # 0-1. 특정 상황 감지 및 시스템 프롬프트 수정 (LLM이 다양하게 응답하도록)
+        # (사용자 이름은 아래 build_context에서 함께 조회)
         user_name = None
         special_context = ""
 
-        if device_serial and self.db_manager:
-            user_info = self.db_manager.get_user_by_device_serial(device_serial)
-            user_name = user_info.get("name") if user_info else None
+        # 상황 키워드 감지 (main에서 분류한 Intent가 있으면 그대로 사용)
+        intent, self._intent = self._intent, None
+        hits = intent.hits if intent is not None else KEYWORDS.match(last_user_msg)
 
         # 물 주기 표현 감지
-        if any(
-            k in last_user_msg for k in ["물 줄게", "물 줘", "물을 줄게", "물을 줘"]
-        ):
+        if "water" in hits:
             special_context += "## 특별 상황: user가 물을 주려고 해!\n감사를 표현하고 user의 건강을 먼저 생각해줘. 다양하게 응답해.\n"
 
         # 아침 인사/잘잤어 질문 감지
-        if any(
-            k in last_user_msg
-            for k in [
-                "잘잤어",
-                "잘 잤어",
-                "잘자",
-                "잘 잤니",
-                "아침이야",
-                "좋은 아침",
-                "안녕",
-                "일어났어",
-            ]
-        ):
+        if "greeting" in hits:
             special_context += "## 특별 상황: user가 아침 인사를 하고 있어!\n좋은 아침 인사를 하고, 물을 준 것에 감사하며, 컨디션이 좋다고 말하고 응원해줘. 예: '좋은 아침! 어제 물 줘서 오늘 컨디션 최고야. 오늘도 힘내!' 이런 식으로 응답해.\n"
 
         # 잘 있었는지 질문 감지
-        if any(
-            k in last_user_msg
-            for k in [
-                "잘 있었어",
-                "잘 지냈어",
-                "어떻게 지냈어",
-                "뭐했어",
-                "어디갔어",
-                "다녀왔어",
-            ]
-        ):
+        if "wellbeing" in hits:
             special_context += "## 특별 상황: user가 잘 있었는지 물어봤어!\n반가움을 표현하고 보고 싶었다는 감정을 자연스럽게 말해줘. 예: '잘 다녀왔어? 너무 보고 싶었어~' 이런 식으로 응답해.\n"
 
         # 힘들다는 표현 감지 (짧게 공감)
-        if any(
-            k in last_user_msg
-            for k in ["힘들어", "힘들", "어려워", "막막해", "지쳐", "피곤"]
-        ) and not any(
-            k in last_user_msg
-            for k in [
-                "죽고",
-                "자살",
-                "끝내고",
-                "절망",
-                "극도로 힘들",
-                "살기싫",
-                "뛰어내리",
-            ]
-        ):
+        if "tired" in hits and "sad_tone" not in hits:
             special_context += "## 특별 상황: user가 힘들다고 말하고 있어!\n짧게 공감해줘. 예: '요즘 많이 힘들구나..' 이런 식으로 간단하게 공감 표현해.\n"
 
         # 온습도 관련 키워드 감지
-        has_temp_keyword = any(
-            k in last_user_msg for k in ["온도", "따뜻", "더워", "추워"]
-        )
-        has_humidity_keyword = any(k in last_user_msg for k in ["습도", "건조", "말라"])
-        has_temp_humidity_keyword = any(
-            k in last_user_msg
-            for k in ["온습도", "온도 습도", "온도와 습도", "온도 습도 알려줘"]
-        )
+        has_temp_keyword = "temperature" in hits
+        has_humidity_keyword = "humidity" in hits
+        has_temp_humidity_keyword = "temp_humidity" in hits
         # 상태 질문 감지 (더 구체적인 패턴으로)
-        has_status_keyword = any(
-            k in last_user_msg
-            for k in [
-                "상태 어때",
-                "상태 어떠냐",
-                "지금 상태",
-                "네 상태",
-                "너 상태",
-                "상태 어떠",
-                "상태 어떤가",
-                "상태가 어때",
-            ]
-        )
+        has_status_keyword = "status" in hits
 
         # 온습도 둘 다 묻는 경우 (온습도, 상태 어때 등)
         # 상태 질문은 무조건 온습도 정보를 제공
@@ -336,9 +623,21 @@ class ChipiBrain:
             or (has_temp_keyword and has_humidity_keyword)
         )
 
+        # 컨텍스트 조회 결과 대기 (센서 데이터도 여기에 포함)
+        context_data = None
+        if has_db:
+            context_data = self._take_context_data(device_serial)
+
+        def latest_sensor_data():
+            if context_data is not None:
+                return context_data["sensor_data"]
+            if self.db_manager is None:
+                return None
+            return self.db_manager.get_sensor_data_by_serial(device_serial)
+
         # 온습도 둘 다 묻는 경우 (온습도, 상태 어때 등)
-        if ask_for_both and device_serial and self.db_manager:
-            sensor_data = self.db_manager.get_sensor_data_by_serial(device_serial)
+        if ask_for_both and has_db:
+            sensor_data = latest_sensor_data()
             if sensor_data:
                 temp = sensor_data.get("temperature")
                 humidity = sensor_data.get("humidity")
@@ -351,16 +650,16 @@ class ChipiBrain:
 
         # 온도만 묻는 경우 (상태 질문이 아닐 때만)
         elif has_temp_keyword and not has_humidity_keyword and not has_status_keyword:
-            if device_serial and self.db_manager:
-                sensor_data = self.db_manager.get_sensor_data_by_serial(device_serial)
+            if has_db:
+                sensor_data = latest_sensor_data()
                 if sensor_data and sensor_data.get("temperature") is not None:
                     temp = sensor_data.get("temperature")
                     special_context += f"## 특별 상황: user가 온도를 묻고 있어!\n현재 온도는 {temp}도야. 이 정보를 바탕으로 다양하게 응답해.\n"
 
         # 습도만 묻는 경우 (상태 질문이 아닐 때만)
         elif has_humidity_keyword and not has_temp_keyword and not has_status_keyword:
-            if device_serial and self.db_manager:
-                sensor_data = self.db_manager.get_sensor_data_by_serial(device_serial)
+            if has_db:
+                sensor_data = latest_sensor_data()
                 if sensor_data and sensor_data.get("humidity") is not None:
                     humidity = sensor_data.get("humidity")
                     special_context += f"## 특별 상황: user가 습도를 묻고 있어!\n현재 습도는 {humidity}%야. 이 정보를 바탕으로 다양하게 응답해.\n"
@@ -372,7 +671,12 @@ class ChipiBrain:
 
         # 2. DB 컨텍스트 추가 (device_serial이 있을 경우)
         db_context = ""
-        if device_serial and self.db_manager:
+        if context_data is not None:
+            try:
+                db_context, user_name = self._db.render_context(context_data)
+            except Exception as e:
+                print(f"❌ 컨텍스트 생성 오류: {e}")
+        elif device_serial and self.db_manager:
             db_context, user_name = self.db_manager.build_context(device_serial)
 
         # 최종 시스템 프롬프트 (DB 정보 포함)
@@ -403,19 +707,33 @@ class ChipiBrain:
         # 3. 시스템 메시지 처리
         # 현재 메시지 목록에 시스템 메시지가 없거나, 다른 페르소나의 메시지일 수 있으므로
         # 가장 첫 번째 메시지가 system인지 확인하고 교체하거나 추가합니다.
-        if self.messages and self.messages[0].get("role") == "system":
-            self.messages[0] = {"role": "system", "content": final_system_prompt}
-        else:
-            self.messages.insert(0, {"role": "system", "content": final_system_prompt})
+        system_message = {"role": "system", "content": final_system_prompt}
+        with self.memory.lock:
+            if self.messages and self.messages[0].get("role") == "system":
+                self.messages[0] = system_message
+            else:
+                self.messages.insert(0, system_message)
+
+        return final_system_prompt
+
+    def wait_run(self, ai_name, device_serial=None):
+        """AI 응답 생성 및 반환
+
+        Args:
+            ai_name: AI 페르소나 이름 (chipi, jarvis_4 등)
+            device_serial: 디바이스 시리얼 (DB 컨텍스트 추가용, 선택사항)
+        """
+        final_system_prompt = self._prepare_run(ai_name, device_serial)
 
         try:
-            print(f"📤 API 요청 중... (메시지 개수: {len(self.messages)})")
+            messages = self._request_messages()
+            print(f"📤 API 요청 중... (메시지 개수: {len(messages)})")
 
             if HAS_AZURE_OPENAI_CLASS:
                 # openai 1.x 버전
                 response = self.client.chat.completions.create(
                     model=self.deployment_name,
-                    messages=self.messages,
+                    messages=messages,
                     max_tokens=100,
                     temperature=0.7,  # 치피의 감성적인 대화를 위해 약간 높임
                     top_p=1.0,
@@ -423,6 +741,8 @@ class ChipiBrain:
 
                 print("📥 API 응답 받음:")
                 print(f"   - choices 개수: {len(response.choices)}")
+                if getattr(response, "usage", None):
+                    print(f"   - prompt_tokens: {response.usage.prompt_tokens}")
                 finish_reason = response.choices[0].finish_reason
                 print(f"   - finish_reason: {finish_reason}")
 
@@ -445,7 +765,7 @@ class ChipiBrain:
                 # openai 0.28.x 버전
                 response = openai.ChatCompletion.create(
                     engine=self.deployment_name,
-                    messages=self.messages,
+                    messages=messages,
                     max_tokens=100,
                     temperature=0.7,
                     top_p=1.0,
@@ -453,6 +773,8 @@ class ChipiBrain:
 
                 print("📥 API 응답 받음:")
                 print(f"   - choices 개수: {len(response['choices'])}")
+                if response.get("usage"):
+                    print(f"   - prompt_tokens: {response['usage']['prompt_tokens']}")
                 finish_reason = response["choices"][0]["finish_reason"]
                 print(f"   - finish_reason: {finish_reason}")
 
@@ -484,8 +806,7 @@ class ChipiBrain:
                     assistant_message = "어, 지금은 잘 모르겠어. 잠시만 기다려줄래?"
 
             # 응답 추가 및 저장
-            self.messages.append({"role": "assistant", "content": assistant_message})
-            self.save_memory()
+            self._remember_reply(assistant_message)
 
             return assistant_message
 
@@ -510,6 +831,136 @@ class ChipiBrain:
             traceback.print_exc()
             return error_msg
 
+    def _stream_deltas(self, messages):
+        """
+        스트리밍 API 호출 후 (텍스트 조각, finish_reason)을 도착하는 대로 반환
+
+        Args:
+            messages: 요청 메시지 목록
+
+        Yields:
+            tuple: (content: str 또는 None, finish_reason: str 또는 None)
+        """
+        if HAS_AZURE_OPENAI_CLASS:
+            # openai 1.x 버전
+            stream = self.client.chat.completions.create(
+                model=self.deployment_name,
+                messages=messages,
+                max_tokens=100,
+                temperature=0.7,  # 치피의 감성적인 대화를 위해 약간 높임
+                top_p=1.0,
+                stream=True,
+            )
+            for chunk in stream:
+                # Azure는 첫 조각에 choices 없이 프롬프트 필터 결과만 보내기도 함
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                content = choice.delta.content if choice.delta else None
+                yield content, choice.finish_reason
+        else:
+            # openai 0.28.x 버전
+            stream = openai.ChatCompletion.create(
+                engine=self.deployment_name,
+                messages=messages,
+                max_tokens=100,
+                temperature=0.7,
+                top_p=1.0,
+                stream=True,
+            )
+            for chunk in stream:
+                if not chunk.get("choices"):
+                    continue
+                choice = chunk["choices"][0]
+                yield choice.get("delta", {}).get("content"), choice.get("finish_reason")
+
+    def stream_run(self, ai_name, device_serial=None):
+        """
+        AI 응답을 스트리밍으로 생성해 문장 단위로 반환
+        (첫 문장이 완성되는 즉시 TTS를 시작할 수 있도록)
+
+        전체 응답은 끝난 뒤 self.last_reply에 저장되고 대화 히스토리에 추가됩니다.
+        바지인 등으로 중간에 닫히면(close) 그때까지 반환한 문장만 저장합니다.
+
+        Args:
+            ai_name: AI 페르소나 이름 (chipi, jarvis_4 등)
+            device_serial: 디바이스 시리얼 (DB 컨텍스트 추가용, 선택사항)
+
+        Yields:
+            str: 완성된 문장
+        """
+        self.last_reply = ""
+        final_system_prompt = self._prepare_run(ai_name, device_serial)
+        splitter = SentenceSplitter()
+        parts = []
+        spoken = []  # 이미 반환한 문장 (중간에 닫히면 이것만 기록)
+        reply = None
+        finish_reason = None
+
+        try:
+            messages = self._request_messages()
+            print(f"📤 API 스트리밍 요청 중... (메시지 개수: {len(messages)})")
+            started = time.monotonic()
+            first_sentence = True
+            for content, reason in self._stream_deltas(messages):
+                finish_reason = reason or finish_reason
+                if not content:
+                    continue
+                parts.append(content)
+                for sentence in splitter.feed(content):
+                    if first_sentence:
+                        print(f"⏱️  첫 문장까지 {time.monotonic() - started:.2f}초")
+                        first_sentence = False
+                    spoken.append(sentence)
+                    yield sentence
+            rest = splitter.flush()
+            if rest:
+                spoken.append(rest)
+                yield rest
+
+            print(f"📥 API 스트리밍 완료 (finish_reason: {finish_reason})")
+            reply = "".join(parts).strip()
+            if not reply:
+                if finish_reason == "content_filter":
+                    print("⚠️  콘텐츠 필터에 의해 응답이 차단되었습니다.")
+                    reply = "어, 그건 제가 도와드리기 어려운 것 같아요. 다른 걸 말씀해 주실 수 있을까요?"
+                else:
+                    print("⚠️  응답이 비어 있습니다!")
+                    reply = "어, 지금은 잘 모르겠어. 잠시만 기다려줄래?"
+                yield reply
+
+        except Exception as e:
+            error_str = str(e)
+            if (
+                "content_filter" in error_str.lower()
+                or "content management policy" in error_str.lower()
+            ):
+                print(f"⚠️  콘텐츠 필터 에러: {e}")
+                reply = "어, 그건 제가 도와드리기 어려운 것 같아요. 다른 걸 말씀해 주실 수 있을까요?"
+            else:
+                print(f"❌ 응답 생성 오류: {e}")
+                print(f"❌ 최종 시스템 프롬프트:\n{final_system_prompt}\n")
+                import traceback
+
+                traceback.print_exc()
+                reply = "어, 뭔가 잘못됐나봐. 잠시만 기다려줄래?"
+            # 이미 일부를 말했다면 그 부분만 히스토리에 남김
+            # (받았지만 아직 말하지 않은 버퍼 내용은 제외)
+            if spoken:
+                reply = " ".join(spoken).strip()
+            else:
+                yield reply
+
+        finally:
+            if reply is None:
+                # 소비하는 쪽이 중간에 닫음 (바지인, 조기 종료)
+                reply = " ".join(spoken).strip()
+                print("⏹️  응답 스트리밍 중단 (말한 부분만 기록)")
+            if reply:
+                print(f"✓ 응답 메시지: {reply}")
+                self.last_reply = reply
+                self._remember_reply(reply)
+
     # def _generate_continuation(self, ai_name, device_serial, system_prompt):
     #     """대화 이어가기용 내부 메서드 (후속 질문/제안 생성)
     #     [대화 이어가기는 system prompt에 포함되어 자동으로 동작함]
@@ -616,14 +1067,55 @@ class ChipiBrain:
     #         print(f"❌ 대화 이어가기 오류: {e}")
     #         return ""
 
-    def __del__(self):
-        """소멸자: 데이터베이스 연결 종료"""
-        if hasattr(self, "db_manager") and self.db_manager:
+    def close(self):
+        """
+        대화 저널, 컨텍스트 동기화 스레드, 로컬 캐시, 데이터베이스 연결 종료
+
+        main의 종료(finally) 경로에서 호출하세요. 여러 번 호출해도 됩니다.
+        """
+        journal = getattr(self, "journal", None)
+        if journal:
+            self.journal = None
+            try:
+                journal.close()
+            except Exception as e:
+                print(f"⚠️  대화 저널 종료 오류: {e}")
+        syncer = getattr(self, "_context_syncer", None)
+        if syncer:
+            self._context_syncer = None
+            try:
+                syncer.stop()
+            except Exception as e:
+                print(f"⚠️  컨텍스트 동기화 종료 오류: {e}")
+        local_cache = getattr(self, "local_cache", None)
+        if local_cache:
+            self.local_cache = None
+            try:
+                local_cache.close()
+            except Exception as e:
+                print(f"⚠️  로컬 캐시 종료 오류: {e}")
+        async_db = getattr(self, "async_db", None)
+        if async_db:
+            self.async_db = None
+            try:
+                async_db.close()
+            except Exception:
+                pass
+        db_manager = getattr(self, "db_manager", None)
+        if db_manager:
+            self.db_manager = None
             try:
-                self.db_manager.close()
-            except:
+                db_manager.close()
+            except Exception:
                 pass
 
+    def __del__(self):
+        """소멸자: close()를 호출하지 않은 경우를 위한 정리"""
+        try:
+            self.close()
+        except Exception:
+            pass
+
 
 # ==========================================
 # 실행 테스트
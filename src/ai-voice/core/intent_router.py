@@ -0,0 +1,136 @@
+"""
+발화 의도 분류 (한 턴에 한 번)
+
+사용자 발화를 KeywordMatcher로 한 번만 훑어서 트리거 단어, 종료/Sleep 명령, 서보, LED,
+슬픈 톤, 대화 상황(물 주기, 인사, 온습도, 상태 등)을 모두 찾고,
+필요하면 오디오 매핑(LLM 우회 응답)까지 조회해 Intent 하나로 반환합니다.
+main_*.py의 명령 처리와 ChipiBrain의 시스템 프롬프트 구성이 같은 결과를 사용합니다.
+
+사용 예:
+    router = IntentRouter(trigger_words=["치피"], find_audio=lambda t: find_mapped_audio(t, mapping))
+    intent = router.route(user_text, strip_trigger=sleep_mode)
+    if intent.exit:
+        ...
+    brain.add_msg(intent.text, intent=intent)
+"""
+
+from collections import namedtuple
+
+try:
+    from utils.keyword_matcher import DEFAULT_CATEGORIES, KeywordMatcher
+except ImportError:
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.keyword_matcher import DEFAULT_CATEGORIES, KeywordMatcher
+
+TRIGGER = "trigger"
+
+
+class Intent(
+    namedtuple(
+        "Intent", ["raw_text", "text", "hits", "mapped_audio_path", "mapped_response"]
+    )
+):
+    """
+    발화 분류 결과
+
+    raw_text: 인식된 원문
+    text: 실제로 처리할 텍스트 (strip_trigger면 트리거 단어를 뺀 텍스트)
+    hits: {카테고리: [매칭된 키워드]} (KeywordMatcher.match 결과)
+    mapped_audio_path, mapped_response: 오디오 매핑 결과 (없으면 None)
+    """
+
+    __slots__ = ()
+
+    def has(self, category):
+        return category in self.hits
+
+    @property
+    def trigger(self):
+        return TRIGGER in self.hits
+
+    @property
+    def trigger_only(self):
+        """트리거 단어만 말한 경우 (트리거를 빼면 남는 말이 없음)"""
+        return self.trigger and not self.text
+
+    @property
+    def exit(self):
+        return "exit" in self.hits
+
+    @property
+    def sleep(self):
+        return "sleep" in self.hits
+
+    @property
+    def servo(self):
+        return "servo" in self.hits
+
+    @property
+    def led(self):
+        """LED 명령: "on", "off" 또는 None"""
+        if "led_on" in self.hits:
+            return "on"
+        if "led_off" in self.hits:
+            return "off"
+        return None
+
+    @property
+    def sad_tone(self):
+        return "sad_tone" in self.hits
+
+
+class IntentRouter:
+    """발화 하나를 한 번에 분류"""
+
+    def __init__(self, trigger_words=(), find_audio=None, categories=None):
+        """
+        Args:
+            trigger_words: 트리거 단어 목록 (Wake word)
+            find_audio: 텍스트 → (오디오 경로, 응답 텍스트) 함수 (없으면 조회 안 함)
+            categories: 키워드 카테고리 (기본값: constants.py 전체)
+        """
+        self.trigger_words = [w.lower() for w in trigger_words if w]
+        self.find_audio = find_audio
+        categories = dict(DEFAULT_CATEGORIES if categories is None else categories)
+        if self.trigger_words:
+            categories[TRIGGER] = self.trigger_words
+        self.matcher = KeywordMatcher(categories)
+
+    def strip_trigger(self, text):
+        """트리거 단어 제거 (예: "치피 안녕하세요" → "안녕하세요")"""
+        for trigger in self.trigger_words:
+            text = text.replace(trigger, "", 1).strip()
+        return text
+
+    def route(self, text, strip_trigger=False):
+        """
+        발화 분류
+
+        Args:
+            text: 인식된 사용자 발화
+            strip_trigger: 트리거 단어가 있으면 빼고 처리 (Sleep mode에서 깨어날 때)
+
+        Returns:
+            Intent
+        """
+        raw_text = (text or "").strip()
+        hits = self.matcher.match(raw_text)
+        text = raw_text
+        if strip_trigger and TRIGGER in hits:
+            text = self.strip_trigger(raw_text)
+
+        # 종료/Sleep 명령이거나 깨우는 말이 아니면 LLM 우회 응답을 찾을 필요 없음
+        mapped_audio_path = mapped_response = None
+        if (
+            self.find_audio is not None
+            and text
+            and "exit" not in hits
+            and "sleep" not in hits
+            and not (strip_trigger and TRIGGER not in hits)
+        ):
+            mapped_audio_path, mapped_response = self.find_audio(text)
+
+        return Intent(raw_text, text, hits, mapped_audio_path, mapped_response)
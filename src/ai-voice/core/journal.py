@@ -0,0 +1,230 @@
+"""
+대화 히스토리 추가 전용 저널 (JSONL)
+
+매 턴마다 memory.txt 전체를 다시 쓰는 대신, 메시지 하나당 JSON 한 줄을 파일 끝에 추가합니다.
+SD 카드 쓰기량을 줄이기 위해 fsync는 여러 줄을 모아서 하고,
+줄 수가 JOURNAL_COMPACT_LINES를 넘으면 현재 상태만 남기도록 파일을 새로 씁니다 (원자적 교체).
+
+레코드 형식:
+    {"role": "user" | "assistant", "content": "...", "ts": 1700000000.0}
+    {"role": "summary", "content": "...", "keep": 4, "ts": ...}
+        → 이 시점에 요약이 바뀌었고, 직전 메시지 중 마지막 keep개만 남음 (나머지는 요약에 합쳐짐)
+
+비정상 종료로 마지막 줄이 잘려 있으면 그 줄은 무시합니다.
+
+사용 예:
+    journal = ConversationJournal()
+    messages = journal.load(tail_turns=20)
+    journal.append({"role": "user", "content": "안녕"})
+"""
+
+import json
+import os
+import threading
+import time
+
+JOURNAL_PATH = os.environ.get("MEMORY_JOURNAL_PATH", "memory.jsonl")
+# 이 줄 수만큼 추가되면 fsync (0이면 매번)
+JOURNAL_FSYNC_EVERY = int(os.environ.get("JOURNAL_FSYNC_EVERY", "8"))
+# 마지막 fsync 후 이 시간(초)이 지나면 다음 추가 때 fsync
+JOURNAL_FSYNC_INTERVAL = float(os.environ.get("JOURNAL_FSYNC_INTERVAL", "5.0"))
+# 저널이 이 줄 수를 넘으면 현재 상태만 남기고 새로 씀
+JOURNAL_COMPACT_LINES = int(os.environ.get("JOURNAL_COMPACT_LINES", "200"))
+# 시작할 때 읽어 올 최근 대화 턴 수 (0이면 전부)
+JOURNAL_LOAD_TURNS = int(os.environ.get("JOURNAL_LOAD_TURNS", "20"))
+
+SUMMARY_ROLE = "summary"
+_BLOCK_SIZE = 64 * 1024
+
+
+def _reverse_lines(f):
+    """파일 끝에서부터 한 줄씩 (bytes) 반환"""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    rest = b""
+    while position > 0:
+        size = min(_BLOCK_SIZE, position)
+        position -= size
+        f.seek(position)
+        lines = (f.read(size) + rest).split(b"\n")
+        # 첫 조각은 앞 블록과 이어질 수 있으므로 다음 블록으로 넘김
+        rest = lines.pop(0)
+        for line in reversed(lines):
+            yield line
+    yield rest
+
+
+def _parse(line):
+    """저널 한 줄 파싱 (빈 줄, 잘린 줄은 None)"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(record, dict) or "role" not in record:
+        return None
+    return record
+
+
+class ConversationJournal:
+    """대화 메시지를 JSONL 파일에 추가 전용으로 기록"""
+
+    def __init__(self, path=None):
+        self.path = path or JOURNAL_PATH
+        self._file = None
+        self._lock = threading.Lock()
+        self._lines = 0  # 마지막으로 새로 쓴 뒤 파일의 줄 수
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, tail_turns=None):
+        """
+        저널에서 현재 대화 상태 복원 (파일 끝부터 필요한 만큼만 읽음)
+
+        Args:
+            tail_turns: 읽어 올 최근 턴 수 (기본값: env의 JOURNAL_LOAD_TURNS, 0이면 전부)
+
+        Returns:
+            list: 메시지 목록 (요약이 있으면 첫 항목이 {"role": "summary", ...})
+        """
+        tail_turns = JOURNAL_LOAD_TURNS if tail_turns is None else tail_turns
+        limit = tail_turns * 2 if tail_turns else None
+        if not self.exists():
+            return []
+
+        newest_first = []
+        summary = None
+        keep = None  # 요약 레코드 앞에서 더 읽어야 할 메시지 수
+        with open(self.path, "rb") as f:
+            for line in _reverse_lines(f):
+                record = _parse(line)
+                if record is None:
+                    continue
+                if record["role"] == SUMMARY_ROLE:
+                    if summary is None:
+                        summary = record.get("content", "")
+                        keep = record.get("keep", 0)
+                    continue
+                if summary is not None:
+                    if keep <= 0:
+                        break
+                    keep -= 1
+                newest_first.append(
+                    {"role": record["role"], "content": record.get("content", "")}
+                )
+                if limit and len(newest_first) >= limit and summary is not None:
+                    break
+
+        messages = list(reversed(newest_first[:limit] if limit else newest_first))
+        if summary:
+            messages.insert(0, {"role": SUMMARY_ROLE, "content": summary})
+        return messages
+
+    def _open(self):
+        if self._file is None:
+            torn = False
+            if self.exists():
+                with open(self.path, "rb") as f:
+                    if self._lines == 0:
+                        self._lines = sum(1 for _ in f)
+                    f.seek(0, os.SEEK_END)
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        torn = f.read(1) != b"\n"
+            self._file = open(self.path, "a", encoding="utf-8")
+            if torn:
+                # 비정상 종료로 잘린 마지막 줄과 새 레코드가 붙지 않도록
+                self._file.write("\n")
+
+    def _sync(self, force=False):
+        if self._file is None or (not force and self._unsynced == 0):
+            return
+        if (
+            force
+            or self._unsynced >= JOURNAL_FSYNC_EVERY
+            or time.monotonic() - self._last_sync >= JOURNAL_FSYNC_INTERVAL
+        ):
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def append(self, message, **extra):
+        """
+        메시지 한 줄 추가 (시스템 메시지는 기록하지 않음)
+
+        Returns:
+            bool: 줄 수가 JOURNAL_COMPACT_LINES를 넘어 새로 써야 하면 True
+        """
+        if message.get("role") == "system":
+            return False
+        record = {"role": message["role"], "content": message.get("content", "")}
+        record.update(extra)
+        record["ts"] = round(time.time(), 3)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._open()
+            self._file.write(line)
+            self._file.flush()  # fsync는 모아서, OS 버퍼까지는 바로
+            self._lines += 1
+            self._unsynced += 1
+            self._sync()
+            return bool(JOURNAL_COMPACT_LINES) and self._lines > JOURNAL_COMPACT_LINES
+
+    def append_summary(self, summary, keep):
+        """
+        요약 갱신 기록 (직전 메시지 중 마지막 keep개만 남기고 나머지는 요약에 합쳐졌음)
+
+        Returns:
+            bool: 새로 써야 하면 True
+        """
+        return self.append({"role": SUMMARY_ROLE, "content": summary}, keep=keep)
+
+    def rewrite(self, messages):
+        """
+        현재 상태(요약 + 메시지)만 남기도록 저널을 새로 씀 (임시 파일 → os.replace)
+
+        Args:
+            messages: 메시지 목록 (요약은 {"role": "summary"} 항목)
+        """
+        tmp_path = self.path + ".tmp"
+        now = round(time.time(), 3)
+        with self._lock:
+            lines = 0
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for m in messages:
+                    if m.get("role") == "system":
+                        continue
+                    record = {"role": m["role"], "content": m.get("content", "")}
+                    if m["role"] == SUMMARY_ROLE:
+                        record["keep"] = 0
+                    record["ts"] = now
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    lines += 1
+                f.flush()
+                os.fsync(f.fileno())
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(tmp_path, self.path)
+            self._lines = lines
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def reset(self):
+        """저널 비우기 (새 대화 시작)"""
+        self.rewrite([])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._sync(force=True)
+                finally:
+                    self._file.close()
+                    self._file = None
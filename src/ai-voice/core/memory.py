@@ -0,0 +1,269 @@
+"""
+ChipiBrain 대화 메모리 관리 (토큰 예산 + 요약)
+
+대화가 길어져도 매 요청에 보내는 히스토리가 일정 크기를 넘지 않도록
+최근 N턴은 그대로 두고, 그보다 오래된 대화는 누적 요약(summary) 하나로 합칩니다.
+
+- window(): API에 보낼 메시지 목록 (시스템 프롬프트 + 요약 + 예산 안의 최근 메시지)
+- compact(): 오래된 메시지를 요약에 합치고 목록에서 제거 (백그라운드 스레드에서 호출 가능)
+  최근 대화가 MEMORY_KEEP_TURNS를 넘으면 MEMORY_COMPACT_TO_TURNS까지 한 번에 줄여서
+  요약(LLM 호출)이 매 턴 실행되지 않도록 합니다.
+- lock: messages 목록을 바꾸는 쪽(ChipiBrain)도 이 잠금 안에서 추가/교체해야
+  백그라운드 compact()의 결과 반영과 겹치지 않습니다.
+
+사용 예:
+    memory = ConversationMemory(summarize=brain.summarize_messages)
+    messages = memory.load(brain.load_memory())
+    window, prompt_tokens = memory.window(messages)
+    with memory.lock:
+        messages.append({"role": "assistant", "content": reply})
+    memory.compact_async(messages)
+"""
+
+import os
+import threading
+
+# tiktoken은 선택사항 (없으면 글자 수 기반으로 추정)
+try:
+    import tiktoken
+
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+# 히스토리(요약 + 최근 메시지)에 쓸 최대 토큰 수 (시스템 프롬프트 제외)
+MEMORY_TOKEN_BUDGET = int(os.environ.get("MEMORY_TOKEN_BUDGET", "1200"))
+# 요약하지 않고 그대로 유지할 최근 대화 턴 수 (1턴 = 사용자 + 응답)
+MEMORY_KEEP_TURNS = int(os.environ.get("MEMORY_KEEP_TURNS", "6"))
+# 요약할 때 남길 최근 대화 턴 수 (KEEP_TURNS를 넘으면 여기까지 한 번에 줄임)
+MEMORY_COMPACT_TO_TURNS = int(os.environ.get("MEMORY_COMPACT_TO_TURNS", "3"))
+# 요약 최대 길이 (토큰)
+MEMORY_SUMMARY_MAX_TOKENS = int(os.environ.get("MEMORY_SUMMARY_MAX_TOKENS", "200"))
+
+# 메시지 하나당 role/구분자 등으로 붙는 토큰 (OpenAI chat 형식 기준)
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_ROLE = "summary"
+SUMMARY_HEADER = "\n\n[이전 대화 요약]\n"
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o
+        except Exception:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def count_tokens(text):
+    """
+    텍스트 토큰 수 계산
+
+    tiktoken이 없으면 추정값 사용 (영문/숫자 약 4글자당 1토큰, 한글 등은 글자당 1토큰)
+    """
+    if not text:
+        return 0
+    if HAS_TIKTOKEN:
+        return len(_get_encoding().encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def count_message_tokens(messages):
+    """메시지 목록 전체의 프롬프트 토큰 수 (응답 시작 토큰 3개 포함)"""
+    return (
+        sum(count_tokens(m.get("content")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+        + 3
+    )
+
+
+def _fallback_summary(summary, messages, max_tokens):
+    """LLM 요약을 사용할 수 없을 때: 각 발화 앞부분을 이어 붙이고 오래된 부분부터 잘라냄"""
+    names = {"user": "사용자", "assistant": "치피"}
+    lines = [summary] if summary else []
+    for m in messages:
+        content = (m.get("content") or "").strip()
+        if content:
+            lines.append(f"{names.get(m['role'], m['role'])}: {content[:40]}")
+    while len(lines) > 1 and count_tokens(" / ".join(lines)) > max_tokens:
+        lines.pop(0)
+    return " / ".join(lines)
+
+
+class ConversationMemory:
+    """최근 N턴 + 누적 요약으로 대화 히스토리 크기를 제한"""
+
+    def __init__(
+        self, token_budget=None, keep_turns=None, summarize=None, compact_to_turns=None
+    ):
+        """
+        Args:
+            token_budget: 히스토리 최대 토큰 수 (기본값: env의 MEMORY_TOKEN_BUDGET)
+            keep_turns: 그대로 유지할 최근 턴 수 (기본값: env의 MEMORY_KEEP_TURNS)
+            compact_to_turns: 요약 후 남길 최근 턴 수
+                              (기본값: env의 MEMORY_COMPACT_TO_TURNS, keep_turns 이하)
+            summarize: (이전 요약, 요약할 메시지 목록) → 새 요약 문자열 함수
+                       (없거나 실패하면 단순 요약 사용)
+        """
+        self.token_budget = MEMORY_TOKEN_BUDGET if token_budget is None else token_budget
+        self.keep_turns = MEMORY_KEEP_TURNS if keep_turns is None else keep_turns
+        if compact_to_turns is None:
+            compact_to_turns = MEMORY_COMPACT_TO_TURNS
+        self.compact_to_turns = max(0, min(compact_to_turns, self.keep_turns))
+        self.summarize = summarize
+        self.summary = ""
+        self.last_prompt_tokens = 0
+        # messages 목록과 요약을 보호 (호출하는 쪽도 목록을 바꿀 때 사용, 재진입 가능)
+        self.lock = threading.RLock()
+        self._compacting = False
+        self._generation = 0  # clear()마다 증가 (진행 중인 요약 결과를 버리기 위해)
+
+    def load(self, messages):
+        """
+        load_memory() 결과에서 요약 항목을 분리
+
+        Returns:
+            list: 요약을 제외한 메시지 목록
+        """
+        rest = []
+        for m in messages:
+            if m.get("role") == SUMMARY_ROLE:
+                self.summary = m.get("content", "")
+            else:
+                rest.append(m)
+        return rest
+
+    def saved(self, messages):
+        """save_memory()용: 요약을 맨 앞 항목으로 붙인 메시지 목록"""
+        with self.lock:
+            messages = list(messages)
+            summary = self.summary
+        if summary:
+            return [{"role": SUMMARY_ROLE, "content": summary}] + messages
+        return messages
+
+    def clear(self):
+        with self.lock:
+            self.summary = ""
+            self._generation += 1
+
+    def window(self, messages):
+        """
+        API 요청용 메시지 목록 생성
+
+        시스템 프롬프트 뒤에 요약을 붙이고, 최근 메시지부터 예산 안에 들어가는 만큼 포함합니다.
+        (마지막 메시지는 예산을 넘어도 항상 포함)
+
+        Args:
+            messages: 전체 메시지 목록 (첫 항목이 시스템 프롬프트일 수 있음)
+
+        Returns:
+            tuple: (요청 메시지 목록, 추정 프롬프트 토큰 수)
+        """
+        with self.lock:
+            messages = list(messages)
+            summary = self.summary
+
+        system = None
+        if messages and messages[0].get("role") == "system":
+            system = dict(messages[0])
+            messages = messages[1:]
+
+        budget = self.token_budget
+        if summary:
+            budget -= count_tokens(SUMMARY_HEADER + summary)
+            if system is None:
+                system = {"role": "system", "content": ""}
+            system["content"] = system["content"] + SUMMARY_HEADER + summary
+
+        recent = []
+        for m in reversed(messages):
+            cost = count_tokens(m.get("content")) + MESSAGE_OVERHEAD_TOKENS
+            if recent and cost > budget:
+                break
+            recent.append(m)
+            budget -= cost
+        recent.reverse()
+
+        window = ([system] if system else []) + recent
+        self.last_prompt_tokens = count_message_tokens(window)
+        return window, self.last_prompt_tokens
+
+    def needs_compaction(self, messages):
+        with self.lock:
+            history = [m for m in messages if m.get("role") != "system"]
+        return len(history) > self.keep_turns * 2
+
+    def compact(self, messages):
+        """
+        최근 대화가 keep_turns 턴을 넘으면 compact_to_turns 턴만 남기고
+        나머지를 요약에 합친 뒤 messages에서 제거
+
+        요약(LLM 호출)은 잠금 밖에서 실행되므로, 그동안 다른 스레드가 lock을 잡고
+        messages에 메시지를 추가/교체해도 됩니다. 그 사이 clear()가 호출되면 결과를 버립니다.
+
+        Args:
+            messages: 전체 메시지 목록 (제자리에서 수정)
+
+        Returns:
+            bool: 요약을 갱신했으면 True
+        """
+        with self.lock:
+            if self._compacting:
+                return False
+            history = [m for m in messages if m.get("role") != "system"]
+            if len(history) <= self.keep_turns * 2:
+                return False
+            old = history[: len(history) - self.compact_to_turns * 2]
+            # 응답 없이 사용자 메시지로 끝나지 않도록 (턴 중간에서 자르지 않음)
+            while old and old[-1].get("role") == "user":
+                old.pop()
+            if not old:
+                return False
+            summary = self.summary
+            generation = self._generation
+            self._compacting = True
+
+        try:
+            new_summary = None
+            if self.summarize is not None:
+                try:
+                    new_summary = self.summarize(summary, old)
+                except Exception as e:
+                    print(f"⚠️  대화 요약 실패 (단순 요약 사용): {e}")
+            if not new_summary:
+                new_summary = _fallback_summary(
+                    summary, old, MEMORY_SUMMARY_MAX_TOKENS
+                )
+
+            folded = set(id(m) for m in old)
+            with self.lock:
+                if generation != self._generation:
+                    return False  # 요약하는 동안 대화가 초기화됨
+                messages[:] = [m for m in messages if id(m) not in folded]
+                self.summary = new_summary.strip()
+                remaining = len(messages)
+            print(
+                f"🗜️  대화 {len(old)}개를 요약에 합침 "
+                f"(요약 {count_tokens(new_summary)} 토큰, 남은 메시지 {remaining}개)"
+            )
+            return True
+        finally:
+            with self.lock:
+                self._compacting = False
+
+    def compact_async(self, messages, on_done=None):
+        """compact()를 백그라운드 스레드에서 실행 (응답 지연 없이 요약)"""
+        if not self.needs_compaction(messages):
+            return None
+
+        def _worker():
+            if self.compact(messages) and on_done is not None:
+                on_done()
+
+        thread = threading.Thread(target=_worker, name="memory-compact", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,173 @@
+"""
+asyncio 기반 DB 조회 (DatabaseManager 스레드 풀 어댑터)
+
+psycopg2는 동기 드라이버이므로 각 조회를 스레드 풀에서 실행하고
+asyncio.gather로 동시에 기다립니다. DatabaseManager의 연결 풀 덕분에
+동시에 실행되는 조회는 각자 다른 연결을 사용합니다.
+
+동기 코드(ChipiBrain 등)에서는 submit()으로 백그라운드 이벤트 루프에 코루틴을 넘기고
+반환된 Future로 나중에 결과를 받아, 조회가 다른 작업과 겹쳐 실행되도록 할 수 있습니다.
+
+사용 예:
+    adb = AsyncDatabaseManager(db_manager)
+    future = adb.submit(adb.fetch_context_data(serial))
+    ...  # 다른 작업
+    data = future.result(timeout=10)
+    context, user_name = db_manager.render_context(data)
+
+Python 3.7.3 호환: asyncio.to_thread(3.9+) 대신 run_in_executor 사용
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database.db_manager import DatabaseManager
+
+
+class AsyncDatabaseManager:
+    """DatabaseManager 조회 메서드의 asyncio 버전"""
+
+    def __init__(self, db=None, max_workers=None):
+        """
+        Args:
+            db: 사용할 DatabaseManager (없으면 새로 생성, connect()는 직접 호출)
+            max_workers: 조회 스레드 수 (기본값: DB 연결 풀 최대 크기)
+        """
+        self.db = db if db is not None else DatabaseManager()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or self.db.pool_max,
+            thread_name_prefix="db",
+        )
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+
+    async def _run(self, func, *args, **kwargs):
+        """동기 DB 메서드를 스레드 풀에서 실행"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def connect(self, timeout=5):
+        await self._run(self.db.connect, timeout=timeout)
+
+    async def get_user_by_email(self, email):
+        return await self._run(self.db.get_user_by_email, email)
+
+    async def get_user_by_device_serial(self, serial):
+        return await self._run(self.db.get_user_by_device_serial, serial)
+
+    async def get_device_info(self, serial):
+        return await self._run(self.db.get_device_info, serial)
+
+    async def get_sensor_data_by_serial(self, serial):
+        return await self._run(self.db.get_sensor_data_by_serial, serial)
+
+    async def get_sensor_trend(self, serial, limit=3):
+        return await self._run(self.db.get_sensor_trend, serial, limit=limit)
+
+    async def get_recent_logs(self, user_id, limit=5):
+        return await self._run(self.db.get_recent_logs, user_id, limit=limit)
+
+    async def _find_user(self, device_serial, user_email):
+        """이메일 → 시리얼 순으로 사용자 조회 (두 조회를 동시에 시작)"""
+        if not user_email:
+            return await self.get_user_by_device_serial(device_serial)
+        by_email, by_serial = await asyncio.gather(
+            self.get_user_by_email(user_email),
+            self.get_user_by_device_serial(device_serial),
+        )
+        if by_email and by_email.get("name"):
+            return by_email
+        return by_serial
+
+    async def _fetch_context_data_concurrent(self, device_serial, user_email=None):
+        """사용자/디바이스/센서/추세를 동시에 조회한 뒤 사용자 로그 조회"""
+        user, device_info, sensor_data, trend_data = await asyncio.gather(
+            self._find_user(device_serial, user_email),
+            self.get_device_info(device_serial),
+            self.get_sensor_data_by_serial(device_serial),
+            self.get_sensor_trend(device_serial, limit=3),
+        )
+        # 로그는 사용자 ID가 있어야 조회 가능
+        user_id = user.get("id") if user else None
+        recent_logs = await self.get_recent_logs(user_id, limit=3) if user_id else []
+        return {
+            "user": user,
+            "device_info": device_info,
+            "sensor_data": sensor_data,
+            "trend_data": trend_data,
+            "recent_logs": recent_logs,
+        }
+
+    async def fetch_context_data(self, device_serial, user_email=None):
+        """
+        build_context에 필요한 데이터 조회
+        (단일 쿼리가 켜져 있으면 한 번의 쿼리, 실패하거나 꺼져 있으면 테이블별 동시 조회)
+
+        Args:
+            device_serial: 디바이스 시리얼 번호
+            user_email: 사용자 이메일 (기본값: env의 USER_EMAIL)
+
+        Returns:
+            dict: {user, device_info, sensor_data, trend_data, recent_logs}
+        """
+        if user_email is None:
+            user_email = os.environ.get("USER_EMAIL")
+        if self.db.single_query_context:
+            try:
+                return await self._run(
+                    self.db.fetch_context_data, device_serial, user_email
+                )
+            except Exception as e:
+                print(f"⚠️  단일 쿼리 컨텍스트 조회 실패 (동시 조회로 대체): {e}")
+        return await self._fetch_context_data_concurrent(device_serial, user_email)
+
+    async def build_context(
+        self, device_serial, only_temperature=False, only_humidity=False
+    ):
+        """
+        DatabaseManager.build_context의 asyncio 버전
+
+        Returns:
+            tuple: (context: str, user_name: str or None)
+        """
+        try:
+            data = await self.fetch_context_data(device_serial)
+            return self.db.render_context(
+                data, only_temperature=only_temperature, only_humidity=only_humidity
+            )
+        except Exception as e:
+            print(f"❌ 컨텍스트 생성 오류: {e}")
+            return "", None
+
+    def submit(self, coro):
+        """
+        백그라운드 이벤트 루프에서 코루틴 실행 (동기 코드용)
+
+        Returns:
+            concurrent.futures.Future: result(timeout)으로 결과 대기
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="db-async", daemon=True
+                )
+                self._loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def close(self):
+        """백그라운드 이벤트 루프와 스레드 풀 종료 (DB 연결 풀은 db.close()로 종료)"""
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join(timeout=1.0)
+                self._loop.close()
+                self._loop = None
+                self._loop_thread = None
+        self._executor.shutdown(wait=False)
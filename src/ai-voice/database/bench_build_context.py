@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+build_context 벤치마크 (순차 조회 vs 단일 쿼리)
+
+같은 디바이스에 대해 두 방식으로 컨텍스트를 만들어
+DB 왕복(execute) 횟수와 소요 시간을 비교하고, 결과 문자열이 같은지 확인합니다.
+
+사용법: python3 database/bench_build_context.py [--serial SERIAL] [--iterations 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 상위 디렉토리를 sys.path에 추가
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from dotenv import load_dotenv
+
+config_path = parent_dir / "config" / ".env"
+if config_path.exists():
+    load_dotenv(str(config_path))
+
+from database.db_manager import DatabaseManager
+
+
+class CountingCursor:
+    """execute 호출 수를 세는 커서 래퍼"""
+
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._counter["queries"] += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class CountingConnection:
+    """cursor()가 CountingCursor를 반환하는 연결 래퍼"""
+
+    def __init__(self, conn, counter):
+        self._conn = conn
+        self.counter = counter
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._conn.cursor(*args, **kwargs), self.counter)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name in ("_conn", "counter"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+
+class CountingPool:
+    """getconn()이 CountingConnection을 반환하는 연결 풀 래퍼"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self.counter = {"queries": 0}
+
+    def getconn(self, *args, **kwargs):
+        return CountingConnection(self._pool.getconn(*args, **kwargs), self.counter)
+
+    def putconn(self, conn, *args, **kwargs):
+        return self._pool.putconn(conn._conn, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+def run(db, serial, single_query, iterations):
+    """
+    Returns:
+        tuple: (컨텍스트, 1회당 쿼리 수, 1회당 평균 ms, 최소 ms)
+    """
+    db.single_query_context = single_query
+    # 첫 실행은 연결/플랜 캐시 워밍업
+    context, _user_name = db.build_context(serial)
+
+    db._pool.counter["queries"] = 0
+    elapsed = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        db.build_context(serial)
+        elapsed.append((time.perf_counter() - started) * 1000)
+    queries = db._pool.counter["queries"] / iterations
+    return context, queries, sum(elapsed) / len(elapsed), min(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="build_context 순차 vs 단일 쿼리")
+    parser.add_argument("--serial", default=os.environ.get("DEVICE_SERIAL"))
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    if not args.serial:
+        print("❌ --serial 또는 DEVICE_SERIAL 환경 변수가 필요합니다.")
+        sys.exit(1)
+
+    db = DatabaseManager()
+    # 캐시 없이 매번 DB를 조회하도록 설정
+    db.sensor_cache_ttl = 0
+    db.metadata_cache.ttl = 0
+    db.connect()
+    db._pool = CountingPool(db._pool)
+    # 상태 확인(SELECT 1)이 쿼리 수에 섞이지 않도록 비활성화
+    db.health_check_interval = float("inf")
+
+    try:
+        seq_context, seq_queries, seq_avg, seq_min = run(
+            db, args.serial, False, args.iterations
+        )
+        one_context, one_queries, one_avg, one_min = run(
+            db, args.serial, True, args.iterations
+        )
+    finally:
+        db.close()
+
+    print("=" * 60)
+    print(f"디바이스: {args.serial}, 반복: {args.iterations}회, DB: {db.host}")
+    print("-" * 60)
+    print(f"{'방식':<12}{'쿼리 수':>10}{'평균 ms':>12}{'최소 ms':>12}")
+    print(f"{'순차 조회':<12}{seq_queries:>10.1f}{seq_avg:>12.1f}{seq_min:>12.1f}")
+    print(f"{'단일 쿼리':<12}{one_queries:>10.1f}{one_avg:>12.1f}{one_min:>12.1f}")
+    print("-" * 60)
+    print(f"속도 향상: {seq_avg / max(one_avg, 0.001):.1f}배")
+    if seq_context == one_context:
+        print("✓ 두 방식의 컨텍스트가 같습니다.")
+    else:
+        print("⚠️  컨텍스트가 다릅니다:")
+        print("--- 순차 조회 ---")
+        print(seq_context)
+        print("--- 단일 쿼리 ---")
+        print(one_context)
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
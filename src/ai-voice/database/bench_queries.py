@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+DB 조회 마이크로 벤치마크 (SELECT * + RealDictCursor vs 컬럼 지정 + prepared statement + namedtuple)
+
+한 대화 턴에서 실행되는 조회(사용자, 디바이스, 최신 센서, 집계, 최근 센서, 로그)를
+두 방식으로 반복 실행해 턴당 소요 시간, 클라이언트 CPU 시간, 전송 데이터량을 비교합니다.
+전송 데이터량은 받은 값의 텍스트 길이 합으로 추정합니다 (텍스트 프로토콜 기준 근사치).
+
+사용법: python3 database/bench_queries.py [--serial SERIAL] [--email EMAIL] [--iterations 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 상위 디렉토리를 sys.path에 추가
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from dotenv import load_dotenv
+
+config_path = parent_dir / "config" / ".env"
+if config_path.exists():
+    load_dotenv(str(config_path))
+
+from psycopg2.extras import RealDictCursor
+
+from database.db_manager import DatabaseManager
+
+# 변경 전 조회 방식 (SELECT *, 매번 파싱, RealDictCursor → dict)
+LEGACY_QUERIES = [
+    ("SELECT * FROM users WHERE email = %s", lambda a: (a.email,)),
+    (
+        "SELECT u.* FROM devices d LEFT JOIN users u ON u.id = d.user_id "
+        "WHERE d.serial = %s LIMIT 1",
+        lambda a: (a.serial,),
+    ),
+    ("SELECT * FROM devices WHERE serial = %s", lambda a: (a.serial,)),
+    (
+        "SELECT * FROM sensor_data WHERE serial = %s ORDER BY updated_at DESC LIMIT 1",
+        lambda a: (a.serial,),
+    ),
+    (
+        "SELECT * FROM sensor_data_rollups WHERE serial = %s AND resolution = '1m' "
+        "ORDER BY bucket_start DESC LIMIT 3",
+        lambda a: (a.serial,),
+    ),
+    (
+        "SELECT * FROM sensor_data WHERE serial = %s ORDER BY created_at DESC LIMIT 3",
+        lambda a: (a.serial,),
+    ),
+    (
+        "SELECT * FROM logs WHERE user_id = %s ORDER BY created_at DESC LIMIT 3",
+        lambda a: (a.user_id,),
+    ),
+]
+
+
+def payload_bytes(rows):
+    """받은 값의 텍스트 길이 합 (전송량 근사치)"""
+    total = 0
+    for row in rows:
+        values = row.values() if isinstance(row, dict) else row
+        total += sum(len(str(v).encode("utf-8")) for v in values if v is not None)
+    return total
+
+
+def legacy_turn(db, args):
+    rows = []
+    with db.connection() as conn:
+        for sql, params in LEGACY_QUERIES:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(sql, params(args))
+                rows.extend(dict(row) for row in cur.fetchall())
+    return rows
+
+
+def projected_turn(db, args):
+    rows = [
+        db.get_user_by_email(args.email),
+        db.get_user_by_device_serial(args.serial),
+        db.get_device_info(args.serial),
+        db.get_sensor_data_by_serial(args.serial),
+    ]
+    rows.extend(db.get_sensor_rollups(args.serial, limit=3))
+    rows.extend(db.get_latest_sensor_data(args.serial, limit=3))
+    rows.extend(db.get_recent_logs(args.user_id, limit=3))
+    return [row for row in rows if row is not None]
+
+
+def measure(turn, db, args):
+    """
+    Returns:
+        tuple: (턴당 평균 ms, 턴당 클라이언트 CPU ms, 턴당 바이트)
+    """
+    turn(db, args)  # 워밍업 (prepared statement 생성 포함)
+    wall = cpu = 0.0
+    transferred = 0
+    for _ in range(args.iterations):
+        started, cpu_started = time.perf_counter(), time.process_time()
+        rows = turn(db, args)
+        wall += time.perf_counter() - started
+        cpu += time.process_time() - cpu_started
+        transferred += payload_bytes(rows)
+    n = args.iterations
+    return wall / n * 1000, cpu / n * 1000, transferred / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DB 조회 방식별 마이크로 벤치마크")
+    parser.add_argument("--serial", default=os.environ.get("DEVICE_SERIAL"))
+    parser.add_argument("--email", default=os.environ.get("USER_EMAIL", ""))
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if not args.serial:
+        print("❌ --serial 또는 DEVICE_SERIAL 환경 변수가 필요합니다.")
+        sys.exit(1)
+
+    db = DatabaseManager()
+    # 캐시 없이 매번 DB를 조회하도록 설정
+    db.sensor_cache_ttl = 0
+    db.metadata_cache.ttl = 0
+    db.connect()
+
+    try:
+        user = db.get_user_by_device_serial(args.serial)
+        args.user_id = user.get("id") if user else None
+        results = [("SELECT *", measure(legacy_turn, db, args))]
+        db.prepared_statements = False
+        results.append(("컬럼 지정", measure(projected_turn, db, args)))
+        db.prepared_statements = True
+        results.append(("+ prepared", measure(projected_turn, db, args)))
+    finally:
+        db.close()
+
+    print("=" * 60)
+    print(f"디바이스: {args.serial}, 반복: {args.iterations}회, DB: {db.host}")
+    print("-" * 60)
+    print(f"{'방식':<12}{'턴당 ms':>12}{'CPU ms':>12}{'바이트':>12}")
+    for label, (wall, cpu, transferred) in results:
+        print(f"{label:<12}{wall:>12.1f}{cpu:>12.2f}{transferred:>12,.0f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
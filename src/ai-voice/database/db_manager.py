@@ -1,4 +1,10 @@
 import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
 
 from dotenv import load_dotenv
 
@@ -6,7 +12,7 @@ from dotenv import load_dotenv
 # ImportError뿐만 아니라 OSError(시스템 라이브러리 누락)도 처리
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.pool import ThreadedConnectionPool
 
     HAS_PSYCOPG2 = True
 except (ImportError, OSError, Exception) as e:
@@ -22,6 +28,134 @@ except (ImportError, OSError, Exception) as e:
     print("   sudo apt-get update && sudo apt-get install libpq-dev")
 
 
+def row_type(name, columns):
+    """
+    컬럼 목록으로 가벼운 행 타입(namedtuple) 생성
+
+    RealDictCursor의 dict 대신 튜플로 받아 변환 비용과 메모리를 줄이면서,
+    기존 코드처럼 row["name"], row.get("name"), dict(row)도 그대로 사용할 수 있습니다.
+    """
+    base = namedtuple(name, columns)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def getitem(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return base.__getitem__(self, key)
+
+    def keys(self):
+        return self._fields
+
+    return type(
+        name,
+        (base,),
+        {"__slots__": (), "get": get, "__getitem__": getitem, "keys": keys},
+    )
+
+
+# 실제로 사용하는 컬럼만 조회 (SELECT * 대신)
+UserRow = row_type("UserRow", ("id", "name", "email"))
+DeviceRow = row_type("DeviceRow", ("id", "serial", "name", "status", "user_id"))
+SensorRow = row_type("SensorRow", ("temperature", "humidity", "created_at"))
+RollupRow = row_type(
+    "RollupRow",
+    (
+        "bucket_start",
+        "count",
+        "temperature_min",
+        "temperature_max",
+        "temperature_sum",
+        "humidity_min",
+        "humidity_max",
+        "humidity_sum",
+        "temperature_avg",
+        "humidity_avg",
+    ),
+)
+LogRow = row_type("LogRow", ("type", "created_at"))
+ContextRow = row_type(
+    "ContextRow", ("app_user", "device", "sensor", "rollups", "recent", "logs")
+)
+ColumnRow = row_type("ColumnRow", ("column_name",))
+
+_PLACEHOLDER = re.compile(r"\$(\d+)")
+
+
+class MetadataCache:
+    """
+    TTL + LRU 캐시 (사용자/디바이스 정보처럼 거의 바뀌지 않는 데이터용)
+
+    여러 스레드(AsyncDatabaseManager의 조회 스레드 등)에서 동시에 사용할 수 있습니다.
+    값이 None인 조회 결과(디바이스 없음 등)도 TTL 동안 캐시합니다.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl=300.0, maxsize=128):
+        """
+        Args:
+            ttl: 항목 유지 시간 (초, 0이면 캐시 끔)
+            maxsize: 최대 항목 수 (넘으면 가장 오래 사용하지 않은 항목부터 제거)
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._items = OrderedDict()  # key → (저장 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """캐시에서 값 조회 (없거나 만료되면 default)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and time.monotonic() - item[0] < self.ttl:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, match=None):
+        """
+        항목 제거
+
+        Args:
+            match: key를 받아 True를 반환하면 제거하는 함수 (None이면 전체 제거)
+        """
+        with self._lock:
+            if match is None:
+                self._items.clear()
+                return
+            for key in [k for k in self._items if match(k)]:
+                del self._items[key]
+
+    def cached(self, key, load):
+        """
+        캐시에 있으면 반환, 없으면 load()로 조회해서 저장 후 반환
+        (load에서 예외가 나면 저장하지 않고 그대로 전달)
+        """
+        value = self.get(key, self._MISSING)
+        if value is self._MISSING:
+            value = load()
+            self.set(key, value)
+        return value
+
+
 class DatabaseManager:
     """PostgreSQL 데이터베이스 연결 및 조회"""
 
@@ -51,10 +185,58 @@ class DatabaseManager:
         if not self.host:
             raise ValueError("DB_HOST가 설정되지 않았습니다.")
 
-        self.conn = None
+        # 연결 풀 (음성 루프, 백그라운드 스레드가 호출마다 연결을 빌려 씀)
+        self.pool_max = int(os.environ.get("DB_POOL_MAX", "4"))
+        # 기본값은 pool_max: 비동기 컨텍스트 조회가 한 턴에 여러 연결을 동시에 쓰는데,
+        # ThreadedConnectionPool은 유휴 연결이 minconn개를 넘으면 반납된 연결을 닫으므로
+        # minconn이 작으면 매 턴 TCP/인증 연결을 새로 맺게 됨
+        self.pool_min = min(
+            int(os.environ.get("DB_POOL_MIN", str(self.pool_max))), self.pool_max
+        )
+        # 연결을 빌릴 때 최대 대기 시간 (초, 모든 연결이 사용 중일 때)
+        self.pool_timeout = float(os.environ.get("DB_POOL_TIMEOUT", "10.0"))
+        # 이 시간(초) 이상 쉬었던 연결은 빌려주기 전에 SELECT 1로 확인
+        self.health_check_interval = float(
+            os.environ.get("DB_HEALTH_CHECK_INTERVAL", "30.0")
+        )
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(self.pool_max)
+        # 연결 객체 → 마지막 반납 시각 (id()는 닫힌 연결의 값이 재사용되므로 객체를 키로 사용,
+        # 풀이 닫아 버린 연결은 자동으로 빠짐)
+        self._last_used = weakref.WeakKeyDictionary()
+        self._opened_at = 0.0
+
+        # 최신 센서 데이터 캐시 {serial: (조회 시각, 데이터)}
+        # 한 턴에서 wait_run과 build_context가 같은 serial을 여러 번 조회하므로
+        # SENSOR_CACHE_TTL(초) 동안은 DB를 다시 조회하지 않음 (0이면 캐시 끔)
+        self.sensor_cache_ttl = float(os.environ.get("SENSOR_CACHE_TTL", "5.0"))
+        self._sensor_cache = {}
+
+        # 사용자/디바이스 정보 캐시 (거의 바뀌지 않으므로 매 턴 조회하지 않음)
+        # 센서 데이터는 이 캐시에 넣지 않음 (위 SENSOR_CACHE_TTL 참고)
+        self.metadata_cache = MetadataCache(
+            ttl=float(os.environ.get("METADATA_CACHE_TTL", "300")),
+            maxsize=int(os.environ.get("METADATA_CACHE_SIZE", "128")),
+        )
+
+        # build_context를 한 번의 쿼리로 처리할지 여부 (false면 메서드별 순차 조회)
+        self.single_query_context = os.environ.get(
+            "DB_SINGLE_QUERY_CONTEXT", "true"
+        ).lower() in ("true", "1", "yes")
+        # sensor_data_rollups 테이블이 없으면 첫 조회 실패 후 False로 바뀜
+        self._rollups_available = True
+
+        # 서버 측 prepared statement 사용 여부 (PgBouncer transaction 모드 등에서는 false)
+        self.prepared_statements = os.environ.get(
+            "DB_PREPARED_STATEMENTS", "true"
+        ).lower() in ("true", "1", "yes")
+        # 연결 객체 → 해당 연결에서 PREPARE한 문장 이름 (_last_used와 같은 이유로 WeakKeyDictionary)
+        self._prepared = weakref.WeakKeyDictionary()
+        # logs 테이블의 활동 종류 컬럼 ("type" 또는 "action", 첫 조회 시 확인)
+        self._log_type_column = None
 
     def connect(self, timeout=5):
-        """데이터베이스 연결
+        """데이터베이스 연결 풀 생성 (DB_POOL_MIN개 연결을 미리 열어 둠)
 
         Args:
             timeout: 연결 타임아웃 (초, 기본값: 5)
@@ -63,7 +245,9 @@ class DatabaseManager:
             raise ImportError("psycopg2가 설치되지 않았습니다.")
 
         try:
-            self.conn = psycopg2.connect(
+            self._pool = ThreadedConnectionPool(
+                self.pool_min,
+                self.pool_max,
                 host=self.host,
                 port=self.port,
                 database=self.database,
@@ -71,7 +255,8 @@ class DatabaseManager:
                 password=self.password,
                 connect_timeout=timeout,  # 연결 타임아웃 설정
             )
-            print("✓ PostgreSQL 연결 성공")
+            self._opened_at = time.monotonic()
+            print(f"✓ PostgreSQL 연결 성공 (풀: {self.pool_min}~{self.pool_max}개)")
         except psycopg2.OperationalError as e:
             # 연결 오류는 상세 메시지 없이 간단하게만 표시
             error_msg = str(e)
@@ -83,11 +268,167 @@ class DatabaseManager:
             raise
 
     def close(self):
-        """데이터베이스 연결 종료"""
-        if self.conn:
-            self.conn.close()
+        """데이터베이스 연결 풀 종료"""
+        if self._pool:
+            self._pool.closeall()
+            self._pool = None
+            self._last_used.clear()
+            self._prepared.clear()
             print("✓ PostgreSQL 연결 종료")
 
+    @staticmethod
+    def _use_autocommit(conn):
+        # 조회만 하므로 트랜잭션을 열지 않음 (오류가 나도 연결이 aborted 상태로 남지 않음)
+        if not conn.closed and not conn.autocommit:
+            conn.autocommit = True
+
+    @classmethod
+    def _is_alive(cls, conn):
+        """SELECT 1로 연결 상태 확인"""
+        try:
+            cls._use_autocommit(conn)
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _is_stale(self, conn):
+        """닫혔거나, 오래 쉬었고 SELECT 1에 실패하는 연결인지 확인"""
+        if conn.closed:
+            return True
+        # 한 번도 반납되지 않은 연결은 풀 생성 시각부터 쉰 것으로 봄
+        idle = time.monotonic() - self._last_used.get(conn, self._opened_at)
+        return idle > self.health_check_interval and not self._is_alive(conn)
+
+    def _checkout(self):
+        """
+        풀에서 연결을 빌림 (오래 쉬었던 연결은 상태 확인, 끊긴 연결은 새로 연결)
+
+        Returns:
+            psycopg2 connection (autocommit)
+        """
+        if self._pool is None:
+            raise RuntimeError("connect()를 먼저 호출하세요.")
+        # ThreadedConnectionPool은 모두 사용 중이면 바로 PoolError를 내므로 세마포어로 대기
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise TimeoutError("데이터베이스 연결 풀 대기 시간 초과")
+        try:
+            # 네트워크 장애 뒤에는 유휴 연결이 모두 끊겨 있을 수 있으므로
+            # 살아 있는 연결(또는 풀이 새로 맺은 연결)이 나올 때까지 끊긴 연결을 버림
+            discarded = 0
+            for _ in range(self.pool_max):
+                conn = self._pool.getconn()
+                if not self._is_stale(conn):
+                    break
+                self._discard(conn)
+                discarded += 1
+            else:
+                # 유휴 연결(최대 pool_max개)이 모두 끊겨 있었음: 풀이 새로 연결
+                conn = self._pool.getconn()
+            if discarded:
+                print(f"⚠️  끊어진 DB 연결 {discarded}개를 버리고 다시 연결합니다.")
+            self._use_autocommit(conn)
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _forget(self, conn):
+        self._last_used.pop(conn, None)
+        self._prepared.pop(conn, None)
+
+    def _discard(self, conn):
+        self._forget(conn)
+        self._pool.putconn(conn, close=True)
+
+    def _checkin(self, conn, broken=False):
+        """빌린 연결 반납 (broken이면 닫고 버림)"""
+        try:
+            if broken or conn.closed:
+                self._discard(conn)
+            else:
+                self._last_used[conn] = time.monotonic()
+                self._pool.putconn(conn)
+                # 유휴 연결이 minconn개 이상이면 풀이 반납된 연결을 닫음
+                if conn.closed:
+                    self._forget(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        풀에서 연결을 빌려 쓰고 반납하는 컨텍스트 매니저
+        (여러 스레드가 동시에 호출해도 각자 다른 연결을 사용)
+
+        사용 예:
+            with db.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(...)
+        """
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._checkin(conn, broken=broken)
+
+    def _execute(self, conn, cur, name, sql, params):
+        """
+        $1, $2 자리표시자를 쓰는 쿼리 실행
+
+        prepared_statements가 켜져 있고 name이 있으면 연결마다 한 번 PREPARE한 뒤
+        EXECUTE로 실행해 서버의 파싱/플래닝을 생략합니다.
+        """
+        if self.prepared_statements and name:
+            prepared = self._prepared.setdefault(conn, set())
+            if name not in prepared:
+                cur.execute(f"PREPARE {name} AS {sql}")
+                prepared.add(name)
+            if params:
+                placeholders = ", ".join(["%s"] * len(params))
+                cur.execute(f"EXECUTE {name} ({placeholders})", params)
+            else:
+                cur.execute(f"EXECUTE {name}")
+        else:
+            # $n → %(pn)s (같은 자리표시자를 여러 번 써도 되도록 이름 있는 파라미터 사용)
+            cur.execute(
+                _PLACEHOLDER.sub(r"%(p\1)s", sql),
+                {f"p{i}": value for i, value in enumerate(params or (), 1)},
+            )
+
+    def _query(self, sql, params=None, fetch="all", row=None, name=None):
+        """
+        풀의 연결로 쿼리 실행 (연결이 끊겨 있으면 새 연결로 한 번 재시도)
+
+        Args:
+            sql: 쿼리 ($1, $2 자리표시자)
+            params: 쿼리 파라미터 (튜플)
+            fetch: "one"이면 한 행(또는 None), "all"이면 행 리스트
+            row: 행 타입 (row_type으로 만든 namedtuple, SELECT 컬럼 순서와 같아야 함)
+            name: prepared statement 이름 (None이면 매번 파싱)
+
+        Returns:
+            row, None 또는 list
+        """
+        for attempt in range(2):
+            try:
+                with self.connection() as conn:
+                    with conn.cursor() as cur:
+                        self._execute(conn, cur, name, sql, params)
+                        if fetch == "one":
+                            data = cur.fetchone()
+                            return row._make(data) if data else None
+                        return [row._make(data) for data in cur.fetchall()]
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                if attempt:
+                    raise
+                print("⚠️  DB 연결이 끊어져 다시 연결 후 재시도합니다.")
+
     def get_user_by_email(self, email):
         """
         이메일로 사용자 정보 조회
@@ -99,18 +440,18 @@ class DatabaseManager:
             dict: 사용자 정보 (id, name, email, etc.)
         """
         try:
-            cur = self.conn.cursor(cursor_factory=RealDictCursor)
-
-            try:
-                cur.execute("SELECT * FROM users WHERE email = %s", (email,))
-                user = cur.fetchone()
-                return dict(user) if user else None
-            finally:
-                cur.close()
-
+            return self.metadata_cache.cached(
+                ("user_email", email),
+                lambda: self._query(
+                    "SELECT id, name, email FROM users WHERE email = $1 LIMIT 1",
+                    (email,),
+                    fetch="one",
+                    row=UserRow,
+                    name="user_by_email",
+                ),
+            )
         except Exception as e:
             print(f"❌ 이메일로 사용자 조회 오류: {e}")
-            self.conn.rollback()
             return None
 
     def get_user_by_device_serial(self, serial):
@@ -124,32 +465,31 @@ class DatabaseManager:
             dict: 사용자 정보 (id, name, email, etc.)
         """
         try:
-            cur = self.conn.cursor(cursor_factory=RealDictCursor)
-
-            try:
-                # 디바이스에서 user_id 조회
-                cur.execute("SELECT user_id FROM devices WHERE serial = %s", (serial,))
-                device = cur.fetchone()
-
-                if not device:
-                    print(
-                        f"⚠️  시리얼 '{serial}'에 해당하는 디바이스를 찾을 수 없습니다."
-                    )
-                    return None
-
-                user_id = device["user_id"]
+            # 디바이스 → 사용자 (LEFT JOIN: 디바이스가 없으면 행 없음, 사용자가 없으면 id가 NULL)
+            user = self.metadata_cache.cached(
+                ("user_serial", serial),
+                lambda: self._query(
+                    """
+                    SELECT u.id, u.name, u.email FROM devices d
+                    LEFT JOIN users u ON u.id = d.user_id
+                    WHERE d.serial = $1
+                    LIMIT 1
+                    """,
+                    (serial,),
+                    fetch="one",
+                    row=UserRow,
+                    name="user_by_serial",
+                ),
+            )
 
-                # 사용자 정보 조회
-                cur.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-                user = cur.fetchone()
+            if user is None:
+                print(f"⚠️  시리얼 '{serial}'에 해당하는 디바이스를 찾을 수 없습니다.")
+                return None
 
-                return dict(user) if user else None
-            finally:
-                cur.close()
+            return user if user.get("id") is not None else None
 
         except Exception as e:
             print(f"❌ 사용자 조회 오류: {e}")
-            self.conn.rollback()  # 트랜잭션 초기화
             return None
 
     def get_device_info(self, serial):
@@ -163,18 +503,42 @@ class DatabaseManager:
             dict: 디바이스 정보
         """
         try:
-            cur = self.conn.cursor(cursor_factory=RealDictCursor)
-
-            cur.execute("SELECT * FROM devices WHERE serial = %s", (serial,))
-            device = cur.fetchone()
-            cur.close()
-
-            return dict(device) if device else None
-
+            return self.metadata_cache.cached(
+                ("device", serial),
+                lambda: self._query(
+                    """
+                    SELECT id, serial, name, status, user_id FROM devices
+                    WHERE serial = $1
+                    LIMIT 1
+                    """,
+                    (serial,),
+                    fetch="one",
+                    row=DeviceRow,
+                    name="device_by_serial",
+                ),
+            )
         except Exception as e:
             print(f"❌ 디바이스 조회 오류: {e}")
             return None
 
+    def invalidate_metadata(self, serial=None, email=None):
+        """
+        사용자/디바이스 정보 캐시 비우기
+        (디바이스 이름 변경, 사용자 연결 변경 등 DB를 직접 바꾼 뒤 호출)
+
+        Args:
+            serial: 비울 디바이스 시리얼
+            email: 비울 사용자 이메일
+            (둘 다 None이면 전체)
+        """
+        if serial is None and email is None:
+            self.metadata_cache.invalidate()
+            return
+        self.metadata_cache.invalidate(
+            lambda key: (serial is not None and serial in key[1:])
+            or (email is not None and email in key[1:])
+        )
+
     def get_latest_sensor_data(self, serial, limit=1):
         """
         최신 센서 데이터 조회 (serial 기반)
@@ -187,72 +551,184 @@ class DatabaseManager:
             list: 센서 데이터 리스트
         """
         try:
-            cur = self.conn.cursor(cursor_factory=RealDictCursor)
-
-            try:
-                cur.execute(
-                    """
-                    SELECT * FROM sensor_data
-                    WHERE serial = %s
-                    ORDER BY created_at DESC
-                    LIMIT %s
-                    """,
-                    (serial, limit),
-                )
-                data = cur.fetchall()
-                return [dict(row) for row in data] if data else []
-            finally:
-                cur.close()
-
+            return self._query(
+                """
+                SELECT temperature, humidity, created_at FROM sensor_data
+                WHERE serial = $1
+                ORDER BY created_at DESC
+                LIMIT $2
+                """,
+                (serial, limit),
+                row=SensorRow,
+                name="sensor_recent",
+            )
         except Exception as e:
             print(f"❌ 센서 데이터 조회 오류: {e}")
-            self.conn.rollback()  # 트랜잭션 초기화
             return []
 
+    def invalidate_sensor_cache(self, serial=None):
+        """
+        최신 센서 데이터 캐시 비우기
+
+        Args:
+            serial: 비울 디바이스 시리얼 (None이면 전체)
+        """
+        if serial is None:
+            self._sensor_cache.clear()
+        else:
+            self._sensor_cache.pop(serial, None)
+
     def get_sensor_data_by_serial(self, serial):
         """
         디바이스 시리얼로 최신 센서 데이터 직접 조회
         (updated_at 기준으로 가장 최신 데이터)
+        SENSOR_CACHE_TTL 이내에 조회한 적이 있으면 DB 대신 캐시에서 반환
 
         Args:
             serial: 디바이스 시리얼 번호
 
         Returns:
-            dict: 최신 센서 데이터 (temperature, humidity 포함)
+            SensorRow: 최신 센서 데이터 (temperature, humidity, created_at)
         """
-        try:
-            cur = self.conn.cursor(cursor_factory=RealDictCursor)
+        cached = self._sensor_cache.get(serial)
+        if cached and time.monotonic() - cached[0] < self.sensor_cache_ttl:
+            # 행은 변경할 수 없는 튜플이므로 복사 없이 반환
+            return cached[1]
 
-            try:
-                # sensor_data 테이블에서 직접 serial로 최신 데이터 조회 (updated_at 기준)
-                cur.execute(
-                    """
-                    SELECT * FROM sensor_data
-                    WHERE serial = %s
-                    ORDER BY updated_at DESC
-                    LIMIT 1
-                    """,
-                    (serial,),
-                )
-                data = cur.fetchone()
+        try:
+            # sensor_data 테이블에서 직접 serial로 최신 데이터 조회 (updated_at 기준)
+            data = self._query(
+                """
+                SELECT temperature, humidity, created_at FROM sensor_data
+                WHERE serial = $1
+                ORDER BY updated_at DESC
+                LIMIT 1
+                """,
+                (serial,),
+                fetch="one",
+                row=SensorRow,
+                name="sensor_latest",
+            )
+            if self.sensor_cache_ttl > 0:
+                self._sensor_cache[serial] = (time.monotonic(), data)
 
-                if data:
-                    print(f"✓ 센서 데이터 조회 성공: {dict(data)}")
-                    return dict(data)
-                else:
-                    print(f"⚠️  센서 데이터 없음 (시리얼: {serial})")
-                    return None
-            finally:
-                cur.close()
+            if data:
+                print(f"✓ 센서 데이터 조회 성공: {data}")
+                return data
+            else:
+                print(f"⚠️  센서 데이터 없음 (시리얼: {serial})")
+                return None
 
         except Exception as e:
             print(f"❌ 센서 데이터 조회 오류: {e}")
-            self.conn.rollback()  # 트랜잭션 초기화
             import traceback
 
             traceback.print_exc()
             return None
 
+    def get_sensor_rollups(self, serial, resolution="1m", limit=3):
+        """
+        센서 데이터 집계 조회 (서버 수집 파이프라인이 미리 계산한 sensor_data_rollups)
+        기본키 (serial, resolution, bucket_start) 인덱스만 읽으므로 원본 행 수와 무관
+
+        Args:
+            serial: 디바이스 시리얼 번호
+            resolution: 집계 단위 ("1m", "1h", "1d")
+            limit: 조회할 구간 수 (최신 구간부터)
+
+        Returns:
+            list: 구간별 집계 (count, temperature_sum/avg, humidity_sum/avg 등)
+        """
+        try:
+            return self._query(
+                """
+                SELECT bucket_start, count,
+                       temperature_min, temperature_max, temperature_sum,
+                       humidity_min, humidity_max, humidity_sum,
+                       temperature_sum / NULLIF(count, 0) AS temperature_avg,
+                       humidity_sum / NULLIF(count, 0) AS humidity_avg
+                FROM sensor_data_rollups
+                WHERE serial = $1 AND resolution = $2
+                ORDER BY bucket_start DESC
+                LIMIT $3
+                """,
+                (serial, resolution, limit),
+                row=RollupRow,
+                name="sensor_rollups",
+            )
+        except Exception as e:
+            # 집계 테이블이 아직 없을 수 있음 (서버 SENSOR_ROLLUPS 비활성화 등)
+            print(f"⚠️  센서 집계 조회 실패 (원본 데이터 사용): {e}")
+            return []
+
+    @staticmethod
+    def _trend_from_rollups(rollups):
+        """집계 구간 목록(최신부터) → 추세 데이터 (구간이 2개 미만이면 None)"""
+        if len(rollups) <= 1:
+            return None
+        temps = [
+            float(r["temperature_avg"])
+            for r in rollups
+            if r.get("temperature_avg") is not None
+        ]
+        humids = [
+            float(r["humidity_avg"]) for r in rollups if r.get("humidity_avg") is not None
+        ]
+        # 구간별 측정 개수로 가중 평균
+        count = sum(r["count"] for r in rollups)
+        temp_sum = sum(
+            float(r["temperature_sum"])
+            for r in rollups
+            if r.get("temperature_sum") is not None
+        )
+        humid_sum = sum(
+            float(r["humidity_sum"]) for r in rollups if r.get("humidity_sum") is not None
+        )
+        return {
+            "temperatures": temps,
+            "humidities": humids,
+            "avg_temperature": temp_sum / count if temps and count else None,
+            "avg_humidity": humid_sum / count if humids and count else None,
+        }
+
+    @staticmethod
+    def _trend_from_rows(rows):
+        """원본 센서 행 목록(최신부터) → 추세 데이터 (행이 2개 미만이면 None)"""
+        if len(rows) <= 1:
+            return None
+        temps = [
+            float(d.get("temperature", 0))
+            for d in rows
+            if d.get("temperature") is not None
+        ]
+        humids = [
+            float(d.get("humidity", 0)) for d in rows if d.get("humidity") is not None
+        ]
+        return {
+            "temperatures": temps,
+            "humidities": humids,
+            "avg_temperature": sum(temps) / len(temps) if temps else None,
+            "avg_humidity": sum(humids) / len(humids) if humids else None,
+        }
+
+    def get_sensor_trend(self, serial, limit=3):
+        """
+        최근 센서 데이터 추세 (최신 값부터의 온도/습도 목록과 평균)
+        1분 집계를 우선 사용하고, 없으면 최근 원본 행으로 계산
+
+        Args:
+            serial: 디바이스 시리얼 번호
+            limit: 사용할 구간(또는 행) 수
+
+        Returns:
+            dict: {temperatures, humidities, avg_temperature, avg_humidity}
+                  (데이터가 2개 미만이면 None)
+        """
+        rollups = self.get_sensor_rollups(serial, resolution="1m", limit=limit)
+        if len(rollups) > 1:
+            return self._trend_from_rollups(rollups)
+        return self._trend_from_rows(self.get_latest_sensor_data(serial, limit=limit))
+
     def get_recent_logs(self, user_id, limit=5):
         """
         최근 사용 로그 조회
@@ -265,27 +741,44 @@ class DatabaseManager:
             list: 로그 리스트
         """
         try:
-            cur = self.conn.cursor(cursor_factory=RealDictCursor)
-
-            cur.execute(
-                """
-                SELECT * FROM logs
-                WHERE user_id = %s
+            return self._query(
+                f"""
+                SELECT {self._log_type_select()} AS type, created_at FROM logs
+                WHERE user_id = $1
                 ORDER BY created_at DESC
-                LIMIT %s
+                LIMIT $2
                 """,
                 (user_id, limit),
+                row=LogRow,
+                name="recent_logs",
             )
-            logs = cur.fetchall()
-            cur.close()
-
-            return [dict(row) for row in logs] if logs else []
 
         except Exception as e:
             print(f"❌ 로그 조회 오류: {e}")
-            self.conn.rollback()  # 트랜잭션 초기화
             return []
 
+    def _log_type_select(self):
+        """
+        logs 테이블에서 활동 종류로 쓸 컬럼 ("type" 우선, 없으면 "action")
+        (information_schema를 한 번만 조회해서 기억)
+        """
+        if self._log_type_column is None:
+            columns = self._query(
+                """
+                SELECT column_name FROM information_schema.columns
+                WHERE table_name = 'logs' AND column_name IN ('type', 'action')
+                """,
+                row=ColumnRow,
+            )
+            names = {c.column_name for c in columns}
+            if "type" in names:
+                self._log_type_column = "type"
+            elif "action" in names:
+                self._log_type_column = "action"
+            else:
+                self._log_type_column = ""
+        return self._log_type_column or "NULL::text"
+
     def get_user_kits(self, user_id):
         """
         사용자가 소유한 키트 정보 조회
@@ -303,17 +796,10 @@ class DatabaseManager:
         return []
 
         # try:
-        #     cur = self.conn.cursor(cursor_factory=RealDictCursor)
-        #
-        #     cur.execute("SELECT * FROM kits WHERE user_id = %s", (user_id,))
-        #     kits = cur.fetchall()
-        #     cur.close()
-        #
-        #     return [dict(kit) for kit in kits] if kits else []
+        #     return self._query("SELECT * FROM kits WHERE user_id = $1", (user_id,), row=...)
         #
         # except Exception as e:
         #     print(f"❌ 키트 조회 오류: {e}")
-        #     self.conn.rollback()  # 트랜잭션 초기화
         #     return []
 
     def get_plant_status(self, temperature, humidity):
@@ -369,6 +855,272 @@ class DatabaseManager:
                 "issues": [],
             }
 
+    # build_context를 한 번의 왕복으로 처리하는 쿼리 ($1: serial, $2: email)
+    CONTEXT_QUERY = """
+        WITH device AS (
+            SELECT id, serial, name, status, user_id FROM devices
+            WHERE serial = $1
+            LIMIT 1
+        ),
+        email_user AS (
+            SELECT id, name FROM users
+            WHERE $2::text IS NOT NULL AND email = $2::text
+            LIMIT 1
+        ),
+        serial_user AS (
+            SELECT u.id, u.name FROM users u JOIN device d ON u.id = d.user_id
+            LIMIT 1
+        ),
+        app_user AS (
+            -- 이메일로 찾은 사용자에게 이름이 있으면 그 사용자, 없으면 시리얼로 찾은 사용자
+            SELECT * FROM email_user WHERE COALESCE(name, '') <> ''
+            UNION ALL
+            SELECT * FROM serial_user
+            WHERE NOT EXISTS (SELECT 1 FROM email_user WHERE COALESCE(name, '') <> '')
+        )
+        SELECT
+            (SELECT jsonb_build_object('id', id, 'name', name) FROM app_user LIMIT 1)
+                AS app_user,
+            (SELECT to_jsonb(d) FROM device d) AS device,
+            {sensor_columns},
+            {logs_select} AS logs
+    """
+
+    # 사용자/디바이스 정보가 캐시에 있을 때 사용하는 쿼리 (센서 데이터와 로그만 조회)
+    # ($1: serial, $2: user_id)
+    CONTEXT_SENSOR_QUERY = """
+        SELECT
+            {sensor_columns},
+            {logs_select} AS logs
+    """
+
+    CONTEXT_SENSOR_COLUMNS = """(
+                SELECT jsonb_build_object(
+                    'temperature', s.temperature,
+                    'humidity', s.humidity,
+                    'created_at', to_char(s.created_at, 'YYYY-MM-DD HH24:MI:SS')
+                )
+                FROM sensor_data s
+                WHERE s.serial = $1
+                ORDER BY s.updated_at DESC
+                LIMIT 1
+            ) AS sensor,
+            {rollups_select} AS rollups,
+            (
+                SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                    'temperature', t.temperature,
+                    'humidity', t.humidity
+                ) ORDER BY t.created_at DESC), '[]'::jsonb)
+                FROM (
+                    SELECT temperature, humidity, created_at FROM sensor_data
+                    WHERE serial = $1
+                    ORDER BY created_at DESC
+                    LIMIT 3
+                ) t
+            ) AS recent"""
+
+    CONTEXT_LOGS_SELECT = """(
+                SELECT COALESCE(jsonb_agg(
+                    to_jsonb(l) || jsonb_build_object(
+                        'created_at', to_char(l.created_at, 'YYYY-MM-DD HH24:MI:SS')
+                    ) ORDER BY l.created_at DESC
+                ), '[]'::jsonb)
+                FROM (
+                    SELECT {log_type} AS type, created_at FROM logs
+                    WHERE user_id = {user_id}
+                    ORDER BY created_at DESC
+                    LIMIT 3
+                ) l
+            )"""
+
+    CONTEXT_ROLLUPS_SELECT = """(
+                SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                    'count', r.count,
+                    'temperature_sum', r.temperature_sum,
+                    'humidity_sum', r.humidity_sum,
+                    'temperature_avg', r.temperature_sum / NULLIF(r.count, 0),
+                    'humidity_avg', r.humidity_sum / NULLIF(r.count, 0)
+                ) ORDER BY r.bucket_start DESC), '[]'::jsonb)
+                FROM (
+                    SELECT bucket_start, count, temperature_sum, humidity_sum
+                    FROM sensor_data_rollups
+                    WHERE serial = $1 AND resolution = '1m'
+                    ORDER BY bucket_start DESC
+                    LIMIT 3
+                ) r
+            )"""
+
+    def _context_sql(self, with_metadata):
+        """
+        컨텍스트 쿼리 조립
+
+        Args:
+            with_metadata: True면 사용자/디바이스까지 조회, False면 센서 데이터와 로그만 조회
+
+        Returns:
+            tuple: (prepared statement 이름, 쿼리)
+        """
+        # 집계 테이블이 없는 DB에서는 원본 행으로만 추세 계산
+        rollups_select = (
+            self.CONTEXT_ROLLUPS_SELECT
+            if self._rollups_available
+            else "'[]'::jsonb"
+        )
+        sensor_columns = self.CONTEXT_SENSOR_COLUMNS.format(
+            rollups_select=rollups_select
+        )
+        log_type = self._log_type_select()
+        # 쿼리 모양마다 다른 prepared statement 이름 사용
+        suffix = "" if self._rollups_available else "_raw"
+        if with_metadata:
+            return "context_full" + suffix, self.CONTEXT_QUERY.format(
+                sensor_columns=sensor_columns,
+                logs_select=self.CONTEXT_LOGS_SELECT.format(
+                    log_type=log_type, user_id="(SELECT id FROM app_user LIMIT 1)"
+                ),
+            )
+        return "context_sensor" + suffix, self.CONTEXT_SENSOR_QUERY.format(
+            sensor_columns=sensor_columns,
+            logs_select=self.CONTEXT_LOGS_SELECT.format(
+                log_type=log_type, user_id="$2"
+            ),
+        )
+
+    def fetch_context_data(self, device_serial, user_email=None):
+        """
+        build_context에 필요한 데이터를 한 번의 쿼리로 조회
+        (사용자/디바이스 정보가 캐시에 있으면 센서 데이터와 로그만 조회)
+
+        Args:
+            device_serial: 디바이스 시리얼 번호
+            user_email: 사용자 이메일 (없으면 시리얼로만 사용자 조회)
+
+        Returns:
+            dict: {user, device_info, sensor_data, trend_data, recent_logs}
+        """
+        cache_key = ("context", device_serial, user_email)
+        metadata = self.metadata_cache.get(cache_key)
+        if metadata is not None:
+            user, device_info = metadata
+            name, sql = self._context_sql(with_metadata=False)
+            params = (device_serial, user.get("id") if user else None)
+        else:
+            name, sql = self._context_sql(with_metadata=True)
+            params = (device_serial, user_email)
+        try:
+            row = self._query(sql, params, fetch="one", row=ContextRow, name=name)
+        except psycopg2.Error as e:
+            # 42P01: undefined_table (sensor_data_rollups 없음)
+            if not self._rollups_available or e.pgcode != "42P01":
+                raise
+            self._rollups_available = False
+            return self.fetch_context_data(device_serial, user_email)
+
+        if metadata is None:
+            user, device_info = row["app_user"], row["device"]
+            self.metadata_cache.set(cache_key, (user, device_info))
+
+        sensor_data = row["sensor"]
+        if sensor_data:
+            # JSON 숫자(60)를 순차 조회(double precision → float)와 같은 값(60.0)으로 맞춤
+            for key in ("temperature", "humidity"):
+                if sensor_data.get(key) is not None:
+                    sensor_data[key] = float(sensor_data[key])
+
+        trend_data = self._trend_from_rollups(row["rollups"] or [])
+        if trend_data is None:
+            trend_data = self._trend_from_rows(row["recent"] or [])
+        return {
+            "user": user,
+            "device_info": device_info,
+            "sensor_data": sensor_data,
+            "trend_data": trend_data,
+            "recent_logs": row["logs"] or [],
+        }
+
+    def _fetch_context_data_sequential(self, device_serial, user_email=None):
+        """
+        build_context에 필요한 데이터를 조회 메서드별로 순차 조회
+        (fetch_context_data를 사용할 수 없을 때의 대체 경로)
+        """
+        user_name = None
+        user = None
+
+        # 1. 이메일로 먼저 조회 시도
+        if user_email:
+            user = self.get_user_by_email(user_email)
+            user_name = user.get("name") if user else None
+
+        # 2. 이메일로 못 찾으면 시리얼로 조회
+        if not user_name:
+            user = self.get_user_by_device_serial(device_serial)
+
+        # 사용자 정보가 있으면 user_id 가져오기 (추가 컨텍스트용)
+        user_id = user.get("id") if user else None
+
+        return {
+            "user": user,
+            # 디바이스 정보 조회 (추가 컨텍스트)
+            "device_info": self.get_device_info(device_serial),
+            # 최신 센서 데이터 직접 조회 (시리얼 기반)
+            "sensor_data": self.get_sensor_data_by_serial(device_serial),
+            # 최근 센서 데이터 추세 (1분 집계 3구간, 없으면 원본 최근 3개)
+            "trend_data": self.get_sensor_trend(device_serial, limit=3),
+            # 최근 사용 로그 (최근 3개만)
+            "recent_logs": self.get_recent_logs(user_id, limit=3) if user_id else [],
+        }
+
+    def get_context_data(self, device_serial, user_email=None):
+        """
+        build_context에 필요한 데이터 조회
+
+        DB_SINGLE_QUERY_CONTEXT가 켜져 있으면(기본값) 한 번의 쿼리로 조회하고,
+        실패하면 기존 순차 조회로 대체합니다.
+
+        Args:
+            device_serial: 디바이스 시리얼 번호
+            user_email: 사용자 이메일 (없으면 시리얼로만 사용자 조회)
+
+        Returns:
+            dict: {user, device_info, sensor_data, trend_data, recent_logs}
+        """
+        if self.single_query_context:
+            try:
+                return self.fetch_context_data(device_serial, user_email)
+            except Exception as e:
+                print(f"⚠️  단일 쿼리 컨텍스트 조회 실패 (순차 조회로 대체): {e}")
+        return self._fetch_context_data_sequential(device_serial, user_email)
+
+    def render_context(self, data, only_temperature=False, only_humidity=False):
+        """
+        조회한 컨텍스트 데이터(get_context_data 결과)로 컨텍스트 문자열 생성
+
+        Args:
+            data: get_context_data 결과
+            only_temperature: True면 온도만 포함
+            only_humidity: True면 습도만 포함
+
+        Returns:
+            tuple: (context: str, user_name: str or None) - 컨텍스트 문자열과 사용자 이름
+        """
+        user = data["user"]
+        user_name = user.get("name") if user else None
+        if user_name:
+            print(f"✓ 사용자 조회 성공: {user_name}")
+        else:
+            # 못 찾으면 None 설정 (시스템 프롬프트에서 기본값 '주인님' 사용)
+            print("⚠️  사용자 정보를 찾을 수 없습니다. 기본값 'user' 사용")
+
+        context = self._format_context(
+            data["sensor_data"],
+            data["device_info"],
+            data["trend_data"],
+            data["recent_logs"],
+            only_temperature=only_temperature,
+            only_humidity=only_humidity,
+        )
+        return context, user_name
+
     def build_context(self, device_serial, only_temperature=False, only_humidity=False):
         """
         디바이스 시리얼을 기반으로 AI에 전달할 컨텍스트 생성
@@ -383,167 +1135,141 @@ class DatabaseManager:
             tuple: (context: str, user_name: str or None) - 컨텍스트 문자열과 사용자 이름
         """
         try:
-            user_name = None
-            user = None
-            user_id = None
-
-            # 1. 환경 변수에서 USER_EMAIL 가져오기
+            # 환경 변수에서 USER_EMAIL 가져오기
             user_email = os.environ.get("USER_EMAIL")
 
-            # 2. 이메일로 먼저 조회 시도
-            if user_email:
-                user = self.get_user_by_email(user_email)
-                user_name = user.get("name") if user else None
-                if user_name:
-                    print(f"✓ 사용자 조회 성공 (이메일): {user_name}")
-
-            # 3. 이메일로 못 찾으면 시리얼로 조회
-            if not user_name:
-                user = self.get_user_by_device_serial(device_serial)
-                user_name = user.get("name") if user else None
-                if user_name:
-                    print(f"✓ 사용자 조회 성공 (시리얼): {user_name}")
-
-            # 4. 못 찾으면 None 설정 (시스템 프롬프트에서 기본값 '주인님' 사용)
-            if not user_name:
-                print("⚠️  사용자 정보를 찾을 수 없습니다. 기본값 'user' 사용")
-
-            # 사용자 정보가 있으면 user_id 가져오기 (추가 컨텍스트용)
-            if user:
-                user_id = user.get("id")
+            data = self.get_context_data(device_serial, user_email)
+            return self.render_context(
+                data, only_temperature=only_temperature, only_humidity=only_humidity
+            )
 
-            # 디바이스 정보 조회 (추가 컨텍스트)
-            device_info = self.get_device_info(device_serial)
+        except Exception as e:
+            print(f"❌ 컨텍스트 생성 오류: {e}")
+            return "", None
 
-            # 최신 센서 데이터 직접 조회 (시리얼 기반)
-            sensor_data = self.get_sensor_data_by_serial(device_serial)
-
-            # 컨텍스트 생성
-            context = "## 현재 센서 데이터\n"
-
-            if sensor_data:
-                temperature = sensor_data.get("temperature", "N/A")
-                humidity = sensor_data.get("humidity", "N/A")
-                measured_time = sensor_data.get("created_at", "N/A")
-
-                # datetime 객체를 문자열로 변환
-                if hasattr(measured_time, "strftime"):
-                    measured_time = measured_time.strftime("%Y-%m-%d %H:%M:%S")
-
-                # 온도만 표시
-                if only_temperature:
-                    context += f"- 온도: {temperature}도\n"
-                # 습도만 표시
-                elif only_humidity:
-                    context += f"- 습도: {humidity}%\n"
-                # 둘 다 표시 (기본)
-                else:
-                    context += f"- 온도: {temperature}도\n"
-                    context += f"- 습도: {humidity}%\n"
-
-                context += f"- 측정시간: {measured_time}\n"
-
-                # 식물 상태 판단 (온도와 습도 둘 다 필요할 때만)
-                if (
-                    not only_temperature
-                    and not only_humidity
-                    and temperature != "N/A"
-                    and humidity != "N/A"
-                ):
-                    plant_status = self.get_plant_status(
-                        float(temperature), float(humidity)
-                    )
-                    context += "\n## 현재 치피 상태\n"
-                    context += f"- 조건: {plant_status['condition_status']}\n"
-                    if plant_status["issues"]:
-                        context += f"- 문제: {', '.join(plant_status['issues'])}\n"
-                    context += f"- 상태 메시지: {plant_status['message']}\n"
+    def _format_context(
+        self,
+        sensor_data,
+        device_info,
+        trend_data,
+        recent_logs,
+        only_temperature=False,
+        only_humidity=False,
+    ):
+        """
+        조회한 데이터로 컨텍스트 문자열 생성
 
+        Returns:
+            str: 컨텍스트 문자열
+        """
+        context = "## 현재 센서 데이터\n"
+        if sensor_data:
+            temperature = sensor_data.get("temperature", "N/A")
+            humidity = sensor_data.get("humidity", "N/A")
+            measured_time = sensor_data.get("created_at", "N/A")
+
+            # datetime 객체를 문자열로 변환
+            if hasattr(measured_time, "strftime"):
+                measured_time = measured_time.strftime("%Y-%m-%d %H:%M:%S")
+
+            # 온도만 표시
+            if only_temperature:
+                context += f"- 온도: {temperature}도\n"
+            # 습도만 표시
+            elif only_humidity:
+                context += f"- 습도: {humidity}%\n"
+            # 둘 다 표시 (기본)
             else:
-                context += "- 현재 센서 데이터를 불러올 수 없습니다.\n"
-
-            # 디바이스 정보 추가 (있는 경우)
-            if device_info:
-                context += "\n## 디바이스 정보\n"
-                device_name = device_info.get("name")
-                device_status = device_info.get("status")
-                if device_name:
-                    context += f"- 디바이스명: {device_name}\n"
-                if device_status:
-                    context += f"- 상태: {device_status}\n"
-
-            # 최근 센서 데이터 추세 분석 (있는 경우, 최근 3개)
-            # serial 기반으로 조회
-            recent_sensor_data = self.get_latest_sensor_data(device_serial, limit=3)
-            if recent_sensor_data and len(recent_sensor_data) > 1:
-                context += "\n## 최근 센서 데이터 추세 (참고용)\n"
-                temps = [
-                    float(d.get("temperature", 0))
-                    for d in recent_sensor_data
-                    if d.get("temperature") is not None
-                ]
-                humids = [
-                    float(d.get("humidity", 0))
-                    for d in recent_sensor_data
-                    if d.get("humidity") is not None
-                ]
-                if temps:
-                    avg_temp = sum(temps) / len(temps)
-                    context += f"- 최근 평균 온도: {avg_temp:.1f}도\n"
-                    if len(temps) > 1:
-                        temp_change = temps[0] - temps[-1]
-                        trend = (
-                            "상승"
-                            if temp_change > 0
-                            else "하락" if temp_change < 0 else "유지"
-                        )
-                        context += f"- 온도 추세: {trend}\n"
-                if humids:
-                    avg_humid = sum(humids) / len(humids)
-                    context += f"- 최근 평균 습도: {avg_humid:.1f}%\n"
-                    if len(humids) > 1:
-                        humid_change = humids[0] - humids[-1]
-                        trend = (
-                            "상승"
-                            if humid_change > 0
-                            else "하락" if humid_change < 0 else "유지"
-                        )
-                        context += f"- 습도 추세: {trend}\n"
-
-            # 사용자 키트 정보 추가 (있는 경우)
-            # 주의: kits 테이블 구조에 따라 get_user_kits 메서드가 작동하지 않을 수 있음
-            # if user_id:
-            #     try:
-            #         kits = self.get_user_kits(user_id)
-            #         if kits:
-            #             context += "\n## 사용자 키트 정보\n"
-            #             context += f"- 보유 키트 수: {len(kits)}개\n"
-            #             # 첫 번째 키트 정보만 간단히 추가
-            #             first_kit = kits[0]
-            #             kit_name = first_kit.get("name") or first_kit.get("plant_name")
-            #             if kit_name:
-            #                 context += f"- 키트명: {kit_name}\n"
-            #     except Exception as e:
-            #         # 키트 조회 실패 시 무시하고 계속 진행
-            #         pass
-
-            # 최근 사용 로그 추가 (있는 경우, 최근 3개만)
-            if user_id:
-                recent_logs = self.get_recent_logs(user_id, limit=3)
-                if recent_logs:
-                    context += "\n## 최근 활동 (참고용)\n"
-                    for log in recent_logs[:3]:  # 최근 3개만
-                        log_type = log.get("type") or log.get("action")
-                        log_time = log.get("created_at")
-                        if log_time and hasattr(log_time, "strftime"):
-                            log_time = log_time.strftime("%Y-%m-%d %H:%M:%S")
-                        if log_type:
-                            context += (
-                                f"- {log_type} ({log_time if log_time else '최근'})\n"
-                            )
-
-            return context, user_name
+                context += f"- 온도: {temperature}도\n"
+                context += f"- 습도: {humidity}%\n"
+
+            context += f"- 측정시간: {measured_time}\n"
+
+            # 식물 상태 판단 (온도와 습도 둘 다 필요할 때만)
+            if (
+                not only_temperature
+                and not only_humidity
+                and temperature != "N/A"
+                and humidity != "N/A"
+            ):
+                plant_status = self.get_plant_status(
+                    float(temperature), float(humidity)
+                )
+                context += "\n## 현재 치피 상태\n"
+                context += f"- 조건: {plant_status['condition_status']}\n"
+                if plant_status["issues"]:
+                    context += f"- 문제: {', '.join(plant_status['issues'])}\n"
+                context += f"- 상태 메시지: {plant_status['message']}\n"
+
+        else:
+            context += "- 현재 센서 데이터를 불러올 수 없습니다.\n"
+
+        # 디바이스 정보 추가 (있는 경우)
+        if device_info:
+            context += "\n## 디바이스 정보\n"
+            device_name = device_info.get("name")
+            device_status = device_info.get("status")
+            if device_name:
+                context += f"- 디바이스명: {device_name}\n"
+            if device_status:
+                context += f"- 상태: {device_status}\n"
+
+        # 최근 센서 데이터 추세 (있는 경우, 최근 3구간)
+        if trend_data:
+            context += "\n## 최근 센서 데이터 추세 (참고용)\n"
+            temps = trend_data["temperatures"]
+            humids = trend_data["humidities"]
+            if temps:
+                avg_temp = trend_data["avg_temperature"]
+                context += f"- 최근 평균 온도: {avg_temp:.1f}도\n"
+                if len(temps) > 1:
+                    temp_change = temps[0] - temps[-1]
+                    trend = (
+                        "상승"
+                        if temp_change > 0
+                        else "하락" if temp_change < 0 else "유지"
+                    )
+                    context += f"- 온도 추세: {trend}\n"
+            if humids:
+                avg_humid = trend_data["avg_humidity"]
+                context += f"- 최근 평균 습도: {avg_humid:.1f}%\n"
+                if len(humids) > 1:
+                    humid_change = humids[0] - humids[-1]
+                    trend = (
+                        "상승"
+                        if humid_change > 0
+                        else "하락" if humid_change < 0 else "유지"
+                    )
+                    context += f"- 습도 추세: {trend}\n"
+
+        # 사용자 키트 정보 추가 (있는 경우)
+        # 주의: kits 테이블 구조에 따라 get_user_kits 메서드가 작동하지 않을 수 있음
+        # if user_id:
+        #     try:
+        #         kits = self.get_user_kits(user_id)
+        #         if kits:
+        #             context += "\n## 사용자 키트 정보\n"
+        #             context += f"- 보유 키트 수: {len(kits)}개\n"
+        #             # 첫 번째 키트 정보만 간단히 추가
+        #             first_kit = kits[0]
+        #             kit_name = first_kit.get("name") or first_kit.get("plant_name")
+        #             if kit_name:
+        #                 context += f"- 키트명: {kit_name}\n"
+        #     except Exception as e:
+        #         # 키트 조회 실패 시 무시하고 계속 진행
+        #         pass
+
+        # 최근 사용 로그 추가 (있는 경우, 최근 3개만)
+        if recent_logs:
+            context += "\n## 최근 활동 (참고용)\n"
+            for log in recent_logs[:3]:  # 최근 3개만
+                log_type = log.get("type") or log.get("action")
+                log_time = log.get("created_at")
+                if log_time and hasattr(log_time, "strftime"):
+                    log_time = log_time.strftime("%Y-%m-%d %H:%M:%S")
+                if log_type:
+                    context += (
+                        f"- {log_type} ({log_time if log_time else '최근'})\n"
+                    )
 
-        except Exception as e:
-            print(f"❌ 컨텍스트 생성 오류: {e}")
-            return "", None
+        return context
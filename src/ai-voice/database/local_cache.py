@@ -0,0 +1,202 @@
+"""
+음성 디바이스(라즈베리 파이)의 로컬 컨텍스트 캐시 (SQLite)
+
+원격 PostgreSQL에서 조회한 build_context 데이터(사용자, 디바이스, 최신 센서, 추세, 로그)를
+디바이스 시리얼별로 로컬 SQLite 파일에 저장해 두고,
+원격 DB가 느리거나 끊겼을 때 대신 사용합니다.
+
+ContextSyncer는 백그라운드 스레드에서 주기적으로 원격 데이터를 가져와 로컬 캐시를 갱신합니다.
+
+사용 예:
+    cache = LocalContextCache()
+    cache.open()
+    cache.save(serial, data)
+    data, age = cache.load(serial)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+LOCAL_CACHE_PATH = os.environ.get(
+    "LOCAL_CACHE_PATH",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "local_context.db",
+    ),
+)
+# 백그라운드 동기화 주기 (초)
+LOCAL_SYNC_INTERVAL = float(os.environ.get("LOCAL_SYNC_INTERVAL", "60"))
+# 이보다 오래된 로컬 데이터는 사용하지 않음 (초, 0이면 제한 없음)
+LOCAL_CACHE_MAX_AGE = float(os.environ.get("LOCAL_CACHE_MAX_AGE", "86400"))
+
+
+def _plain(value):
+    """조회 결과(namedtuple 행, datetime, Decimal 등)를 JSON으로 저장할 수 있는 값으로 변환"""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if hasattr(value, "_fields"):
+        # row_type 행 (namedtuple) → dict
+        return {key: _plain(getattr(value, key)) for key in value._fields}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def has_context(data):
+    """
+    저장/사용할 가치가 있는 컨텍스트인지 확인
+    (원격 조회 메서드는 오류 시 None을 반환하므로, 모두 비어 있으면 실패로 간주)
+    """
+    return bool(data) and (
+        data.get("sensor_data") is not None or data.get("device_info") is not None
+    )
+
+
+class LocalContextCache:
+    """디바이스 시리얼별 컨텍스트 스냅샷을 저장하는 SQLite 캐시"""
+
+    def __init__(self, path=None):
+        self.path = path or LOCAL_CACHE_PATH
+        self.conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        # 음성 루프와 동기화 스레드가 함께 사용 (쓰기는 _lock으로 직렬화)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS context_snapshot (
+                serial TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+
+    def save(self, serial, data):
+        """
+        컨텍스트 스냅샷 저장 (비어 있는 데이터는 기존 스냅샷을 덮어쓰지 않음)
+
+        Returns:
+            bool: 저장했으면 True
+        """
+        if not has_context(data):
+            return False
+        payload = json.dumps(_plain(data), ensure_ascii=False, default=str)
+        with self._lock:
+            if self.conn is None:
+                return False
+            with self.conn:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO context_snapshot (serial, data, synced_at)
+                    VALUES (?, ?, ?)
+                    """,
+                    (serial, payload, time.time()),
+                )
+        return True
+
+    def load(self, serial, max_age=None):
+        """
+        컨텍스트 스냅샷 조회
+
+        Args:
+            serial: 디바이스 시리얼
+            max_age: 허용할 최대 경과 시간 (초, 기본값: env의 LOCAL_CACHE_MAX_AGE)
+
+        Returns:
+            tuple: (data: dict, age: 초) 또는 None (없거나 너무 오래된 경우)
+        """
+        max_age = LOCAL_CACHE_MAX_AGE if max_age is None else max_age
+        with self._lock:
+            if self.conn is None:
+                return None
+            row = self.conn.execute(
+                "SELECT data, synced_at FROM context_snapshot WHERE serial = ?",
+                (serial,),
+            ).fetchone()
+        if row is None:
+            return None
+        age = max(0.0, time.time() - row[1])
+        if max_age and age > max_age:
+            return None
+        return json.loads(row[0]), age
+
+
+class ContextSyncer:
+    """
+    백그라운드 스레드에서 주기적으로 원격 컨텍스트를 가져와 로컬 캐시에 저장
+
+    fetch(serial)는 원격 DB에서 컨텍스트 데이터를 조회해 반환하고, 실패하면 예외를 냅니다.
+    (원격 DB 재연결도 fetch 안에서 처리)
+    """
+
+    def __init__(self, fetch, cache, serials=(), interval=None):
+        self.fetch = fetch
+        self.cache = cache
+        self.interval = LOCAL_SYNC_INTERVAL if interval is None else interval
+        self._serials = set(s for s in serials if s)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._online = None  # 마지막 동기화 성공 여부 (상태가 바뀔 때만 출력)
+
+    def track(self, serial):
+        """동기화할 디바이스 시리얼 추가 (처음 보는 시리얼이면 바로 동기화)"""
+        if serial and serial not in self._serials:
+            self._serials.add(serial)
+            self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="context-sync", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def sync_once(self):
+        """추적 중인 모든 시리얼을 한 번 동기화"""
+        for serial in list(self._serials):
+            try:
+                saved = self.cache.save(serial, self.fetch(serial))
+            except Exception as e:
+                if self._online is not False:
+                    print(f"⚠️  로컬 캐시 동기화 실패 (원격 DB 연결 안 됨): {e}")
+                self._online = False
+                return
+            if saved and self._online is not True:
+                print(f"✓ 로컬 캐시 동기화 완료 (시리얼: {serial})")
+                self._online = True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+DatabaseManager 연결 풀 체크아웃 테스트 (실제 DB 없이 가짜 풀 사용)
+
+네트워크 장애 뒤 풀에 끊긴 유휴 연결이 여러 개 남아 있어도
+_checkout()이 살아 있는 연결 또는 새 연결을 돌려주는지 확인합니다.
+
+사용법: python3 database/test_db_pool.py
+"""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# 상위 디렉토리를 sys.path에 추가
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from database import db_manager
+from database.db_manager import DatabaseManager
+
+
+class FakeConnection:
+    """psycopg2 connection 대용 (dead면 SELECT 1 실패)"""
+
+    def __init__(self, name, dead=False):
+        self.name = name
+        self.dead = dead
+        self.closed = 0
+        self.autocommit = False
+
+
+class FakePool:
+    """ThreadedConnectionPool 대용 (유휴 연결을 먼저 주고, 없으면 새로 연결)"""
+
+    def __init__(self, idle):
+        self.idle = list(idle)
+        self.created = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop(0)
+        conn = FakeConnection(f"new-{len(self.created)}")
+        self.created.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.closed = 1
+        else:
+            self.idle.append(conn)
+
+
+def _is_alive(conn):
+    return not conn.dead
+
+
+class CheckoutTest(unittest.TestCase):
+    def setUp(self):
+        env = {"DB_HOST": "localhost", "DB_POOL_MAX": "4", "DB_POOL_MIN": "4"}
+        with mock.patch.dict(os.environ, env), mock.patch.object(
+            db_manager, "HAS_PSYCOPG2", True
+        ):
+            self.db = DatabaseManager()
+        # 풀을 만든 지 오래되어 모든 유휴 연결이 상태 확인 대상
+        self.db._opened_at = time.monotonic() - self.db.health_check_interval - 1
+        patcher = mock.patch.object(
+            DatabaseManager, "_is_alive", staticmethod(_is_alive)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_all_idle_connections_stale(self):
+        stale = [FakeConnection(f"stale-{i}", dead=True) for i in range(4)]
+        self.db._pool = FakePool(stale)
+
+        conn = self.db._checkout()
+
+        self.assertEqual(conn.name, "new-0")
+        self.assertTrue(all(c.closed for c in stale))
+        self.assertTrue(conn.autocommit)
+        self.db._checkin(conn)
+        # 반납된 새 연결은 다음 체크아웃에서 그대로 사용
+        self.assertIs(self.db._checkout(), conn)
+
+    def test_stops_at_first_live_connection(self):
+        stale = [FakeConnection(f"stale-{i}", dead=True) for i in range(2)]
+        live = FakeConnection("live")
+        self.db._pool = FakePool(stale + [live, FakeConnection("idle")])
+
+        self.assertIs(self.db._checkout(), live)
+        self.assertTrue(all(c.closed for c in stale))
+        self.assertEqual(self.db._pool.created, [])
+
+    def test_closed_connection_discarded_without_health_check(self):
+        closed = FakeConnection("closed")
+        closed.closed = 1
+        recent = FakeConnection("recent", dead=True)
+        self.db._pool = FakePool([closed, recent])
+        # 최근에 반납된 연결은 SELECT 1 없이 사용
+        self.db._last_used[recent] = time.monotonic()
+
+        self.assertIs(self.db._checkout(), recent)
+
+    def test_slot_released_when_reconnect_fails(self):
+        self.db._pool = FakePool([FakeConnection("stale", dead=True)])
+        self.db._pool.getconn = mock.Mock(
+            side_effect=[self.db._pool.idle.pop(0), ConnectionError("down")]
+        )
+
+        with self.assertRaises(ConnectionError):
+            self.db._checkout()
+        # 실패해도 세마포어 슬롯은 반환됨
+        for _ in range(self.db.pool_max):
+            self.assertTrue(self.db._slots.acquire(timeout=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
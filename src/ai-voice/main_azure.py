@@ -19,7 +19,6 @@ import argparse
 import logging
 import os
 import signal
-import subprocess
 import sys
 import tempfile
 import time
@@ -77,7 +76,7 @@ except ImportError:
     HAS_BOARD = False
 
 try:
-    from aiy.voice.audio import AudioFormat, Recorder, play_wav
+    from aiy.voice.audio import AudioFormat, Recorder
 
     HAS_AIY_AUDIO = True
 except ImportError:
@@ -98,6 +97,9 @@ except ImportError:
         logger.error("play_intro_audio 함수를 사용할 수 없습니다.")
         return False
 
+# 발화 분류기 (트리거/종료/Sleep 키워드를 한 번에 확인)
+from core.intent_router import IntentRouter
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
@@ -379,6 +381,13 @@ class AzureSpeechRESTTTS:
         self.api_key = AZURE_SPEECH_API_KEY
         self.endpoint = AZURE_SPEECH_TTS_ENDPOINT
         self.tts_url = f"{self.endpoint}/cognitiveservices/v1"
+        # 같은 문장/음성은 다시 합성하지 않음 (TTS_CACHE=false면 None)
+        try:
+            from tts.tts_cache import get_tts_cache
+
+            self.cache = get_tts_cache()
+        except ImportError:
+            self.cache = None
         logger.info(f"Azure Speech REST API TTS 초기화 완료 (음성: {voice_name})")
 
     def synthesize(self, text):
@@ -388,6 +397,19 @@ class AzureSpeechRESTTTS:
                 logger.warning("TTS: 빈 텍스트입니다.")
                 return False
 
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.key(
+                    text,
+                    self.voice_name,
+                    language=self.language,
+                    output_format="riff-24khz-16bit-mono-pcm",
+                )
+                audio_data = self.cache.get(cache_key)
+                if audio_data is not None:
+                    logger.debug(f"TTS 캐시 적중: {text[:50]}")
+                    return self._play(audio_data)
+
             # SSML 생성
             ssml = f"""<speak version='1.0' xml:lang='{self.language}'>
     <voice xml:lang='{self.language}' name='{self.voice_name}'>
@@ -410,28 +432,9 @@ class AzureSpeechRESTTTS:
 
             if response.status_code == 200:
                 audio_data = response.content
-
-                # 임시 파일에 저장
-                with tempfile.NamedTemporaryFile(
-                    suffix=".wav", delete=False
-                ) as tmp_file:
-                    tmp_file.write(audio_data)
-                    tmp_file_path = tmp_file.name
-
-                try:
-                    # 재생
-                    if HAS_AIY_AUDIO:
-                        play_wav(tmp_file_path)
-                    else:
-                        subprocess.run(["aplay", "-q", tmp_file_path], check=True)
-
-                    logger.debug("TTS 음성 출력 완료")
-                    return True
-                finally:
-                    try:
-                        os.unlink(tmp_file_path)
-                    except Exception:
-                        pass
+                if cache_key is not None:
+                    self.cache.put(cache_key, audio_data)
+                return self._play(audio_data)
             else:
                 logger.error(f"TTS API 오류: {response.status_code} - {response.text}")
                 return False
@@ -440,6 +443,14 @@ class AzureSpeechRESTTTS:
             logger.error(f"TTS 오류: {e}", exc_info=True)
             return False
 
+    def _play(self, audio_data):
+        """WAV 바이트 재생 (임시 파일 없이 메모리에서 디코딩해 공유 재생 엔진으로)"""
+        from utils.audio_engine import get_engine
+
+        get_engine().play_wav(audio_data).wait()
+        logger.debug("TTS 음성 출력 완료")
+        return True
+
 
 # ============================================================================
 # VAD (Voice Activity Detection) - 간단한 에너지 기반
@@ -613,6 +624,7 @@ class VoiceAssistant:
             self.trigger_words = ["치피"]
 
         logger.info(f"트리거 단어: {', '.join(self.trigger_words)}")
+        self.router = IntentRouter(trigger_words=self.trigger_words)
 
         # Azure OpenAI 클라이언트
         self.openai_client = AzureOpenAIClient()
@@ -656,30 +668,27 @@ class VoiceAssistant:
                 self.board.led.state = Led.OFF
 
 
-    def _contains_trigger_word(self, text):
-        """텍스트에 트리거 단어가 포함되어 있는지 확인"""
-        if not text:
-            return False
-        text_lower = text.lower()
-        # 여러 트리거 단어 중 하나라도 포함되어 있으면 True
-        return any(trigger in text_lower for trigger in self.trigger_words)
-
-    def _process_user_input(self, user_text, force_wake=False):
+    def _process_user_input(self, user_text, force_wake=False, intent=None):
         """
         사용자 입력 처리
 
         Args:
             user_text: 사용자 입력 텍스트
             force_wake: Sleep mode에서 트리거 단어로 wake한 경우 True
+            intent: 이미 분류한 결과 (없으면 여기서 분류)
         """
         if not user_text:
             return
 
         logger.info(f"사용자: {user_text}")
+        if intent is None:
+            intent = self.router.route(
+                user_text, strip_trigger=self.sleep_mode and not force_wake
+            )
 
         # Sleep mode에서 트리거 단어 확인 (wake하지 않은 경우)
         if self.sleep_mode and not force_wake:
-            if not self._contains_trigger_word(user_text):
+            if not intent.trigger:
                 logger.debug(
                     f"Sleep mode: 트리거 단어({', '.join(self.trigger_words)})가 감지되지 않았습니다."
                 )
@@ -690,11 +699,8 @@ class VoiceAssistant:
             self.sleep_mode = False
             self.last_interaction_time = time.time()
             # 트리거 단어 제거 (예: "치피 안녕하세요" → "안녕하세요")
-            cleaned_text = user_text
-            for trigger in self.trigger_words:
-                cleaned_text = cleaned_text.replace(trigger, "", 1).strip()
-            if cleaned_text:
-                user_text = cleaned_text
+            if intent.text:
+                user_text = intent.text
             else:
                 # 트리거 단어만 있는 경우 기본 응답
                 logger.info("트리거 단어만 감지되었습니다.")
@@ -706,15 +712,13 @@ class VoiceAssistant:
             self.last_interaction_time = time.time()  # 상호작용 시간 업데이트
 
         # 종료 명령 확인
-        if any(
-            cmd in user_text.lower() for cmd in ["종료", "끝내", "그만", "exit", "quit"]
-        ):
+        if intent.exit:
             logger.info("종료 명령을 받았습니다.")
             self.tts.synthesize("안녕히 가세요!")
             return "quit"
 
         # Sleep 명령 확인 (Sleep mode로 전환)
-        if any(cmd in user_text.lower() for cmd in ["잘자", "sleep", "휴식", "쉬어"]):
+        if intent.sleep:
             logger.info("Sleep mode로 전환합니다.")
             self.sleep_mode = True
             self.last_interaction_time = None
@@ -815,22 +819,22 @@ class VoiceAssistant:
                         if not user_text:
                             continue
 
+                        # 발화 분류 (이번 턴의 모든 키워드 검사를 한 번에)
+                        intent = self.router.route(
+                            user_text, strip_trigger=self.sleep_mode
+                        )
+
                         # Sleep mode: 트리거 단어 확인 후 wake
                         force_wake = False
                         if self.sleep_mode:
-                            if self._contains_trigger_word(user_text):
+                            if intent.trigger:
                                 force_wake = True
                                 logger.info("트리거 단어 감지! Wake mode로 전환합니다.")
                                 self.sleep_mode = False
                                 self.last_interaction_time = time.time()
                                 # 트리거 단어 제거
-                                cleaned_text = user_text
-                                for trigger in self.trigger_words:
-                                    cleaned_text = cleaned_text.replace(
-                                        trigger, "", 1
-                                    ).strip()
-                                if cleaned_text:
-                                    user_text = cleaned_text
+                                if intent.text:
+                                    user_text = intent.text
                                 else:
                                     # 트리거 단어만 있는 경우
                                     self.tts.synthesize("네, 말씀해주세요.")
@@ -838,7 +842,7 @@ class VoiceAssistant:
 
                         # 사용자 입력 처리
                         result = self._process_user_input(
-                            user_text, force_wake=force_wake
+                            user_text, force_wake=force_wake, intent=intent
                         )
 
                         if result == "quit":
@@ -100,6 +100,20 @@ USE_TRIGGER_WORD = os.environ.get("USE_TRIGGER_WORD", "true").lower() in (
 # Sleep mode 타임아웃 설정
 SLEEP_TIMEOUT = float(os.environ.get("SLEEP_TIMEOUT", "10.0"))
 
+# LLM 응답 스트리밍 여부 (True면 첫 문장이 완성되는 즉시 TTS 시작)
+LLM_STREAMING = os.environ.get("LLM_STREAMING", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# TTS 음성을 다 받기 전에 재생 시작 (WAV를 조각으로 받으면서 재생)
+TTS_STREAMING = os.environ.get("TTS_STREAMING", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
 # Google Cloud Speech 언어 코드
 GOOGLE_SPEECH_LANGUAGE = os.environ.get("GOOGLE_SPEECH_LANGUAGE", "ko_KR")
 
@@ -129,24 +143,9 @@ except ImportError:
     print("requests가 설치되지 않았습니다: pip3 install requests")
     sys.exit(1)
 
-try:
-    import tempfile
-except ImportError:
-    print("tempfile 모듈을 사용할 수 없습니다.")
-    sys.exit(1)
-
-# AIY Projects audio 모듈 (TTS 재생용)
-try:
-    from aiy.voice.audio import play_wav
-
-    HAS_AIY_AUDIO = True
-except ImportError:
-    HAS_AIY_AUDIO = False
-    print("경고: AIY Projects audio 모듈을 찾을 수 없습니다.")
-
 
 class SupertonTTS:
-    """SuperTone API를 사용한 TTS 클래스 (AIY Projects play_wav 사용)"""
+    """SuperTone API를 사용한 TTS 클래스 (공유 재생 엔진 사용)"""
 
     def __init__(self, voice_id=None, api_key=None):
         """
@@ -162,6 +161,11 @@ class SupertonTTS:
         if not self.api_key:
             raise ValueError("❌ SUPERTON_API_KEY가 설정되지 않았습니다.")
 
+        # API 요청, 스트리밍 응답, TTS 캐시는 tts/superton_client.py에서 공유
+        from tts.superton_client import SupertonClient
+
+        self.client = SupertonClient(self.api_key, self.voice_id)
+
         logger.info("SuperTone TTS 초기화 완료 (음성 ID: %s)", self.voice_id)
 
     def generate(
@@ -189,42 +193,45 @@ class SupertonTTS:
         Returns:
             음성 바이트 데이터 또는 None
         """
-        url = f"https://supertoneapi.com/v1/text-to-speech/{self.voice_id}"
-
-        headers = {"x-sup-api-key": self.api_key, "Content-Type": "application/json"}
-
-        payload = {
-            "text": text,
-            "language": language,
-            "style": style,
-            "model": "sona_speech_1",
-            "output_format": output_format,
-            "voice_settings": {
-                "pitch_shift": pitch_shift,
-                "pitch_variance": pitch_variance,
-                "speed": speed,
-            },
-        }
+        return self.client.synthesize(
+            text,
+            language,
+            style,
+            output_format,
+            pitch_shift=pitch_shift,
+            speed=speed,
+            pitch_variance=pitch_variance,
+        )
 
-        try:
-            logger.debug(f"SuperTone 음성 생성 중: {text[:20]}...")
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+    def generate_stream(
+        self,
+        text,
+        language="ko",
+        style="neutral",
+        pitch_shift=0,
+        speed=1,
+        pitch_variance=1,
+        chunk_size=4096,
+    ):
+        """
+        SuperTone API 응답을 받는 대로 조각으로 반환 (stream=True)
 
-            if response.status_code == 200:
-                logger.debug("SuperTone 음성 생성 완료")
-                return response.content
-            else:
-                logger.error(
-                    f"SuperTone API 오류 (상태: {response.status_code}): {response.text}"
-                )
-                return None
+        Args:
+            chunk_size: 한 번에 읽을 바이트 수
+            나머지 인자는 generate()와 동일 (출력 형식은 wav 고정)
 
-        except requests.exceptions.Timeout:
-            logger.error("SuperTone 요청 시간 초과 (30초)")
-            return None
-        except Exception as e:
-            logger.error(f"SuperTone 오류: {e}", exc_info=True)
-            return None
+        Yields:
+            bytes: WAV 바이트 조각 (캐시에 있으면 전체를 한 번에, 오류가 나면 받은 데까지만)
+        """
+        return self.client.synthesize_stream(
+            text,
+            language,
+            style,
+            pitch_shift=pitch_shift,
+            speed=speed,
+            pitch_variance=pitch_variance,
+            chunk_size=chunk_size,
+        )
 
     def speak(
         self,
@@ -236,7 +243,7 @@ class SupertonTTS:
         pitch_variance=1,
     ):
         """
-        텍스트를 음성으로 변환하고 재생 (AIY Projects play_wav 사용)
+        텍스트를 음성으로 변환하고 재생
 
         Args:
             text: 말할 텍스트
@@ -246,6 +253,20 @@ class SupertonTTS:
             speed: 재생 속도 (0.5 ~ 2, 기본값: 1)
             pitch_variance: 음높이 변동성 (0 ~ 2, 기본값: 1)
         """
+        if TTS_STREAMING:
+            # 음성을 다 받기 전에 재생 시작
+            self.play_stream(
+                self.generate_stream(
+                    text,
+                    language,
+                    style,
+                    pitch_shift=pitch_shift,
+                    speed=speed,
+                    pitch_variance=pitch_variance,
+                )
+            )
+            return
+
         audio_data = self.generate(
             text,
             language,
@@ -257,32 +278,73 @@ class SupertonTTS:
         )
 
         if audio_data:
-            try:
-                # 임시 파일로 저장
-                with tempfile.NamedTemporaryFile(
-                    suffix=".wav", delete=False
-                ) as tmp_file:
-                    tmp_file.write(audio_data)
-                    tmp_file_path = tmp_file.name
+            self.play(audio_data)
 
-                try:
-                    # 재생 (AIY Projects play_wav 사용)
-                    if HAS_AIY_AUDIO:
-                        play_wav(tmp_file_path)
-                    else:
-                        import subprocess
+    def play(self, audio_data):
+        """
+        생성된 wav 데이터 재생 (재생이 끝날 때까지 블록)
 
-                        subprocess.run(["aplay", "-q", tmp_file_path], check=True)
+        임시 파일 없이 메모리에서 디코딩해 공유 재생 엔진으로 재생합니다.
 
-                    logger.debug("SuperTone 음성 출력 완료")
-                finally:
-                    try:
-                        os.unlink(tmp_file_path)
-                    except Exception:
-                        pass
+        Args:
+            audio_data: generate()가 반환한 wav 바이트
+        """
+        try:
+            from utils.audio_engine import get_engine
 
-            except Exception as e:
-                logger.error(f"SuperTone 재생 오류: {e}", exc_info=True)
+            get_engine().play_wav(audio_data).wait()
+            logger.debug("SuperTone 음성 출력 완료")
+        except Exception as e:
+            logger.error(f"SuperTone 재생 오류: {e}", exc_info=True)
+
+    def play_stream(self, chunks):
+        """
+        조각으로 받는 wav 데이터 재생 (지터 버퍼가 차면 바로 시작, 재생이 끝날 때까지 블록)
+
+        Args:
+            chunks: generate_stream()이 반환한 WAV 바이트 조각
+
+        Returns:
+            bool: 재생 성공 여부
+        """
+        from tts.superton_client import play_stream
+
+        return play_stream(chunks)
+
+    def speak_stream(
+        self,
+        sentences,
+        language="ko",
+        style="neutral",
+        pitch_shift=0,
+        speed=1,
+        pitch_variance=1,
+    ):
+        """
+        문장 단위로 들어오는 텍스트를 이어서 말하기
+        (한 문장을 재생하는 동안 다음 문장을 미리 합성)
+
+        Args:
+            sentences: 문장 iterable (ChipiBrain.stream_run 등)
+            나머지 인자는 speak()와 동일
+
+        Returns:
+            list: 실제로 말한 문장 목록
+        """
+        from utils.audio_utils import play_pipelined
+
+        def _synthesize(text):
+            return self.generate(
+                text,
+                language,
+                style,
+                output_format="wav",
+                pitch_shift=pitch_shift,
+                speed=speed,
+                pitch_variance=pitch_variance,
+            )
+
+        return play_pipelined(sentences, _synthesize, self.play)
 
 
 # ============================================================================
@@ -314,33 +376,17 @@ except ImportError:
 
 # 상수 import
 try:
-    from constants import (
-        EMOTION_CHECK_ORDER,
-        EMOTION_DEFAULT,
-        EMOTION_KEYWORDS,
-        EXIT_COMMANDS,
-        LED_OFF_KEYWORDS,
-        LED_ON_KEYWORDS,
-        SAD_TONE_KEYWORDS,
-        SERVO_KEYWORDS,
-        SLEEP_COMMANDS,
-    )
+    from constants import EMOTION_DEFAULT
+    from core.intent_router import IntentRouter
+    from utils.keyword_matcher import detect_emotion
 except ImportError:
     # 현재 디렉토리 기준으로 시도
     current_dir = os.path.dirname(os.path.abspath(__file__))
     if current_dir not in sys.path:
         sys.path.insert(0, current_dir)
-    from constants import (
-        EMOTION_CHECK_ORDER,
-        EMOTION_DEFAULT,
-        EMOTION_KEYWORDS,
-        EXIT_COMMANDS,
-        LED_OFF_KEYWORDS,
-        LED_ON_KEYWORDS,
-        SAD_TONE_KEYWORDS,
-        SERVO_KEYWORDS,
-        SLEEP_COMMANDS,
-    )
+    from constants import EMOTION_DEFAULT
+    from core.intent_router import IntentRouter
+    from utils.keyword_matcher import detect_emotion
 
 
 def load_voice_hints():
@@ -408,35 +454,6 @@ def get_hints(language_code, trigger_words=None):
     return None
 
 
-def _contains_trigger_word(text, trigger_words):
-    """텍스트에 트리거 단어가 포함되어 있는지 확인 (유연한 매칭)
-
-    짧은 음성("치피야" 등)도 잘 인식되도록 부분 매칭 지원
-    """
-    if not text or not trigger_words:
-        return False
-
-    text_lower = text.lower().strip()
-
-    # 완전 일치 또는 포함 확인
-    for trigger in trigger_words:
-        trigger_lower = trigger.lower()
-        if trigger_lower in text_lower:
-            return True
-
-        # 부분 매칭: 트리거 단어가 텍스트의 시작 부분에 있는지 확인
-        # 예: "치피야" -> "치피" 매칭
-        if text_lower.startswith(trigger_lower):
-            return True
-
-        # 호격 조사 포함 확인: "치피야", "치피아", "치피이" 등
-        for suffix in ["야", "아", "이", "여", "이야", "이여"]:
-            if text_lower.startswith(trigger_lower + suffix):
-                return True
-
-    return False
-
-
 def _find_servo_script_path():
     """서보 스크립트 경로 찾기"""
     # 현재 파일의 디렉토리 기준으로 경로 찾기
@@ -578,15 +595,6 @@ except ImportError:
             return False
 
 
-def _contains_servo_keywords(text):
-    """서보 모터 실행 키워드 감지"""
-    if not text:
-        return False
-
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in SERVO_KEYWORDS)
-
-
 def _detect_face_emotion_from_response(text):
     """
     LLM 응답 텍스트를 분석하여 적절한 얼굴 표정 감지 (키워드 기반)
@@ -600,17 +608,11 @@ def _detect_face_emotion_from_response(text):
     if not text:
         return EMOTION_DEFAULT
 
-    text_lower = text.lower()
-
-    # 우선순위대로 감정 체크
-    for emotion in EMOTION_CHECK_ORDER:
-        keywords = EMOTION_KEYWORDS.get(emotion, [])
-        if any(keyword in text_lower for keyword in keywords):
-            logger.debug(f"감정 감지: {emotion} (키워드 매칭)")
-            return emotion
-
-    # 키워드가 없으면 기본값 (NEUTRAL/DEFAULT)
-    return EMOTION_DEFAULT
+    # 한 번 훑어서 매칭된 감정 중 우선순위가 가장 높은 것 (없으면 DEFAULT)
+    emotion = detect_emotion(text)
+    if emotion != EMOTION_DEFAULT:
+        logger.debug(f"감정 감지: {emotion} (키워드 매칭)")
+    return emotion
 
 
 def _set_face_emotion(emotion, serial=None, server_url=None):
@@ -646,28 +648,6 @@ def _set_face_emotion(emotion, serial=None, server_url=None):
         return False
 
 
-def _contains_led_keywords(text):
-    """LED 제어 키워드 감지
-
-    Returns:
-        str or None: "on", "off", 또는 None
-    """
-    if not text:
-        return None
-
-    text_lower = text.lower()
-
-    # LED 켜기 키워드 확인
-    if any(keyword in text_lower for keyword in LED_ON_KEYWORDS):
-        return "on"
-
-    # LED 끄기 키워드 확인
-    if any(keyword in text_lower for keyword in LED_OFF_KEYWORDS):
-        return "off"
-
-    return None
-
-
 def _set_led_state(led_on, serial=None, server_url=None):
     """
     LED 상태 설정
@@ -751,6 +731,7 @@ def main():
             else:
                 board.led.state = Led.OFF
 
+    brain = None
     try:
         # Board context manager 사용 (원본 예제와 동일 - 음성 인식 성능 향상)
         # 원본 예제처럼 with Board() as board: 형태로 사용
@@ -792,6 +773,12 @@ def main():
             else:
                 print("⚠️ 매핑 없음")
 
+            # 발화 분류기 (트리거/명령/상황 키워드 + 오디오 매핑을 한 번에 확인)
+            router = IntentRouter(
+                trigger_words=trigger_words,
+                find_audio=lambda text: find_mapped_audio(text, audio_mapping),
+            )
+
             # Sleep/Wake 모드 관리
             # 트리거 단어를 사용하지 않으면 바로 Wake mode로 시작
             sleep_mode = USE_TRIGGER_WORD  # 트리거 단어 사용 시만 Sleep mode로 시작
@@ -803,9 +790,6 @@ def main():
                 tts=tts, trigger_words=trigger_words, use_trigger_word=USE_TRIGGER_WORD
             )
 
-            # 슬픈 톤을 사용할 키워드 목록 (constants에서 가져옴)
-            sad_keywords = SAD_TONE_KEYWORDS
-
             # Main loop
             while True:
                 try:
@@ -841,20 +825,19 @@ def main():
                     print(f'✅ 인식됨: "{user_text}"', flush=True)
                     logger.info(f"사용자: {user_text}")
 
+                    # 발화 분류 (이번 턴의 모든 키워드 검사를 한 번에)
+                    waking = sleep_mode and USE_TRIGGER_WORD
+                    intent = router.route(user_text, strip_trigger=waking)
+
                     # Sleep mode: 트리거 단어 확인 (트리거 단어가 활성화된 경우만)
-                    if sleep_mode and USE_TRIGGER_WORD:
-                        if _contains_trigger_word(user_text, trigger_words):
+                    if waking:
+                        if intent.trigger:
                             logger.info("트리거 단어 감지! Wake mode로 전환합니다.")
                             sleep_mode = False
                             last_interaction_time = time.time()
                             # 트리거 단어 제거 (예: "치피 안녕하세요" → "안녕하세요")
-                            cleaned_text = user_text
-                            for trigger in trigger_words:
-                                cleaned_text = cleaned_text.replace(
-                                    trigger, "", 1
-                                ).strip()
-                            if cleaned_text:
-                                user_text = cleaned_text
+                            if intent.text:
+                                user_text = intent.text
                             else:
                                 # 트리거 단어만 있는 경우
                                 logger.info("트리거 단어만 감지되었습니다.")
@@ -873,21 +856,24 @@ def main():
                     if not sleep_mode:
                         last_interaction_time = time.time()
 
+                    # DB 컨텍스트 조회를 미리 시작 (명령 확인 등과 겹쳐 실행, wait_run에서 사용)
+                    brain.prefetch_context(device_serial)
+
                     # 종료 명령 확인
-                    if any(cmd in user_text.lower() for cmd in EXIT_COMMANDS):
+                    if intent.exit:
                         logger.info("종료 명령을 받았습니다.")
                         tts.speak("안녕히 가세요!", language="ko", style="neutral")
                         break
 
                     # Sleep 명령 확인 (Sleep mode로 전환)
-                    if any(cmd in user_text.lower() for cmd in SLEEP_COMMANDS):
+                    if intent.sleep:
                         logger.info("Sleep mode로 전환합니다.")
                         sleep_mode = True
                         last_interaction_time = None
                         continue
 
                     # 서보 모터 실행 키워드 감지
-                    if _contains_servo_keywords(user_text):
+                    if intent.servo:
                         logger.info("서보 모터 실행 키워드 감지!")
                         print("🔄 서보 모터 실행 중...", flush=True)
                         # 비동기로 실행 (서보 실행과 동시에 AI 응답도 처리 가능)
@@ -895,7 +881,7 @@ def main():
                         print("✅ 서보 모터 실행 시작 (백그라운드)", flush=True)
 
                     # LED 제어 키워드 감지
-                    led_action = _contains_led_keywords(user_text)
+                    led_action = intent.led
                     if led_action:
                         logger.info(f"LED {led_action.upper()} 키워드 감지!")
                         print(f"💡 LED {led_action.upper()} 중...", flush=True)
@@ -910,10 +896,9 @@ def main():
                             flush=True,
                         )
 
-                    # 오디오 매핑 확인 (LLM 우회)
-                    mapped_audio_path, mapped_response_text = find_mapped_audio(
-                        user_text, audio_mapping
-                    )
+                    # 오디오 매핑 확인 (LLM 우회, 분류할 때 함께 조회됨)
+                    mapped_audio_path = intent.mapped_audio_path
+                    mapped_response_text = intent.mapped_response
 
                     if mapped_audio_path:
                         # 매핑된 오디오 파일이 있으면 LLM을 거치지 않고 바로 재생
@@ -1009,12 +994,70 @@ def main():
                         continue  # LLM 호출 없이 다음 루프로 (LED 제어는 이미 위에서 실행됨)
 
                     # 슬픈 톤 키워드 감지
-                    is_sad_topic = any(keyword in user_text for keyword in sad_keywords)
+                    is_sad_topic = intent.sad_tone
                     print(f"🔍 슬픈 토픽 감지: {is_sad_topic}", flush=True)
 
+                    response_style = "sad" if is_sad_topic else "neutral"
+                    pitch_shift = -10 if is_sad_topic else 0
+
+                    if LLM_STREAMING:
+                        # AI 응답 스트리밍 (문장이 완성될 때마다 바로 TTS)
+                        print("🧠 생각하는 중...", flush=True)
+                        brain.add_msg(user_text, intent=intent)
+
+                        def _sentences():
+                            first = True
+                            for sentence in brain.stream_run(
+                                ai_name="chipi", device_serial=device_serial
+                            ):
+                                if first:
+                                    # 첫 문장 기준으로 표정 설정 + 서보 모터 실행
+                                    first = False
+                                    emotion = _detect_face_emotion_from_response(
+                                        sentence
+                                    )
+                                    print(f"😊 감지된 표정: {emotion}", flush=True)
+                                    if DEVICE_SERIAL:
+                                        threading.Thread(
+                                            target=_set_face_emotion,
+                                            args=(emotion,),
+                                            daemon=True,
+                                        ).start()
+                                    _run_servo_async()
+                                print(f"🤖 치피: {sentence}", flush=True)
+                                yield sentence
+
+                        print(
+                            f"🎤 응답 톤: {response_style}, 피치: {pitch_shift}",
+                            flush=True,
+                        )
+                        spoken = tts.speak_stream(
+                            _sentences(),
+                            language="ko",
+                            style=response_style,
+                            pitch_shift=pitch_shift,
+                        )
+                        ai_response = brain.last_reply
+                        logger.info(f"AI: {ai_response}")
+
+                        if not spoken:
+                            tts.speak(
+                                "미안, 다시 말해줄래?",
+                                language="ko",
+                                style=response_style,
+                                pitch_shift=pitch_shift,
+                            )
+                            continue
+
+                        # TTS 재생 완료 후 시간 업데이트
+                        if not sleep_mode:
+                            last_response = ai_response
+                            last_interaction_time = time.time()
+                        continue
+
                     # AI 응답 생성 (LLM 호출)
                     print("🧠 생각하는 중...", end=" ", flush=True)
-                    brain.add_msg(user_text)
+                    brain.add_msg(user_text, intent=intent)
                     ai_response = brain.wait_run(
                         ai_name="chipi", device_serial=device_serial
                     )
@@ -1022,8 +1065,6 @@ def main():
                     logger.info(f"AI: {ai_response}")
 
                     if not ai_response:
-                        response_style = "sad" if is_sad_topic else "neutral"
-                        pitch_shift = -10 if is_sad_topic else 0
                         tts.speak(
                             "미안, 다시 말해줄래?",
                             language="ko",
@@ -1054,8 +1095,6 @@ def main():
                         ).start()
 
                     # 슬픈 키워드가 있으면 슬픈 톤으로, 없으면 중립 톤으로 재생
-                    response_style = "sad" if is_sad_topic else "neutral"
-                    pitch_shift = -10 if is_sad_topic else 0
                     print(
                         f"🎤 응답 톤: {response_style}, 피치: {pitch_shift}", flush=True
                     )
@@ -1098,6 +1137,9 @@ def main():
                 board.close()
             except Exception:
                 pass
+        # 대화 저널, 컨텍스트 동기화 스레드, 로컬 캐시 정리
+        if brain is not None:
+            brain.close()
 
 
 if __name__ == "__main__":
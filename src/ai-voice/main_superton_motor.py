@@ -102,6 +102,20 @@ TRIGGER_WORDS = os.environ.get("TRIGGER_WORDS", "치피")
 # Sleep mode 타임아웃 설정
 SLEEP_TIMEOUT = float(os.environ.get("SLEEP_TIMEOUT", "10.0"))
 
+# LLM 응답 스트리밍 여부 (True면 첫 문장이 완성되는 즉시 TTS 시작)
+LLM_STREAMING = os.environ.get("LLM_STREAMING", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# TTS 음성을 다 받기 전에 재생 시작 (WAV를 조각으로 받으면서 재생)
+TTS_STREAMING = os.environ.get("TTS_STREAMING", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
 # VAD 설정 (시끄러운 환경 대응)
 VAD_ENERGY_THRESHOLD = float(os.environ.get("VAD_ENERGY_THRESHOLD", "0.005"))
 VAD_SILENCE_DURATION = float(os.environ.get("VAD_SILENCE_DURATION", "0.8"))
@@ -257,7 +271,7 @@ class AzureSpeechRESTSTT:
 
 
 class SupertonTTS:
-    """SuperTone API를 사용한 TTS 클래스 (AIY Projects play_wav 사용)"""
+    """SuperTone API를 사용한 TTS 클래스 (공유 재생 엔진 사용)"""
 
     def __init__(self, voice_id=None, api_key=None):
         """
@@ -273,6 +287,11 @@ class SupertonTTS:
         if not self.api_key:
             raise ValueError("❌ SUPERTON_API_KEY가 설정되지 않았습니다.")
 
+        # API 요청, 스트리밍 응답, TTS 캐시는 tts/superton_client.py에서 공유
+        from tts.superton_client import SupertonClient
+
+        self.client = SupertonClient(self.api_key, self.voice_id)
+
         logger.info("SuperTone TTS 초기화 완료 (음성 ID: %s)", self.voice_id)
 
     def generate(
@@ -300,42 +319,45 @@ class SupertonTTS:
         Returns:
             음성 바이트 데이터 또는 None
         """
-        url = f"https://supertoneapi.com/v1/text-to-speech/{self.voice_id}"
-
-        headers = {"x-sup-api-key": self.api_key, "Content-Type": "application/json"}
-
-        payload = {
-            "text": text,
-            "language": language,
-            "style": style,
-            "model": "sona_speech_1",
-            "output_format": output_format,
-            "voice_settings": {
-                "pitch_shift": pitch_shift,
-                "pitch_variance": pitch_variance,
-                "speed": speed,
-            },
-        }
+        return self.client.synthesize(
+            text,
+            language,
+            style,
+            output_format,
+            pitch_shift=pitch_shift,
+            speed=speed,
+            pitch_variance=pitch_variance,
+        )
 
-        try:
-            logger.debug(f"SuperTone 음성 생성 중: {text[:20]}...")
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+    def generate_stream(
+        self,
+        text,
+        language="ko",
+        style="neutral",
+        pitch_shift=0,
+        speed=1,
+        pitch_variance=1,
+        chunk_size=4096,
+    ):
+        """
+        SuperTone API 응답을 받는 대로 조각으로 반환 (stream=True)
 
-            if response.status_code == 200:
-                logger.debug("SuperTone 음성 생성 완료")
-                return response.content
-            else:
-                logger.error(
-                    f"SuperTone API 오류 (상태: {response.status_code}): {response.text}"
-                )
-                return None
+        Args:
+            chunk_size: 한 번에 읽을 바이트 수
+            나머지 인자는 generate()와 동일 (출력 형식은 wav 고정)
 
-        except requests.exceptions.Timeout:
-            logger.error("SuperTone 요청 시간 초과 (30초)")
-            return None
-        except Exception as e:
-            logger.error(f"SuperTone 오류: {e}", exc_info=True)
-            return None
+        Yields:
+            bytes: WAV 바이트 조각 (캐시에 있으면 전체를 한 번에, 오류가 나면 받은 데까지만)
+        """
+        return self.client.synthesize_stream(
+            text,
+            language,
+            style,
+            pitch_shift=pitch_shift,
+            speed=speed,
+            pitch_variance=pitch_variance,
+            chunk_size=chunk_size,
+        )
 
     def speak(
         self,
@@ -347,7 +369,7 @@ class SupertonTTS:
         pitch_variance=1,
     ):
         """
-        텍스트를 음성으로 변환하고 재생 (AIY Projects play_wav 사용)
+        텍스트를 음성으로 변환하고 재생
 
         Args:
             text: 말할 텍스트
@@ -357,6 +379,20 @@ class SupertonTTS:
             speed: 재생 속도 (0.5 ~ 2, 기본값: 1)
             pitch_variance: 음높이 변동성 (0 ~ 2, 기본값: 1)
         """
+        if TTS_STREAMING:
+            # 음성을 다 받기 전에 재생 시작
+            self.play_stream(
+                self.generate_stream(
+                    text,
+                    language,
+                    style,
+                    pitch_shift=pitch_shift,
+                    speed=speed,
+                    pitch_variance=pitch_variance,
+                )
+            )
+            return
+
         audio_data = self.generate(
             text,
             language,
@@ -368,30 +404,73 @@ class SupertonTTS:
         )
 
         if audio_data:
-            try:
-                # 임시 파일로 저장
-                with tempfile.NamedTemporaryFile(
-                    suffix=".wav", delete=False
-                ) as tmp_file:
-                    tmp_file.write(audio_data)
-                    tmp_file_path = tmp_file.name
+            self.play(audio_data)
 
-                try:
-                    # 재생 (AIY Projects play_wav 사용)
-                    if HAS_AIY_AUDIO:
-                        play_wav(tmp_file_path)
-                    else:
-                        subprocess.run(["aplay", "-q", tmp_file_path], check=True)
+    def play(self, audio_data):
+        """
+        생성된 wav 데이터 재생 (재생이 끝날 때까지 블록)
 
-                    logger.debug("SuperTone 음성 출력 완료")
-                finally:
-                    try:
-                        os.unlink(tmp_file_path)
-                    except Exception:
-                        pass
+        임시 파일 없이 메모리에서 디코딩해 공유 재생 엔진으로 재생합니다.
 
-            except Exception as e:
-                logger.error(f"SuperTone 재생 오류: {e}", exc_info=True)
+        Args:
+            audio_data: generate()가 반환한 wav 바이트
+        """
+        try:
+            from utils.audio_engine import get_engine
+
+            get_engine().play_wav(audio_data).wait()
+            logger.debug("SuperTone 음성 출력 완료")
+        except Exception as e:
+            logger.error(f"SuperTone 재생 오류: {e}", exc_info=True)
+
+    def play_stream(self, chunks):
+        """
+        조각으로 받는 wav 데이터 재생 (지터 버퍼가 차면 바로 시작, 재생이 끝날 때까지 블록)
+
+        Args:
+            chunks: generate_stream()이 반환한 WAV 바이트 조각
+
+        Returns:
+            bool: 재생 성공 여부
+        """
+        from tts.superton_client import play_stream
+
+        return play_stream(chunks)
+
+    def speak_stream(
+        self,
+        sentences,
+        language="ko",
+        style="neutral",
+        pitch_shift=0,
+        speed=1,
+        pitch_variance=1,
+    ):
+        """
+        문장 단위로 들어오는 텍스트를 이어서 말하기
+        (한 문장을 재생하는 동안 다음 문장을 미리 합성)
+
+        Args:
+            sentences: 문장 iterable (ChipiBrain.stream_run 등)
+            나머지 인자는 speak()와 동일
+
+        Returns:
+            list: 실제로 말한 문장 목록
+        """
+        from utils.audio_utils import play_pipelined
+
+        def _synthesize(text):
+            return self.generate(
+                text,
+                language,
+                style,
+                output_format="wav",
+                pitch_shift=pitch_shift,
+                speed=speed,
+                pitch_variance=pitch_variance,
+            )
+
+        return play_pipelined(sentences, _synthesize, self.play)
 
 
 # ============================================================================
@@ -563,6 +642,9 @@ except ImportError:
             print(f"❌ ChipiBrain을 import할 수 없습니다: {e}")
             sys.exit(1)
 
+# 발화 분류기 (ChipiBrain과 같은 경로에서 import)
+from core.intent_router import IntentRouter
+
 
 # 오디오 유틸리티 import
 try:
@@ -582,14 +664,6 @@ except ImportError:
             return False
 
 
-def _contains_trigger_word(text, trigger_words):
-    """텍스트에 트리거 단어가 포함되어 있는지 확인"""
-    if not text or not trigger_words:
-        return False
-    text_lower = text.lower()
-    return any(trigger in text_lower for trigger in trigger_words)
-
-
 def _find_servo_script_path():
     """서보 스크립트 경로 찾기"""
     # 현재 파일의 디렉토리 기준으로 경로 찾기
@@ -672,26 +746,6 @@ def _run_servo_async():
     return thread
 
 
-def _contains_servo_keywords(text):
-    """서보 모터 실행 키워드 감지"""
-    if not text:
-        return False
-
-    servo_keywords = [
-        "화분 흔들어",
-        "화분 흔들어줘",
-        "모터 움직여",
-        "서보 움직여",
-        "흔들어줘",
-        "흔들어",
-        "모터 실행",
-        "서보 실행",
-    ]
-
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in servo_keywords)
-
-
 def main():
     device_serial = os.environ.get("DEVICE_SERIAL")
     if not device_serial:
@@ -721,6 +775,7 @@ def main():
 
     # Board (LED) 초기화
     board = None
+    brain = None
     if HAS_BOARD:
         try:
             board = Board()
@@ -782,16 +837,8 @@ def main():
         except Exception as e:
             logger.warning(f"서보 모터 실행 중 오류: {e}")
 
-        # 슬픈 톤을 사용할 키워드 목록
-        sad_keywords = [
-            "죽고",
-            "자살",
-            "끝내고",
-            "절망",
-            "극도로 힘들",
-            "살기싫",
-            "뛰어내리",
-        ]
+        # 발화 분류기 (트리거/종료/Sleep/서보/슬픈 톤 키워드를 한 번에 확인)
+        router = IntentRouter(trigger_words=trigger_words)
 
         while True:
             # 1. VAD로 음성 녹음
@@ -856,18 +903,18 @@ def main():
                 print(f'✅ 인식됨: "{user_text}"', flush=True)
                 logger.info(f"사용자: {user_text}")
 
+                # 발화 분류 (이번 턴의 모든 키워드 검사를 한 번에)
+                intent = router.route(user_text, strip_trigger=sleep_mode)
+
                 # Sleep mode: 트리거 단어 확인
                 if sleep_mode:
-                    if _contains_trigger_word(user_text, trigger_words):
+                    if intent.trigger:
                         logger.info("트리거 단어 감지! Wake mode로 전환합니다.")
                         sleep_mode = False
                         last_interaction_time = time.time()
                         # 트리거 단어 제거 (예: "치피 안녕하세요" → "안녕하세요")
-                        cleaned_text = user_text
-                        for trigger in trigger_words:
-                            cleaned_text = cleaned_text.replace(trigger, "", 1).strip()
-                        if cleaned_text:
-                            user_text = cleaned_text
+                        if intent.text:
+                            user_text = intent.text
                         else:
                             # 트리거 단어만 있는 경우
                             logger.info("트리거 단어만 감지되었습니다.")
@@ -885,27 +932,24 @@ def main():
                 if not sleep_mode:
                     last_interaction_time = time.time()
 
+                # DB 컨텍스트 조회를 미리 시작 (명령 확인 등과 겹쳐 실행, wait_run에서 사용)
+                brain.prefetch_context(device_serial)
+
                 # 종료 명령 확인
-                if any(
-                    cmd in user_text.lower()
-                    for cmd in ["종료", "끝내", "그만", "exit", "quit"]
-                ):
+                if intent.exit:
                     logger.info("종료 명령을 받았습니다.")
                     tts.speak("안녕히 가세요!", language="ko", style="neutral")
                     break
 
                 # Sleep 명령 확인 (Sleep mode로 전환)
-                if any(
-                    cmd in user_text.lower()
-                    for cmd in ["잘자", "sleep", "휴식", "쉬어"]
-                ):
+                if intent.sleep:
                     logger.info("Sleep mode로 전환합니다.")
                     sleep_mode = True
                     last_interaction_time = None
                     continue
 
                 # 서보 모터 실행 키워드 감지
-                if _contains_servo_keywords(user_text):
+                if intent.servo:
                     logger.info("서보 모터 실행 키워드 감지!")
                     print("🔄 서보 모터 실행 중...", flush=True)
                     # 비동기로 실행 (서보 실행과 동시에 AI 응답도 처리 가능)
@@ -913,12 +957,52 @@ def main():
                     print("✅ 서보 모터 실행 시작 (백그라운드)", flush=True)
 
                 # 슬픈 톤 키워드 감지
-                is_sad_topic = any(keyword in user_text for keyword in sad_keywords)
+                is_sad_topic = intent.sad_tone
                 print(f"🔍 슬픈 토픽 감지: {is_sad_topic}", flush=True)
 
+                response_style = "sad" if is_sad_topic else "neutral"
+                pitch_shift = -10 if is_sad_topic else 0
+
+                if LLM_STREAMING:
+                    # 3-4. AI 응답 스트리밍 (문장이 완성될 때마다 바로 TTS)
+                    print("🧠 생각하는 중...", flush=True)
+                    brain.add_msg(user_text, intent=intent)
+
+                    def _sentences():
+                        for sentence in brain.stream_run(
+                            ai_name="chipi", device_serial=device_serial
+                        ):
+                            print(f"🤖 치피: {sentence}", flush=True)
+                            yield sentence
+
+                    print(f"🎤 응답 톤: {response_style}, 피치: {pitch_shift}", flush=True)
+                    spoken = tts.speak_stream(
+                        _sentences(),
+                        language="ko",
+                        style=response_style,
+                        pitch_shift=pitch_shift,
+                    )
+                    ai_response = brain.last_reply
+                    logger.info(f"AI: {ai_response}")
+
+                    if not spoken:
+                        tts.speak(
+                            "미안, 다시 말해줄래?",
+                            language="ko",
+                            style=response_style,
+                            pitch_shift=pitch_shift,
+                        )
+                        continue
+
+                    # TTS 재생 완료 후 시간 업데이트
+                    if not sleep_mode:
+                        last_response = ai_response
+                        last_interaction_time = time.time()
+                    continue
+
                 # 3. AI 응답 생성
                 print("🧠 생각하는 중...", end=" ", flush=True)
-                brain.add_msg(user_text)
+                brain.add_msg(user_text, intent=intent)
                 ai_response = brain.wait_run(
                     ai_name="chipi", device_serial=device_serial
                 )
@@ -926,8 +1010,6 @@ def main():
                 logger.info(f"AI: {ai_response}")
 
                 if not ai_response:
-                    response_style = "sad" if is_sad_topic else "neutral"
-                    pitch_shift = -10 if is_sad_topic else 0
                     tts.speak(
                         "미안, 다시 말해줄래?",
                         language="ko",
@@ -949,8 +1031,6 @@ def main():
                     last_interaction_time = time.time()
 
                 # 슬픈 키워드가 있으면 슬픈 톤으로, 없으면 중립 톤으로 재생
-                response_style = "sad" if is_sad_topic else "neutral"
-                pitch_shift = -10 if is_sad_topic else 0
                 print(f"🎤 응답 톤: {response_style}, 피치: {pitch_shift}", flush=True)
 
                 # TTS 재생과 동시에 서보 모터 실행 (비동기)
@@ -993,6 +1073,9 @@ def main():
                 board.close()
             except Exception:
                 pass
+        # 대화 저널, 컨텍스트 동기화 스레드, 로컬 캐시 정리
+        if brain is not None:
+            brain.close()
 
 
 if __name__ == "__main__":
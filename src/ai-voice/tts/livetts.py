@@ -2,7 +2,21 @@ import os
 import time
 import azure.cognitiveservices.speech as speechsdk
 from dotenv import load_dotenv
-import pygame
+
+# 재생 엔진 (임시 파일 없이 메모리에서 바로 재생)
+try:
+    from utils.audio_engine import get_engine
+except ImportError:
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.audio_engine import get_engine
+
+# TTS 캐시 (같은 문장/설정은 다시 합성하지 않음)
+try:
+    from tts.tts_cache import get_tts_cache
+except ImportError:
+    # tts/ 안에서 직접 실행하면 tts가 tts.py 모듈로 잡힘
+    from tts_cache import get_tts_cache
 
 load_dotenv()
 
@@ -15,15 +29,14 @@ class AzureTTS:
             print("❌ 오류: .env 파일이 없거나 키가 설정되지 않았습니다.")
             raise ValueError(".env 파일 확인 필요")
 
-        # Pygame 초기화 (오디오 재생용)
-        pygame.mixer.init()
-
         self.speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.service_region)
-        # 고음질 설정 (48kHz)
+        # 고음질 설정 (48kHz, MP3 대신 PCM WAV로 받아 디코딩 없이 바로 재생)
         self.speech_config.set_speech_synthesis_output_format(
-            speechsdk.SpeechSynthesisOutputFormat.Audio48Khz192KBitRateMonoMp3
+            speechsdk.SpeechSynthesisOutputFormat.Riff48Khz16BitMonoPcm
         )
 
+        self.cache = get_tts_cache()
+
     def speak(self, text, params):
         # 1. 사용자 설정값 가져오기
         voice = params.get("voice", "ko-KR-SeoHyeonNeural")
@@ -46,9 +59,19 @@ class AzureTTS:
             f'</prosody></mstts:express-as></voice></speak>'
         )
 
-        # 절대 경로로 파일명 설정
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        temp_filename = os.path.join(current_dir, "temp_output.mp3")
+        # 같은 문장/설정이면 캐시된 음성을 바로 재생
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(text, voice, style=style, style_degree=degree,
+                                       pitch=pitch, rate=rate, output_format="Riff48Khz16BitMonoPcm")
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"💾 캐시된 치피 음성 재생 (Pitch:{fmt_pitch}, Rate:{fmt_rate})")
+                try:
+                    get_engine().play_wav(cached).wait()
+                except Exception as e:
+                    print(f"❌ 재생 오류: {e}")
+                return
 
         # 4. Azure 합성기 생성 (스피커 사용 X -> 데이터만 받음)
         synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config, audio_config=None)
@@ -59,28 +82,15 @@ class AzureTTS:
         result = synthesizer.speak_ssml_async(ssml_string).get()
 
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            # 6. 받은 데이터를 직접 파일로 저장 (오류 원천 차단)
-            audio_data = result.audio_data
-            with open(temp_filename, "wb") as f:
-                f.write(audio_data)
-            
-            # 7. Pygame으로 재생
+            if cache_key is not None:
+                self.cache.put(cache_key, result.audio_data)
+
+            # 6. 받은 데이터를 임시 파일 없이 바로 재생
             try:
-                pygame.mixer.music.load(temp_filename)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                pygame.mixer.music.unload()
+                get_engine().play_wav(result.audio_data).wait()
             except Exception as e:
                 print(f"❌ 재생 오류: {e}")
 
-            # 파일 정리
-            try:
-                if os.path.exists(temp_filename):
-                    os.remove(temp_filename)
-            except:
-                pass
-
         elif result.reason == speechsdk.ResultReason.Canceled:
             details = result.cancellation_details
             print(f"❌ [Azure 오류] {details.error_details}")
@@ -0,0 +1,243 @@
+"""
+SuperTone 합성 API 클라이언트 (TTS 캐시 + 스트리밍 응답)
+
+main_*.py의 SupertonTTS와 tts/superton_tts.py가 함께 사용하는 부분입니다.
+- synthesize(): 전체 WAV/MP3 바이트를 한 번에 받음
+- synthesize_stream(): 응답을 받는 대로 조각으로 반환 (stream=True, 다 받기 전에 재생 시작용)
+- 같은 텍스트/음성/설정은 TTS 캐시에서 바로 반환하고, 끝까지 받은 응답만 캐시에 저장
+- play_stream(): synthesize_stream() 조각을 공유 재생 엔진으로 재생
+
+사용 예:
+    client = SupertonClient(api_key, voice_id)
+    audio = client.synthesize("안녕하세요", style="happy")
+    play_stream(client.synthesize_stream("안녕하세요"))
+"""
+
+import logging
+
+import requests
+
+try:
+    from tts.tts_cache import get_tts_cache
+except ImportError:
+    # tts/ 안에서 직접 실행하면 tts가 tts.py 모듈로 잡힘
+    from tts_cache import get_tts_cache
+
+logger = logging.getLogger(__name__)
+
+SUPERTON_API_URL = "https://supertoneapi.com/v1/text-to-speech/"
+# 요청 시간 제한 (초)
+SUPERTON_TIMEOUT = 30
+
+
+class SupertonClient:
+    """SuperTone 합성 요청 (캐시 적중이면 네트워크 요청 없음)"""
+
+    def __init__(self, api_key, voice_id, cache=None):
+        """
+        Args:
+            api_key: SuperTone API 키
+            voice_id: 음성 ID
+            cache: TTSCache (기본값: 프로세스 공유 캐시, TTS_CACHE=false면 사용 안 함)
+        """
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.cache = get_tts_cache() if cache is None else cache
+
+    def _request(
+        self, text, language, style, output_format, pitch_shift, speed, pitch_variance
+    ):
+        """SuperTone API 요청 (url, headers, payload)"""
+        url = SUPERTON_API_URL + self.voice_id
+
+        headers = {"x-sup-api-key": self.api_key, "Content-Type": "application/json"}
+
+        payload = {
+            "text": text,
+            "language": language,
+            "style": style,
+            "model": "sona_speech_1",
+            "output_format": output_format,
+            "voice_settings": {
+                "pitch_shift": pitch_shift,
+                "pitch_variance": pitch_variance,
+                "speed": speed,
+            },
+        }
+        return url, headers, payload
+
+    def _cache_key(
+        self, text, language, style, output_format, pitch_shift, speed, pitch_variance
+    ):
+        """TTS 캐시 키 (캐시를 쓰지 않으면 None)"""
+        if self.cache is None:
+            return None
+        return self.cache.key(
+            text,
+            self.voice_id,
+            language=language,
+            style=style,
+            output_format=output_format,
+            pitch_shift=pitch_shift,
+            speed=speed,
+            pitch_variance=pitch_variance,
+        )
+
+    def _cached(self, cache_key, text):
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"SuperTone 캐시 적중: {text[:20]}")
+        return cached
+
+    def synthesize(
+        self,
+        text,
+        language="ko",
+        style="neutral",
+        output_format="wav",
+        pitch_shift=0,
+        speed=1,
+        pitch_variance=1,
+    ):
+        """
+        음성 합성 (응답 전체를 받은 뒤 반환)
+
+        Args:
+            text: 텍스트
+            language: 언어 (기본값: "ko")
+            style: 스타일 (기본값: "neutral")
+            output_format: 출력 형식 - "wav" 또는 "mp3" (기본값: "wav")
+            pitch_shift: 음높이 조정 (-20 ~ 20, 기본값: 0)
+            speed: 재생 속도 (0.5 ~ 2, 기본값: 1)
+            pitch_variance: 음높이 변동성 (0 ~ 2, 기본값: 1)
+
+        Returns:
+            음성 바이트 데이터 또는 None (오류는 로그로 남김)
+        """
+        settings = (
+            text,
+            language,
+            style,
+            output_format,
+            pitch_shift,
+            speed,
+            pitch_variance,
+        )
+        cache_key = self._cache_key(*settings)
+        cached = self._cached(cache_key, text)
+        if cached is not None:
+            return cached
+
+        url, headers, payload = self._request(*settings)
+
+        try:
+            logger.debug(f"SuperTone 음성 생성 중: {text[:20]}...")
+            response = requests.post(
+                url, json=payload, headers=headers, timeout=SUPERTON_TIMEOUT
+            )
+
+            if response.status_code == 200:
+                logger.debug("SuperTone 음성 생성 완료")
+                if cache_key is not None:
+                    self.cache.put(cache_key, response.content)
+                return response.content
+            else:
+                logger.error(
+                    f"SuperTone API 오류 (상태: {response.status_code}): {response.text}"
+                )
+                return None
+
+        except requests.exceptions.Timeout:
+            logger.error(f"SuperTone 요청 시간 초과 ({SUPERTON_TIMEOUT}초)")
+            return None
+        except Exception as e:
+            logger.error(f"SuperTone 오류: {e}", exc_info=True)
+            return None
+
+    def synthesize_stream(
+        self,
+        text,
+        language="ko",
+        style="neutral",
+        pitch_shift=0,
+        speed=1,
+        pitch_variance=1,
+        chunk_size=4096,
+    ):
+        """
+        응답을 받는 대로 조각으로 반환 (stream=True)
+
+        Args:
+            chunk_size: 한 번에 읽을 바이트 수
+            나머지 인자는 synthesize()와 동일 (출력 형식은 wav 고정)
+
+        Yields:
+            bytes: WAV 바이트 조각 (캐시에 있으면 전체를 한 번에, 오류가 나면 받은 데까지만)
+        """
+        settings = (text, language, style, "wav", pitch_shift, speed, pitch_variance)
+        cache_key = self._cache_key(*settings)
+        cached = self._cached(cache_key, text)
+        if cached is not None:
+            yield cached
+            return
+
+        url, headers, payload = self._request(*settings)
+
+        try:
+            logger.debug(f"SuperTone 음성 스트리밍 생성 중: {text[:20]}...")
+            response = requests.post(
+                url,
+                json=payload,
+                headers=headers,
+                timeout=SUPERTON_TIMEOUT,
+                stream=True,
+            )
+            try:
+                if response.status_code != 200:
+                    logger.error(
+                        f"SuperTone API 오류 (상태: {response.status_code}): {response.text}"
+                    )
+                    return
+                received = []
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        received.append(chunk)
+                        yield chunk
+                logger.debug("SuperTone 음성 스트리밍 완료")
+                # 끝까지 받은 경우만 저장 (중간에 멈추면 여기까지 오지 않음)
+                if cache_key is not None:
+                    self.cache.put(cache_key, b"".join(received))
+            finally:
+                response.close()
+
+        except requests.exceptions.Timeout:
+            logger.error(f"SuperTone 요청 시간 초과 ({SUPERTON_TIMEOUT}초)")
+        except Exception as e:
+            logger.error(f"SuperTone 오류: {e}", exc_info=True)
+
+
+def play_stream(chunks):
+    """
+    조각으로 받는 wav 데이터 재생 (지터 버퍼가 차면 바로 시작, 재생이 끝날 때까지 블록)
+
+    Args:
+        chunks: SupertonClient.synthesize_stream()이 반환한 WAV 바이트 조각
+
+    Returns:
+        bool: 재생 성공 여부
+    """
+    try:
+        from utils.audio_engine import get_engine
+
+        playback = get_engine().play_wav_stream(chunks)
+        if playback is None:
+            logger.error("SuperTone 스트리밍 응답에 음성 데이터가 없습니다.")
+            return False
+        playback.wait()
+        logger.debug("SuperTone 음성 출력 완료")
+        return True
+    except Exception as e:
+        logger.error(f"SuperTone 재생 오류: {e}", exc_info=True)
+        return False
@@ -1,9 +1,23 @@
 import os
 import requests
-import pygame
 import azure.cognitiveservices.speech as speechsdk
 from dotenv import load_dotenv
 
+# 재생 엔진 (임시 파일 없이 메모리에서 바로 재생)
+try:
+    from utils.audio_engine import get_engine
+except ImportError:
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.audio_engine import get_engine
+
+# SuperTone 합성 요청 + TTS 캐시 (main_*.py의 SupertonTTS와 공유)
+try:
+    from tts.superton_client import SupertonClient
+except ImportError:
+    # tts/ 안에서 직접 실행하면 tts가 tts.py 모듈로 잡힘
+    from superton_client import SupertonClient
+
 load_dotenv()
 
 
@@ -24,7 +38,7 @@ class SupertonTTS:
         if not self.api_key:
             raise ValueError("❌ SUPERTON_API_KEY가 설정되지 않았습니다.")
 
-        pygame.mixer.init()
+        self.client = SupertonClient(self.api_key, self.voice_id)
 
         # Azure Speech 설정 (음성 인식용)
         self.speech_key = os.getenv("AZURE_SPEECH_KEY")
@@ -53,46 +67,16 @@ class SupertonTTS:
         Returns:
             음성 바이트 데이터 또는 None
         """
-        url = f"https://supertoneapi.com/v1/text-to-speech/{self.voice_id}"
-
-        headers = {
-            "x-sup-api-key": self.api_key,
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "text": text,
-            "language": language,
-            "style": style,
-            "model": "sona_speech_1",
-            "output_format": output_format,
-            "voice_settings": {
-                "pitch_shift": pitch_shift,
-                "pitch_variance": pitch_variance,
-                "speed": speed
-            }
-        }
-
-        try:
-            print(f"🔊 음성 생성 중: {text[:20]}...", end=" ", flush=True)
-            print(f"\n   📤 요청 스타일: {style}", flush=True)
-
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-
-            if response.status_code == 200:
-                print("✅ 완료", flush=True)
-                return response.content
-            else:
-                print(f"❌ 오류 (상태: {response.status_code})", flush=True)
-                print(f"응답: {response.text}")
-                return None
+        print(f"🔊 음성 생성 중: {text[:20]}...", end=" ", flush=True)
+        print(f"\n   📤 요청 스타일: {style}", flush=True)
 
-        except requests.exceptions.Timeout:
-            print(f"❌ 요청 시간 초과 (30초)", flush=True)
-            return None
-        except Exception as e:
-            print(f"❌ 오류: {e}", flush=True)
-            return None
+        # 캐시에 있으면 네트워크 요청 없이 바로 반환
+        audio_data = self.client.synthesize(text, language, style, output_format,
+                                            pitch_shift=pitch_shift, speed=speed,
+                                            pitch_variance=pitch_variance)
+        # 오류 내용은 superton_client 로그로 출력됨
+        print("✅ 완료" if audio_data else "❌ 오류", flush=True)
+        return audio_data
 
     def speak(self, text, language="ko", style="neutral", pitch_shift=0, speed=1, pitch_variance=1):
         """
@@ -112,29 +96,11 @@ class SupertonTTS:
 
         if audio_data:
             try:
-                # 임시 파일로 저장 후 재생
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                temp_file = os.path.join(current_dir, "temp_superton.wav")
-
-                with open(temp_file, "wb") as f:
-                    f.write(audio_data)
-
+                # 임시 파일 없이 메모리에서 디코딩해 바로 재생
                 print("▶️  재생 중...", end=" ", flush=True)
-                pygame.mixer.music.load(temp_file)
-                pygame.mixer.music.play()
-
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(30)
-
-                pygame.mixer.music.unload()
+                get_engine().play_wav(audio_data).wait()
                 print("✅ 완료", flush=True)
 
-                # 임시 파일 삭제
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
-
             except Exception as e:
                 print(f"❌ 재생 오류: {e}", flush=True)
 
@@ -0,0 +1,268 @@
+"""
+TTS 합성 결과 캐시 (내용 주소 방식, 메모리 + 디스크)
+
+텍스트와 음성 설정(voice, style, pitch_shift, speed, pitch_variance 등)의 해시를 키로
+합성된 오디오 바이트를 저장합니다. "네, 말씀해주세요." 같은 반복 문구나 같은 LLM 답변은
+네트워크 합성 없이 바로 재생됩니다.
+
+- 메모리: 최근 사용한 항목을 TTS_CACHE_MEMORY_MB까지 보관 (LRU)
+  (TTS_CACHE_MEMORY_MB보다 큰 항목은 메모리에 두지 않고 매번 디스크에서 읽음, 적중으로 집계)
+- 디스크: TTS_CACHE_DIR에 키 이름의 파일로 저장, TTS_CACHE_MAX_MB를 넘으면 오래된 것부터 삭제
+  (재시작하면 파일 수정 시각 순서로 LRU 순서를 복원)
+- hits/misses 카운터로 적중률 확인
+- 저장/반환하는 값은 불변 bytes이므로 복사하지 않고 호출한 쪽과 공유함
+
+사용 예:
+    cache = get_tts_cache()
+    key = cache.key(text, voice_id, style=style, pitch_shift=0, speed=1, pitch_variance=1)
+    audio = cache.get(key)
+    if audio is None:
+        audio = synthesize(text)
+        cache.put(key, audio)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# TTS 캐시 사용 여부
+TTS_CACHE_ENABLED = os.environ.get("TTS_CACHE", "true").lower() in ("true", "1", "yes")
+TTS_CACHE_DIR = os.environ.get(
+    "TTS_CACHE_DIR",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tts_cache"
+    ),
+)
+# 디스크 캐시 최대 크기 (MB)
+TTS_CACHE_MAX_MB = float(os.environ.get("TTS_CACHE_MAX_MB", "64"))
+# 메모리 캐시 최대 크기 (MB)
+TTS_CACHE_MEMORY_MB = float(os.environ.get("TTS_CACHE_MEMORY_MB", "8"))
+
+_SUFFIX = ".tts"
+
+
+class TTSCache:
+    """합성 설정 해시 → 오디오 바이트 캐시 (메모리 LRU + 디스크 LRU)"""
+
+    def __init__(self, directory=None, max_disk_bytes=None, max_memory_bytes=None):
+        """
+        Args:
+            directory: 디스크 캐시 디렉토리 (기본값: TTS_CACHE_DIR, 빈 문자열이면 메모리만)
+            max_disk_bytes: 디스크 캐시 최대 바이트 수 (기본값: TTS_CACHE_MAX_MB)
+            max_memory_bytes: 메모리 캐시 최대 바이트 수 (기본값: TTS_CACHE_MEMORY_MB)
+        """
+        self.directory = TTS_CACHE_DIR if directory is None else directory
+        if max_disk_bytes is None:
+            max_disk_bytes = int(TTS_CACHE_MAX_MB * 1024 * 1024)
+        if max_memory_bytes is None:
+            max_memory_bytes = int(TTS_CACHE_MEMORY_MB * 1024 * 1024)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()  # 키 → 바이트
+        self._memory_size = 0
+        self._disk = OrderedDict()  # 키 → 파일 크기 (오래된 것부터)
+        self._disk_size = 0
+        # summary()를 잠금 안에서도 부를 수 있도록 재진입 가능
+        self._lock = threading.RLock()
+        if self.directory:
+            self._scan()
+
+    @staticmethod
+    def key(text, voice, **settings):
+        """
+        캐시 키 (텍스트, 음성, 합성 설정의 SHA-256)
+
+        Args:
+            text: 합성할 텍스트
+            voice: 음성 ID/이름
+            settings: style, pitch_shift, speed, pitch_variance, language, output_format 등
+        """
+        material = json.dumps(
+            [text, voice, settings], sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _scan(self):
+        """시작할 때 디스크 캐시 목록을 한 번만 읽음 (수정 시각 순)"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".tmp"):
+                    # 저장 중에 종료되어 남은 임시 파일
+                    os.unlink(entry.path)
+                elif entry.is_file() and entry.name.endswith(_SUFFIX):
+                    stat = entry.stat()
+                    key = entry.name[: -len(_SUFFIX)]
+                    entries.append((stat.st_mtime, key, stat.st_size))
+        except OSError as e:
+            logger.warning(
+                f"TTS 캐시 디렉토리를 사용할 수 없습니다 ({self.directory}): {e}"
+            )
+            self.directory = ""
+            return
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+        self._evict_disk()
+        logger.info(
+            f"TTS 캐시: {len(self._disk)}개, {self._disk_size / 1024 / 1024:.1f} MB "
+            f"({self.directory})"
+        )
+
+    def get(self, key):
+        """
+        캐시된 오디오 바이트 (없으면 None, hits/misses 집계)
+
+        반환값은 캐시와 같은 bytes 객체입니다 (불변이므로 복사하지 않음).
+        메모리 한도보다 큰 항목은 디스크에서 읽은 것도 적중으로 집계합니다.
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return data
+            on_disk = key in self._disk
+
+        if on_disk:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                # 다른 곳에서 지운 경우
+                with self._lock:
+                    size = self._disk.pop(key, None)
+                    if size is not None:
+                        self._disk_size -= size
+                data = None
+
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                logger.debug(f"TTS 캐시 미스 ({self.summary()})")
+                return None
+            self.hits += 1
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """
+        오디오 바이트 저장 (메모리 + 디스크)
+
+        bytes는 그대로 보관하고, bytearray 등 변경 가능한 버퍼만 복사합니다.
+        """
+        if not data:
+            return
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        with self._lock:
+            self._remember(key, data)
+            if not self.directory or key in self._disk:
+                return
+            if len(data) > self.max_disk_bytes:
+                return
+
+        # 임시 파일에 쓴 뒤 이름을 바꿔서 읽는 쪽이 잘린 파일을 보지 않게 함
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"TTS 캐시 저장 실패: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            if key not in self._disk:
+                self._disk[key] = len(data)
+                self._disk_size += len(data)
+            self._evict_disk()
+
+    def _remember(self, key, data):
+        """메모리 캐시에 추가 (_lock 안에서 호출)"""
+        if len(data) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _evict_disk(self):
+        """디스크 캐시가 한도를 넘으면 오래 안 쓴 파일부터 삭제 (_lock 안에서 호출)"""
+        while self._disk_size > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    @property
+    def hit_rate(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def stats(self):
+        """캐시 통계 (dict)"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_size,
+            }
+
+    def summary(self):
+        """한 줄 통계 (로그용)"""
+        with self._lock:
+            return (
+                f"적중 {self.hits} (메모리 {self.memory_hits}) / 미스 {self.misses}, "
+                f"적중률 {self.hit_rate * 100:.0f}%"
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache():
+    """프로세스 전체에서 공유하는 TTSCache (TTS_CACHE=false면 None)"""
+    global _cache
+    if not TTS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache()
+        return _cache
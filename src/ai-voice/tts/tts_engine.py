@@ -1,7 +1,21 @@
 import os
 import azure.cognitiveservices.speech as speechsdk
 from dotenv import load_dotenv
-import pygame
+
+# 재생 엔진 (임시 파일 없이 메모리에서 바로 재생)
+try:
+    from utils.audio_engine import get_engine
+except ImportError:
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.audio_engine import get_engine
+
+# TTS 캐시 (같은 문장/설정은 다시 합성하지 않음)
+try:
+    from tts.tts_cache import get_tts_cache
+except ImportError:
+    # tts/ 안에서 직접 실행하면 tts가 tts.py 모듈로 잡힘
+    from tts_cache import get_tts_cache
 
 load_dotenv()
 
@@ -13,15 +27,16 @@ class AzureTTS:
         if not self.speech_key or not self.service_region:
             raise ValueError("❌ .env 파일 확인 필요")
 
-        pygame.mixer.init()
-
         # Speech Config는 한 번만 로드해서 재사용 (속도 향상)
         self.speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.service_region)
+        # MP3 대신 PCM WAV로 받아 디코딩 없이 바로 재생
         self.speech_config.set_speech_synthesis_output_format(
-            speechsdk.SpeechSynthesisOutputFormat.Audio48Khz192KBitRateMonoMp3
+            speechsdk.SpeechSynthesisOutputFormat.Riff48Khz16BitMonoPcm
         )
         self.speech_config.speech_recognition_language = "ko-KR"
 
+        self.cache = get_tts_cache()
+
     def speak(self, text, params):
         print(f"🔊 [TTS] 음성 생성 시작: {text[:15]}...", end=" ", flush=True)
         
@@ -40,8 +55,19 @@ class AzureTTS:
             f'</prosody></mstts:express-as></voice></speak>'
         )
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        temp_filename = os.path.join(current_dir, "temp_output.mp3")
+        # 같은 문장/설정이면 캐시된 음성을 바로 재생
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(text, voice, style=style, style_degree=degree,
+                                       pitch=pitch, rate=rate, output_format="Riff48Khz16BitMonoPcm")
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("💾 캐시된 음성 -> 재생 중", flush=True)
+                try:
+                    get_engine().play_wav(cached).wait()
+                except Exception as e:
+                    print(f"\n❌ 재생 오류: {e}")
+                return
 
         # 파일 저장용 합성기 생성
         synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config, audio_config=None)
@@ -51,25 +77,15 @@ class AzureTTS:
 
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
             print("✅ 생성 완료 -> 재생 중", flush=True)
+            if cache_key is not None:
+                self.cache.put(cache_key, result.audio_data)
             
-            # 파일 쓰기
-            with open(temp_filename, "wb") as f:
-                f.write(result.audio_data)
-            
-            # 재생
+            # 재생 (임시 파일 없이 받은 데이터를 바로 재생)
             try:
-                pygame.mixer.music.load(temp_filename)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(30) # 체크 주기를 10->30으로 높여 반응성 향상
-                pygame.mixer.music.unload()
+                get_engine().play_wav(result.audio_data).wait()
             except Exception as e:
                 print(f"\n❌ 재생 오류: {e}")
 
-            # 파일 삭제 (빠른 정리를 위해 try-except 최소화)
-            try: os.remove(temp_filename)
-            except: pass
-
         elif result.reason == speechsdk.ResultReason.Canceled:
             print(f"\n❌ [TTS 실패] {result.cancellation_details.error_details}")
 
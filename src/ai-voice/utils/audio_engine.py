@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+지속 오디오 재생 엔진 (링 버퍼 + 재생 스레드 하나)
+
+모든 재생(매핑된 응답 음성, intro.wav, TTS 음성)을 하나의 엔진으로 모읍니다.
+- 재생 요청마다 링 버퍼를 두고, 재생 스레드가 주기(period) 단위로 꺼내 AudioOutput에 씀
+- PCM 바이트, memoryview, numpy 배열(int16 또는 -1.0~1.0 float → 16bit)을 받음
+- 요청은 순서대로 큐에 쌓이고, stop()으로 현재 재생과 대기 중인 요청을 바로 중단 (barge-in)
+- 재생이 끝나거나 중단되면 on_done(completed) 콜백 호출
+- 임시 파일, 재생마다 프로세스 실행, get_busy() 폴링 없음 (이벤트/조건 변수로 대기)
+
+사용 예:
+    engine = get_engine()
+    engine.play_wav(wav_bytes).wait()          # WAV 바이트 재생 (끝날 때까지 대기)
+
+    playback = engine.open_stream(fmt, on_done=lambda ok: print("끝", ok))
+    for chunk in chunks:                       # 받는 대로 넣으면 바로 재생
+        playback.feed(chunk)
+    playback.finish()
+
+    engine.stop()                              # 사용자가 말하기 시작하면 중단
+"""
+
+import io
+import logging
+import os
+import queue
+import threading
+
+try:
+    from utils.audio_output import WavStreamParser, decode_wav, get_output
+except ImportError:
+    from audio_output import WavStreamParser, decode_wav, get_output
+
+# numpy는 선택사항 (numpy 배열을 넣을 때만 필요)
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+# 스트리밍 요청의 링 버퍼 크기 (초, 가득 차면 feed()가 블록)
+AUDIO_ENGINE_BUFFER_SECONDS = float(
+    os.environ.get("AUDIO_ENGINE_BUFFER_SECONDS", "2.0")
+)
+# 한 번에 출력에 쓰는 단위 (ms, 작을수록 stop() 반응이 빠름)
+AUDIO_ENGINE_PERIOD_MS = int(os.environ.get("AUDIO_ENGINE_PERIOD_MS", "40"))
+# 출력에 미리 써 두는 최대 시간 (초, aplay 출력에서 stop() 후 남는 소리 길이)
+AUDIO_ENGINE_LEAD_SECONDS = float(os.environ.get("AUDIO_ENGINE_LEAD_SECONDS", "0.1"))
+# 스트리밍 WAV 재생을 시작하기 전에 모아 둘 소리 길이 (ms, 네트워크 지연 흡수)
+TTS_STREAM_JITTER_MS = int(os.environ.get("TTS_STREAM_JITTER_MS", "200"))
+
+
+def to_pcm_bytes(frames):
+    """PCM 바이트 / memoryview / numpy 배열 → 바이트 (float 배열은 16bit로 변환)"""
+    if HAS_NUMPY and isinstance(frames, np.ndarray):
+        if frames.dtype.kind == "f":
+            frames = (np.clip(frames, -1.0, 1.0) * 32767).astype("<i2")
+        return frames.tobytes()
+    if isinstance(frames, bytes):
+        return frames
+    return bytes(frames)
+
+
+class RingBuffer:
+    """고정 크기 바이트 링 버퍼 (생산자 하나 / 소비자 하나)"""
+
+    def __init__(self, capacity):
+        self._buf = bytearray(max(1, capacity))
+        self._start = 0
+        self._size = 0
+        self._closed = False  # 더 이상 쓰지 않음 (남은 데이터는 읽을 수 있음)
+        self._aborted = False  # 남은 데이터도 버림
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self):
+        return len(self._buf)
+
+    def __len__(self):
+        return self._size
+
+    def write(self, data):
+        """
+        데이터 쓰기 (공간이 생길 때까지 블록)
+
+        Returns:
+            int: 쓴 바이트 수 (중단되면 일부만 쓰고 반환)
+        """
+        view = memoryview(data)
+        written = 0
+        with self._cond:
+            while written < len(view):
+                while self._size == self.capacity and not self._aborted:
+                    self._cond.wait()
+                if self._aborted or self._closed:
+                    break
+                end = (self._start + self._size) % self.capacity
+                n = min(
+                    len(view) - written, self.capacity - self._size, self.capacity - end
+                )
+                self._buf[end : end + n] = view[written : written + n]
+                self._size += n
+                written += n
+                self._cond.notify_all()
+        return written
+
+    def read(self, max_bytes):
+        """
+        최대 max_bytes 읽기 (데이터가 들어오거나 닫힐 때까지 블록)
+
+        Returns:
+            bytes: 닫혔고 남은 데이터가 없으면 b""
+        """
+        with self._cond:
+            while self._size == 0 and not (self._closed or self._aborted):
+                self._cond.wait()
+            if self._aborted:
+                return b""
+            n = min(max_bytes, self._size, self.capacity - self._start)
+            chunk = bytes(self._buf[self._start : self._start + n])
+            self._start = (self._start + n) % self.capacity
+            self._size -= n
+            self._cond.notify_all()
+            return chunk
+
+    def close(self):
+        """쓰기 끝 (남은 데이터를 다 읽으면 read()가 b"" 반환)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self):
+        """남은 데이터를 버리고 대기 중인 read()/write()를 깨움"""
+        with self._cond:
+            self._aborted = True
+            self._size = 0
+            self._cond.notify_all()
+
+
+class Playback:
+    """재생 요청 하나 (AudioEngine.open_stream()/play() 결과)"""
+
+    def __init__(self, fmt, capacity, on_done=None):
+        self.format = fmt
+        self.buffer = RingBuffer(capacity)
+        self.on_done = on_done
+        self.completed = False  # 끝까지 재생했는지 (중단되면 False)
+        self.played_seconds = 0.0
+        self._frame_bytes = fmt.channels * fmt.sample_width
+        self._pending = b""  # 프레임 크기에 못 미치는 나머지
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    def feed(self, frames):
+        """PCM 데이터 추가 (버퍼가 가득 차면 재생될 때까지 블록)"""
+        data = self._pending + to_pcm_bytes(frames)
+        aligned = len(data) - len(data) % self._frame_bytes
+        self._pending = data[aligned:]
+        if aligned:
+            self.buffer.write(memoryview(data)[:aligned])
+        return self
+
+    def finish(self):
+        """더 넣을 데이터 없음 (남은 데이터를 재생하고 끝남)"""
+        self.buffer.close()
+        return self
+
+    def cancel(self):
+        """이 요청만 중단"""
+        self._cancelled.set()
+        self.buffer.abort()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait_cancel(self, timeout):
+        """timeout 동안 대기 (그 사이 중단되면 바로 True 반환)"""
+        return self._cancelled.wait(timeout)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        재생이 끝날 때까지 대기
+
+        Returns:
+            bool: 끝까지 재생했으면 True (중단/타임아웃이면 False)
+        """
+        self._done.wait(timeout)
+        return self.completed
+
+
+class AudioEngine:
+    """재생 스레드 하나로 요청을 순서대로 재생하는 엔진"""
+
+    def __init__(
+        self, output=None, buffer_seconds=None, period_ms=None, lead_seconds=None
+    ):
+        """
+        Args:
+            output: AudioOutput (기본값: 프로세스 공유 출력)
+            buffer_seconds: 스트리밍 요청 링 버퍼 크기 (초)
+            period_ms: 출력에 한 번에 쓰는 단위 (ms)
+            lead_seconds: 출력에 미리 써 두는 최대 시간 (초)
+        """
+        self._output = output
+        self.buffer_seconds = (
+            AUDIO_ENGINE_BUFFER_SECONDS if buffer_seconds is None else buffer_seconds
+        )
+        self.period_ms = AUDIO_ENGINE_PERIOD_MS if period_ms is None else period_ms
+        self.lead_seconds = (
+            AUDIO_ENGINE_LEAD_SECONDS if lead_seconds is None else lead_seconds
+        )
+        self._queue = queue.Queue()
+        self._current = None
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0  # 아직 끝나지 않은 요청 수
+        self._thread = threading.Thread(
+            target=self._run, name="AudioEngine", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def output(self):
+        if self._output is None:
+            self._output = get_output()
+        return self._output
+
+    @property
+    def busy(self):
+        """재생 중이거나 대기 중인 요청이 있는지"""
+        return not self._idle.is_set()
+
+    def open_stream(self, fmt, on_done=None, capacity=None):
+        """
+        스트리밍 재생 요청 (feed()로 데이터를 넣으면 차례가 되는 대로 재생)
+
+        Args:
+            fmt: PcmFormat
+            on_done: 끝나거나 중단되면 호출할 함수 (인자: completed)
+            capacity: 링 버퍼 크기 (바이트, 기본값: buffer_seconds)
+
+        Returns:
+            Playback
+        """
+        frame_bytes = fmt.channels * fmt.sample_width
+        if capacity is None:
+            capacity = int(self.buffer_seconds * fmt.rate) * frame_bytes
+        # 프레임 경계에서만 감기도록 프레임 크기의 배수로 맞춤
+        capacity = max(frame_bytes, capacity - capacity % frame_bytes)
+        playback = Playback(fmt, capacity, on_done)
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+        self._queue.put(playback)
+        return playback
+
+    def play(self, frames, fmt, on_done=None):
+        """
+        PCM 데이터 전체를 큐에 넣음 (바로 반환, 기다리려면 .wait())
+
+        Returns:
+            Playback
+        """
+        data = to_pcm_bytes(frames)
+        playback = self.open_stream(fmt, on_done, capacity=len(data))
+        return playback.feed(data).finish()
+
+    def play_wav(self, wav, on_done=None):
+        """
+        WAV 파일 또는 WAV 바이트 재생 (메모리에서 디코딩, 바로 반환)
+
+        Args:
+            wav: 파일 경로 또는 WAV 바이트 (bytes/memoryview)
+
+        Returns:
+            Playback
+        """
+        clip = decode_wav(wav if isinstance(wav, str) else io.BytesIO(wav))
+        return self.play(clip.pcm, clip.format, on_done)
+
+    def play_wav_stream(self, chunks, on_done=None, jitter_ms=None):
+        """
+        조각으로 들어오는 WAV 재생 (다운로드가 끝나기 전에 재생 시작)
+
+        헤더를 읽은 뒤 jitter_ms만큼 PCM이 모이면 재생을 시작하고, 이후 조각은 받는 대로 넣습니다.
+        chunks를 다 넣을 때까지 블록합니다 (재생 끝까지 기다리려면 반환값의 .wait()).
+
+        Args:
+            chunks: WAV 바이트 조각 iterable (requests의 iter_content 등)
+            on_done: 끝나거나 중단되면 호출할 함수 (인자: completed)
+            jitter_ms: 재생 전에 모아 둘 소리 길이 (기본값: TTS_STREAM_JITTER_MS)
+
+        Returns:
+            Playback or None: 헤더를 읽기 전에 스트림이 끝나면 None
+
+        Raises:
+            ValueError: WAV/PCM 형식이 아닌 경우
+        """
+        if jitter_ms is None:
+            jitter_ms = TTS_STREAM_JITTER_MS
+        parser = WavStreamParser()
+        playback = None
+        pending = bytearray()
+        try:
+            for chunk in chunks:
+                pcm = parser.feed(chunk)
+                if playback is None:
+                    fmt = parser.format
+                    if fmt is None:
+                        continue
+                    pending += pcm
+                    jitter_bytes = int(fmt.rate * jitter_ms / 1000) * (
+                        fmt.channels * fmt.sample_width
+                    )
+                    if len(pending) < jitter_bytes:
+                        continue
+                    playback = self.open_stream(fmt, on_done)
+                    pcm = bytes(pending)
+                if playback.cancelled:
+                    # 중단되면 나머지는 받지 않음
+                    break
+                playback.feed(pcm)
+        finally:
+            # 지터 버퍼보다 짧은 음성이거나 다운로드가 중간에 끊긴 경우 받은 만큼 재생
+            if playback is None and parser.format is not None:
+                playback = self.open_stream(parser.format, on_done)
+                playback.feed(bytes(pending))
+            if playback is not None:
+                playback.finish()
+        return playback
+
+    def stop(self):
+        """현재 재생과 대기 중인 요청을 모두 중단 (barge-in)"""
+        # 대기 중인 요청은 취소 표시만 하고, 재생 스레드가 꺼내면서 콜백/정리
+        with self._queue.mutex:
+            waiting = list(self._queue.queue)
+        for playback in waiting:
+            playback.cancel()
+        current = self._current
+        if current is not None:
+            current.cancel()
+
+    def wait_idle(self, timeout=None):
+        """모든 요청이 끝날 때까지 대기"""
+        return self._idle.wait(timeout)
+
+    def _run(self):
+        while True:
+            playback = self._queue.get()
+            self._current = playback
+            try:
+                self._play(playback)
+            except Exception as e:
+                logger.error(f"오디오 재생 오류: {e}", exc_info=True)
+                playback.completed = False
+            finally:
+                self._current = None
+                self._finish(playback)
+
+    def _play(self, playback):
+        fmt = playback.format
+        output = self.output
+        frame_bytes = fmt.channels * fmt.sample_width
+        period = max(1, int(fmt.rate * self.period_ms / 1000)) * frame_bytes
+
+        while not playback.cancelled:
+            chunk = playback.buffer.read(period)
+            if not chunk:
+                break
+            # 출력에 너무 많이 쌓이지 않게 대기 (stop()이 오면 바로 깨어남)
+            ahead = output.ahead()
+            if ahead > self.lead_seconds and playback.wait_cancel(
+                ahead - self.lead_seconds
+            ):
+                break
+            playback.played_seconds += output.write(chunk, fmt)
+
+        if playback.cancelled:
+            return
+        # 출력에 남은 소리가 다 나올 때까지 대기
+        ahead = output.ahead()
+        if ahead > 0 and playback.wait_cancel(ahead):
+            return
+        playback.completed = True
+
+    def _finish(self, playback):
+        playback._done.set()
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.set()
+        if playback.on_done is not None:
+            try:
+                playback.on_done(playback.completed)
+            except Exception as e:
+                logger.error(f"재생 완료 콜백 오류: {e}", exc_info=True)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """프로세스 전체에서 공유하는 AudioEngine"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AudioEngine()
+        return _engine
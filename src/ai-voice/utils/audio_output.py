@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+PCM 오디오 출력 (재생할 때마다 프로세스를 띄우지 않는 지속 출력 스트림)
+
+재생마다 aplay/play_wav를 새로 실행하는 대신, 출력 스트림 하나를 열어 두고 PCM 데이터를 씁니다.
+- pyaudio가 있으면 PyAudio 출력 스트림 사용
+- 없으면 raw PCM을 stdin으로 받는 aplay 프로세스 하나를 계속 사용
+  (포맷(샘플레이트/채널/비트)이 바뀔 때만 다시 실행)
+
+사용 예:
+    output = get_output()
+    output.play(pcm_bytes, PcmFormat(rate=24000, channels=1, sample_width=2))
+"""
+
+import logging
+import os
+import struct
+import subprocess
+import threading
+import time
+import wave
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# pyaudio는 선택사항
+try:
+    import pyaudio
+
+    HAS_PYAUDIO = True
+except ImportError:
+    HAS_PYAUDIO = False
+
+# 출력 방식: auto(pyaudio 우선), pyaudio, aplay
+AUDIO_OUTPUT = os.environ.get("AUDIO_OUTPUT", "auto").lower()
+# ALSA 장치 이름 (aplay -D, 비어 있으면 기본 장치)
+AUDIO_OUTPUT_DEVICE = os.environ.get("AUDIO_OUTPUT_DEVICE", "")
+
+PcmFormat = namedtuple("PcmFormat", ["rate", "channels", "sample_width"])
+Clip = namedtuple("Clip", ["pcm", "format"])
+
+# aplay -f 인자 (샘플 크기별)
+_APLAY_FORMATS = {1: "U8", 2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+
+
+def pcm_duration(size, fmt):
+    """PCM 바이트 수 → 재생 시간 (초)"""
+    return size / float(fmt.rate * fmt.channels * fmt.sample_width)
+
+
+def decode_wav(path):
+    """
+    WAV 파일 → Clip (PCM 바이트 + 포맷)
+
+    Args:
+        path: 파일 경로 또는 파일 객체 (io.BytesIO 등)
+
+    Raises:
+        wave.Error: PCM WAV가 아닌 경우
+    """
+    with wave.open(path, "rb") as wav:
+        fmt = PcmFormat(wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+        pcm = wav.readframes(wav.getnframes())
+    return Clip(pcm, fmt)
+
+
+class WavStreamParser:
+    """
+    조각으로 들어오는 WAV 바이트에서 헤더를 읽고 PCM만 꺼냄 (스트리밍 다운로드용)
+
+    사용 예:
+        parser = WavStreamParser()
+        for chunk in chunks:
+            pcm = parser.feed(chunk)   # 헤더를 다 읽기 전에는 b""
+            if parser.format: ...
+    """
+
+    def __init__(self):
+        self.format = None  # fmt 청크를 읽으면 PcmFormat
+        self._buf = bytearray()
+        self._riff_checked = False
+        self._in_data = False
+        self._remaining = None  # data 청크의 남은 바이트 (None이면 스트림 끝까지)
+
+    def feed(self, chunk):
+        """
+        바이트 조각 추가
+
+        Returns:
+            bytes: 이번 조각에서 나온 PCM 데이터 (헤더 부분은 제외)
+
+        Raises:
+            ValueError: WAV/PCM 형식이 아닌 경우
+        """
+        if self._in_data:
+            return self._take(chunk)
+
+        buf = self._buf
+        buf += chunk
+        if not self._riff_checked:
+            if len(buf) < 12:
+                return b""
+            if bytes(buf[0:4]) not in (b"RIFF", b"RF64") or bytes(buf[8:12]) != b"WAVE":
+                raise ValueError("WAV 형식이 아닙니다.")
+            del buf[:12]
+            self._riff_checked = True
+
+        while len(buf) >= 8:
+            chunk_id = bytes(buf[:4])
+            size = struct.unpack("<I", buf[4:8])[0]
+            if chunk_id == b"data":
+                if self.format is None:
+                    raise ValueError("fmt 청크 없이 data 청크가 나왔습니다.")
+                # 스트리밍 응답은 크기를 0 또는 0xFFFFFFFF로 두기도 함
+                self._remaining = None if size in (0, 0xFFFFFFFF) else size
+                self._in_data = True
+                rest = bytes(buf[8:])
+                buf.clear()
+                return self._take(rest)
+            padded = size + (size & 1)
+            if len(buf) < 8 + padded:
+                return b""
+            if chunk_id == b"fmt ":
+                tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", buf[8:24])
+                if tag not in (1, 0xFFFE):
+                    raise ValueError(f"PCM WAV가 아닙니다 (format {tag})")
+                self.format = PcmFormat(rate, channels, bits // 8)
+            del buf[: 8 + padded]
+        return b""
+
+    def _take(self, data):
+        if self._remaining is None:
+            return data
+        data = data[: self._remaining]
+        self._remaining -= len(data)
+        return data
+
+
+class AudioOutput:
+    """지속 PCM 출력 스트림 (play()는 재생이 끝날 때까지 블록)"""
+
+    def __init__(self, backend=None, device=None):
+        backend = (backend or AUDIO_OUTPUT).lower()
+        if backend == "auto":
+            backend = "pyaudio" if HAS_PYAUDIO else "aplay"
+        if backend == "pyaudio" and not HAS_PYAUDIO:
+            logger.warning("pyaudio가 없어 aplay 출력을 사용합니다.")
+            backend = "aplay"
+        self.backend = backend
+        self.device = AUDIO_OUTPUT_DEVICE if device is None else device
+        self._format = None
+        self._pa = None
+        self._stream = None
+        self._proc = None
+        self._busy_until = 0.0  # aplay: 이미 써 둔 데이터의 예상 재생 종료 시각
+        self._lock = threading.Lock()
+
+    def _open(self, fmt):
+        """포맷에 맞는 출력 스트림 준비 (포맷이 같으면 기존 스트림 재사용)"""
+        if fmt == self._format and (self._stream is not None or self._alive()):
+            return
+        self._close_stream()
+        if self.backend == "pyaudio":
+            if self._pa is None:
+                self._pa = pyaudio.PyAudio()
+            self._stream = self._pa.open(
+                format=self._pa.get_format_from_width(fmt.sample_width),
+                channels=fmt.channels,
+                rate=fmt.rate,
+                output=True,
+            )
+        else:
+            cmd = [
+                "aplay",
+                "-q",
+                "-t",
+                "raw",
+                "-f",
+                _APLAY_FORMATS[fmt.sample_width],
+                "-r",
+                str(fmt.rate),
+                "-c",
+                str(fmt.channels),
+            ]
+            if self.device:
+                cmd += ["-D", self.device]
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+            self._busy_until = 0.0
+        self._format = fmt
+        logger.info(
+            f"오디오 출력 스트림 열기 ({self.backend}, {fmt.rate}Hz, "
+            f"{fmt.channels}ch, {fmt.sample_width * 8}bit)"
+        )
+
+    def _alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=2)
+            except Exception:
+                self._proc.kill()
+            self._proc = None
+        self._format = None
+
+    def write(self, pcm, fmt):
+        """
+        PCM 데이터 쓰기 (출력 버퍼에 들어가면 바로 반환)
+
+        Returns:
+            float: 쓴 데이터의 재생 시간 (초)
+        """
+        with self._lock:
+            self._open(fmt)
+            duration = pcm_duration(len(pcm), fmt)
+            if self._stream is not None:
+                self._stream.write(bytes(pcm))
+            else:
+                try:
+                    self._proc.stdin.write(pcm)
+                    self._proc.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    # aplay가 종료된 경우 한 번만 다시 실행
+                    self._close_stream()
+                    self._open(fmt)
+                    self._proc.stdin.write(pcm)
+                    self._proc.stdin.flush()
+                # 파이프는 재생 전에 반환되므로 재생 종료 시각을 따로 계산
+                now = time.monotonic()
+                self._busy_until = max(self._busy_until, now) + duration
+            return duration
+
+    def ahead(self):
+        """써 두었지만 아직 재생되지 않은 시간 (초, pyaudio는 write()가 블록하므로 0)"""
+        if self._stream is not None:
+            return 0.0
+        return max(0.0, self._busy_until - time.monotonic())
+
+    def wait(self):
+        """써 둔 데이터의 재생이 끝날 때까지 대기"""
+        remaining = self.ahead()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def play(self, pcm, fmt):
+        """PCM 데이터 재생 (끝날 때까지 블록)"""
+        self.write(pcm, fmt)
+        self.wait()
+
+    def close(self):
+        with self._lock:
+            self._close_stream()
+            if self._pa is not None:
+                self._pa.terminate()
+                self._pa = None
+
+
+_output = None
+_output_lock = threading.Lock()
+
+
+def get_output():
+    """프로세스 전체에서 공유하는 AudioOutput"""
+    global _output
+    with _output_lock:
+        if _output is None:
+            _output = AudioOutput()
+        return _output
@@ -8,11 +8,24 @@
 import json
 import logging
 import os
+import queue
 import subprocess
 import threading
 
 logger = logging.getLogger(__name__)
 
+# 오디오 매핑 부분 매칭용 (키가 발화에 포함되는지 한 번에 확인)
+try:
+    from utils.keyword_matcher import KeywordMatcher
+except ImportError:
+    from keyword_matcher import KeywordMatcher
+
+# 디코딩된 클립 캐시 (지속 출력 스트림으로 재생)
+try:
+    from utils.clip_cache import CLIP_CACHE, CLIP_CACHE_ENABLED
+except ImportError:
+    from clip_cache import CLIP_CACHE, CLIP_CACHE_ENABLED
+
 # AIY Projects play_wav import 시도
 try:
     from aiy.voice.audio import play_wav
@@ -22,6 +35,30 @@ except ImportError:
     HAS_AIY_AUDIO = False
 
 
+def _play_wav_file(path):
+    """
+    WAV 파일 재생 (끝날 때까지 블록)
+
+    클립 캐시를 먼저 사용하고, 디코딩/출력에 실패하면 play_wav 또는 aplay로 재생합니다.
+    """
+    if CLIP_CACHE_ENABLED:
+        try:
+            CLIP_CACHE.play(path)
+            return
+        except Exception as e:
+            logger.warning(f"클립 캐시 재생 실패, aplay로 재생합니다 ({path}): {e}")
+    # AIY Projects play_wav 또는 aplay 사용
+    if HAS_AIY_AUDIO:
+        play_wav(path)
+    else:
+        subprocess.run(["aplay", "-q", path], check=True)
+
+
+def _find_intro_file():
+    """intro.wav 전체 경로 찾기 (없으면 None)"""
+    return _find_audio_file_path("intro.wav")
+
+
 def play_intro_audio(tts=None, trigger_words=None, use_trigger_word=None):
     """intro.wav 파일 재생
 
@@ -30,27 +67,7 @@ def play_intro_audio(tts=None, trigger_words=None, use_trigger_word=None):
         trigger_words: 트리거 단어 리스트 (대체용)
         use_trigger_word: 트리거 단어 사용 여부 (대체용)
     """
-    # 현재 파일의 위치를 기준으로 경로 찾기
-    current_file = os.path.abspath(__file__)
-    utils_dir = os.path.dirname(current_file)
-    ai_voice_dir = os.path.dirname(utils_dir)
-
-    intro_paths = [
-        # utils/audio/intro.wav (현재 디렉토리 기준)
-        os.path.join(utils_dir, "audio", "intro.wav"),
-        # ai-voice 디렉토리 기준
-        os.path.join(ai_voice_dir, "utils", "audio", "intro.wav"),
-        # 절대 경로 (라즈베리파이 기본 경로)
-        "/home/pi/chytonpide/src/ai-voice/utils/audio/intro.wav",
-        os.path.expanduser("~/chytonpide/src/ai-voice/utils/audio/intro.wav"),
-    ]
-
-    intro_file = None
-    for path in intro_paths:
-        abs_path = os.path.abspath(os.path.expanduser(path))
-        if os.path.exists(abs_path):
-            intro_file = abs_path
-            break
+    intro_file = _find_intro_file()
 
     if not intro_file:
         logger.warning("intro.wav 파일을 찾을 수 없습니다. TTS로 대체합니다.")
@@ -83,11 +100,7 @@ def play_intro_audio(tts=None, trigger_words=None, use_trigger_word=None):
 
     try:
         logger.info(f"intro.wav 재생: {intro_file}")
-        # AIY Projects play_wav 또는 aplay 사용
-        if HAS_AIY_AUDIO:
-            play_wav(intro_file)
-        else:
-            subprocess.run(["aplay", "-q", intro_file], check=True)
+        _play_wav_file(intro_file)
         logger.debug("intro.wav 재생 완료")
     except Exception as e:
         logger.error(f"intro.wav 재생 오류: {e}", exc_info=True)
@@ -162,11 +175,7 @@ def play_audio_file(filename):
 
     try:
         logger.info(f"오디오 파일 재생: {audio_file}")
-        # AIY Projects play_wav 또는 aplay 사용
-        if HAS_AIY_AUDIO:
-            play_wav(audio_file)
-        else:
-            subprocess.run(["aplay", "-q", audio_file], check=True)
+        _play_wav_file(audio_file)
         logger.debug(f"오디오 파일 재생 완료: {filename}")
         return True
     except Exception as e:
@@ -206,12 +215,109 @@ def _find_audio_file_path(filename):
     return None
 
 
+def _normalize(text):
+    return text.lower().strip()
+
+
+def _ngrams(text, n=2):
+    """문자 n-gram 집합 (n보다 짧으면 텍스트 자체)"""
+    if len(text) < n:
+        return {text}
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class AudioMappingIndex(dict):
+    """
+    오디오 매핑 (사용자 발화 → (오디오 파일 전체 경로, 응답 텍스트)) + 조회용 인덱스
+
+    dict로도 그대로 쓸 수 있고, lookup()은 파일 시스템 접근 없이 인덱스만 사용합니다.
+    - 정확한 매칭: 정규화(소문자, 앞뒤 공백 제거)한 키 dict 조회
+    - 키가 발화에 포함: 모든 키로 만든 Aho–Corasick 오토마톤으로 발화를 한 번 훑기
+    - 발화가 키에 포함: 문자 2-gram 역색인으로 후보 키를 좁힌 뒤 확인
+      (한 글자 발화는 문자 1-gram 역색인 사용)
+    부분 매칭이 여러 개면 매핑 파일에 먼저 나온 키를 사용합니다 (기존 동작과 동일).
+    같은 발화가 여러 번 나오면 값은 마지막 항목, 순서는 처음 나온 위치를 따릅니다 (dict 대입과 동일).
+    """
+
+    def __init__(self, entries=()):
+        """
+        Args:
+            entries: (사용자 발화, (오디오 파일 전체 경로, 응답 텍스트)) 목록 또는 dict
+                     (경로는 load_audio_mapping에서 미리 확인한 것만 넣음)
+        """
+        super().__init__()
+        if isinstance(entries, dict):
+            entries = entries.items()
+        for key, value in entries:
+            key = _normalize(key)
+            if key:
+                self[key] = value
+        self._keys = list(self)
+        self._contained = KeywordMatcher(
+            {order: [key] for order, key in enumerate(self._keys)}
+        )
+        self._postings = {}
+        self._unigrams = {}
+        for order, key in enumerate(self._keys):
+            for gram in _ngrams(key):
+                self._postings.setdefault(gram, []).append(order)
+            for char in set(key):
+                self._unigrams.setdefault(char, []).append(order)
+
+    def _containing(self, text):
+        """text를 포함하는 키 순번 중 가장 앞선 것 (없으면 None)"""
+        if len(text) < 2:
+            # 2-gram이 없는 한 글자 발화: 그 글자가 들어 있는 키 중 가장 앞선 것
+            posting = self._unigrams.get(text)
+            return posting[0] if posting else None
+        candidates = None
+        for gram in _ngrams(text):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return None
+            candidates = (
+                set(posting) if candidates is None else candidates.intersection(posting)
+            )
+            if not candidates:
+                return None
+        for order in sorted(candidates):
+            if text in self._keys[order]:
+                return order
+        return None
+
+    def lookup(self, user_text):
+        """
+        사용자 발화에 매핑된 오디오 찾기
+
+        Returns:
+            tuple: (키, (오디오 파일 경로, 응답 텍스트)) 또는 None
+        """
+        text = _normalize(user_text or "")
+        if not text:
+            return None
+        value = self.get(text)
+        if value is not None:
+            return text, value
+
+        # 부분 매칭: 키 ⊂ 발화 또는 발화 ⊂ 키 중 매핑 순서가 가장 앞선 키
+        orders = list(self._contained.match(text))
+        containing = self._containing(text)
+        if containing is not None:
+            orders.append(containing)
+        if not orders:
+            return None
+        key = self._keys[min(orders)]
+        return key, self[key]
+
+
 def load_audio_mapping():
     """
     오디오 매핑 JSON 파일 로드 및 오디오 파일 경로 미리 찾기
 
+    경로를 찾은 항목만 인덱스에 넣으므로 조회할 때는 파일 시스템을 확인하지 않습니다.
+
     Returns:
-        dict: 사용자 발화 -> (오디오 파일 경로, 응답 텍스트) 매핑 딕셔너리
+        AudioMappingIndex: 사용자 발화 -> (오디오 파일 경로, 응답 텍스트) 매핑 (dict)
     """
     current_file = os.path.abspath(__file__)
     utils_dir = os.path.dirname(current_file)
@@ -233,52 +339,59 @@ def load_audio_mapping():
             try:
                 with open(abs_path, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    mappings = data.get("audio_mappings", [])
-                    # 사용자 발화 -> (오디오 파일 경로, 응답 텍스트) 매핑 생성
-                    result = {}
-                    for mapping in mappings:
-                        audio_file = mapping.get("audio_file")
-                        response_text = mapping.get("response_text", "")
-                        user_inputs = mapping.get("user_input", [])
-
-                        # 오디오 파일 경로 미리 찾기
-                        audio_file_path = (
+                mappings = data.get("audio_mappings", [])
+                # 사용자 발화 -> (오디오 파일 경로, 응답 텍스트) 목록 (매핑 파일 순서 유지)
+                entries = []
+                resolved = {}  # 같은 파일을 여러 번 찾지 않도록
+                for mapping in mappings:
+                    audio_file = mapping.get("audio_file")
+                    response_text = mapping.get("response_text", "")
+                    user_inputs = mapping.get("user_input", [])
+
+                    # 오디오 파일 경로 미리 찾기
+                    if audio_file not in resolved:
+                        resolved[audio_file] = (
                             _find_audio_file_path(audio_file) if audio_file else None
                         )
+                    audio_file_path = resolved[audio_file]
 
-                        if audio_file_path:
-                            # 경로를 찾은 경우
-                            for user_input in user_inputs:
-                                # 소문자로 정규화하여 저장
-                                result[user_input.lower().strip()] = (
-                                    audio_file_path,
-                                    response_text,
-                                )
-                            logger.debug(
-                                f"오디오 파일 경로 찾음: {audio_file} -> {audio_file_path}"
-                            )
-                        else:
-                            # 경로를 찾지 못한 경우
-                            logger.warning(
-                                f"오디오 파일을 찾을 수 없습니다: {audio_file}"
-                            )
-                            # 파일명만 저장 (나중에 찾을 수 있도록)
-                            for user_input in user_inputs:
-                                result[user_input.lower().strip()] = (
-                                    audio_file,  # 파일명만 저장
-                                    response_text,
-                                )
-
-                    logger.info(
-                        f"오디오 매핑 로드 완료: {len(result)}개 항목 (경로 포함)"
-                    )
-                    return result
+                    if not audio_file_path:
+                        # 경로를 찾지 못한 항목은 조회 대상에서 제외
+                        logger.warning(f"오디오 파일을 찾을 수 없습니다: {audio_file}")
+                        continue
+
+                    logger.debug(f"오디오 파일 경로 찾음: {audio_file} -> {audio_file_path}")
+                    for user_input in user_inputs:
+                        entries.append((user_input, (audio_file_path, response_text)))
+
+                result = AudioMappingIndex(entries)
+                logger.info(f"오디오 매핑 로드 완료: {len(result)}개 항목 (경로 포함)")
+                preload_audio_clips(result)
+                return result
             except Exception as e:
                 logger.warning(f"오디오 매핑 파일을 읽을 수 없습니다 ({abs_path}): {e}")
                 continue
 
     logger.warning("오디오 매핑 파일을 찾을 수 없습니다.")
-    return {}
+    return AudioMappingIndex()
+
+
+def preload_audio_clips(audio_mapping=None):
+    """
+    매핑된 오디오 파일과 intro.wav를 클립 캐시에 미리 디코딩 (첫 재생부터 디스크를 읽지 않음)
+
+    Args:
+        audio_mapping: load_audio_mapping() 결과 (없으면 intro.wav만)
+
+    Returns:
+        int: 캐시된 클립 수
+    """
+    if not CLIP_CACHE_ENABLED:
+        return 0
+    paths = [_find_intro_file()]
+    if audio_mapping:
+        paths.extend(path for path, _ in audio_mapping.values())
+    return CLIP_CACHE.preload(paths)
 
 
 def find_mapped_audio(user_text, audio_mapping):
@@ -287,7 +400,7 @@ def find_mapped_audio(user_text, audio_mapping):
 
     Args:
         user_text: 사용자 발화 텍스트
-        audio_mapping: 오디오 매핑 딕셔너리 (파일 경로 또는 파일명 포함)
+        audio_mapping: load_audio_mapping() 결과 (일반 dict면 인덱스를 새로 만듦)
 
     Returns:
         tuple: (오디오 파일 경로, 응답 텍스트) 또는 (None, None)
@@ -295,52 +408,16 @@ def find_mapped_audio(user_text, audio_mapping):
     if not user_text or not audio_mapping:
         return None, None
 
-    user_text_lower = user_text.lower().strip()
-
-    # 1. 정확한 매칭 시도
-    if user_text_lower in audio_mapping:
-        audio_path_or_file, response_text = audio_mapping[user_text_lower]
+    if not isinstance(audio_mapping, AudioMappingIndex):
+        audio_mapping = AudioMappingIndex(audio_mapping)
 
-        # 전체 경로인지 확인
-        if os.path.isabs(audio_path_or_file) and os.path.exists(audio_path_or_file):
-            logger.debug(
-                f"오디오 매핑 정확한 매칭: '{user_text}' -> {audio_path_or_file}"
-            )
-            return audio_path_or_file, response_text
-        else:
-            # 파일명만 있는 경우 경로 찾기 시도
-            audio_file_path = _find_audio_file_path(audio_path_or_file)
-            if audio_file_path:
-                logger.debug(
-                    f"오디오 매핑 정확한 매칭 (경로 찾음): '{user_text}' -> {audio_file_path}"
-                )
-                return audio_file_path, response_text
-
-        # 경로를 찾지 못한 경우
-        logger.warning(f"오디오 파일 경로를 찾을 수 없습니다: {audio_path_or_file}")
+    found = audio_mapping.lookup(user_text)
+    if found is None:
         return None, None
 
-    # 2. 부분 매칭 시도 (매핑의 키가 사용자 발화에 포함되거나, 사용자 발화가 키에 포함되는 경우)
-    for key, (audio_path_or_file, response_text) in audio_mapping.items():
-        key_lower = key.lower().strip()
-        # 매핑 키가 사용자 발화에 포함되거나, 사용자 발화가 매핑 키에 포함되는 경우
-        if key_lower in user_text_lower or user_text_lower in key_lower:
-            # 전체 경로인지 확인
-            if os.path.isabs(audio_path_or_file) and os.path.exists(audio_path_or_file):
-                logger.debug(
-                    f"오디오 매핑 부분 매칭: '{user_text}' -> {audio_path_or_file} (키: '{key}')"
-                )
-                return audio_path_or_file, response_text
-            else:
-                # 파일명만 있는 경우 경로 찾기 시도
-                audio_file_path = _find_audio_file_path(audio_path_or_file)
-                if audio_file_path:
-                    logger.debug(
-                        f"오디오 매핑 부분 매칭 (경로 찾음): '{user_text}' -> {audio_file_path} (키: '{key}')"
-                    )
-                    return audio_file_path, response_text
-
-    return None, None
+    key, (audio_file_path, response_text) = found
+    logger.debug(f"오디오 매핑: '{user_text}' -> {audio_file_path} (키: '{key}')")
+    return audio_file_path, response_text
 
 
 def play_audio_file_by_path(file_path):
@@ -359,11 +436,7 @@ def play_audio_file_by_path(file_path):
 
     try:
         logger.info(f"오디오 파일 재생: {file_path}")
-        # AIY Projects play_wav 또는 aplay 사용
-        if HAS_AIY_AUDIO:
-            play_wav(file_path)
-        else:
-            subprocess.run(["aplay", "-q", file_path], check=True)
+        _play_wav_file(file_path)
         logger.debug(f"오디오 파일 재생 완료: {file_path}")
         return True
     except Exception as e:
@@ -398,3 +471,56 @@ def play_audio_file_async(filename_or_path):
     thread.start()
     logger.info(f"오디오 파일 비동기 재생 시작: {filename_or_path}")
     return thread
+
+
+def play_pipelined(texts, synthesize, play, max_ahead=2):
+    """
+    문장 단위 TTS 파이프라인 재생
+    (현재 문장을 재생하는 동안 다음 문장을 미리 합성)
+
+    Args:
+        texts: 말할 문장 iterable (LLM 스트리밍 제너레이터 등)
+        synthesize: 문장 → 오디오 데이터 함수 (실패 시 None 반환)
+        play: 오디오 데이터 재생 함수 (재생이 끝날 때까지 블록)
+        max_ahead: 미리 합성해 둘 최대 문장 수
+
+    Returns:
+        list: 실제로 재생한 문장 목록
+    """
+    done = object()
+    ready = queue.Queue(maxsize=max_ahead)
+
+    def _producer():
+        try:
+            for text in texts:
+                text = text.strip()
+                if not text:
+                    continue
+                try:
+                    audio = synthesize(text)
+                except Exception as e:
+                    logger.error(f"문장 합성 오류 ({text}): {e}")
+                    continue
+                if audio is not None:
+                    ready.put((text, audio))
+        except Exception as e:
+            logger.error(f"문장 생성 오류: {e}", exc_info=True)
+        finally:
+            ready.put(done)
+
+    thread = threading.Thread(target=_producer, name="tts-pipeline", daemon=True)
+    thread.start()
+
+    spoken = []
+    while True:
+        item = ready.get()
+        if item is done:
+            break
+        text, audio = item
+        try:
+            play(audio)
+            spoken.append(text)
+        except Exception as e:
+            logger.error(f"문장 재생 오류 ({text}): {e}")
+    thread.join()
+    return spoken
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+오디오 매핑 조회 마이크로 벤치마크 (키 전체 선형 탐색 + 경로 확인 vs AudioMappingIndex)
+
+audio_mapping.json 항목에 가상의 발화를 더해 N개 키를 만들고,
+정확한 매칭 / 부분 매칭 / 매칭 없음 발화를 반복 조회해 조회당 소요 시간을 비교합니다.
+(가상 항목은 모두 같은 임시 wav 파일을 가리킴)
+
+사용법: python3 utils/bench_audio_mapping.py [--keys 5000] [--iterations 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 상위 디렉토리를 sys.path에 추가
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.audio_utils import AudioMappingIndex, _find_audio_file_path
+
+QUERIES = [
+    ("정확한 매칭", "가상 발화 1234번"),
+    ("부분 매칭", "오늘도 화이팅 하자"),
+    ("매칭 없음", "내일 날씨 알려줄래"),
+    ("한 글자", "팅"),
+]
+
+
+def legacy_find(user_text, audio_mapping):
+    """변경 전 find_mapped_audio (정확한 매칭 → 키 전체 선형 부분 매칭, 후보마다 경로 확인)"""
+    user_text_lower = user_text.lower().strip()
+    if user_text_lower in audio_mapping:
+        path, response_text = audio_mapping[user_text_lower]
+        if os.path.isabs(path) and os.path.exists(path):
+            return path, response_text
+        path = _find_audio_file_path(path)
+        return (path, response_text) if path else (None, None)
+    for key, (path, response_text) in audio_mapping.items():
+        key_lower = key.lower().strip()
+        if key_lower in user_text_lower or user_text_lower in key_lower:
+            if os.path.isabs(path) and os.path.exists(path):
+                return path, response_text
+            path = _find_audio_file_path(path)
+            if path:
+                return path, response_text
+    return None, None
+
+
+def check_semantics(wav_path):
+    """기존 dict 동작과 같은지 확인 (한 글자 발화, 중복 키는 마지막 값 + 처음 순서)"""
+    entries = [
+        ("안녕", (wav_path, "첫 번째")),
+        ("사랑해", (wav_path, "사랑")),
+        ("안녕", (wav_path, "마지막")),
+    ]
+    legacy = {}
+    for key, value in entries:
+        legacy[key] = value
+    index = AudioMappingIndex(entries)
+    assert index.lookup("안녕") == ("안녕", legacy["안녕"])
+    assert list(index) == list(legacy)
+    for text in ("안", "녕", "사", "해", "요", "안녕하세요", "녕사"):
+        found = index.lookup(text)
+        expected = legacy_find(text, legacy)
+        assert (found[1] if found else (None, None)) == expected, text
+
+
+def measure(find, text, iterations):
+    find(text)  # 워밍업
+    started = time.perf_counter()
+    for _ in range(iterations):
+        find(text)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오디오 매핑 조회 방식별 마이크로 벤치마크")
+    parser.add_argument("--keys", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".wav") as wav:
+        mapping = {}
+        for i in range(args.keys - 1):
+            mapping[f"가상 발화 {i}번"] = (wav.name, f"응답 {i}")
+        # 부분 매칭 대상은 맨 뒤 (선형 탐색의 최악의 경우)
+        mapping["화이팅"] = (wav.name, "하나 둘 셋, 화이팅!!")
+        check_semantics(wav.name)
+
+        started = time.perf_counter()
+        index = AudioMappingIndex(mapping)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        print("=" * 60)
+        print(f"키 {len(index)}개, 반복 {args.iterations}회, 인덱스 생성 {build_ms:.0f} ms")
+        print("-" * 60)
+        print(f"{'발화':<14}{'선형 µs':>12}{'인덱스 µs':>12}{'배율':>10}")
+        for label, text in QUERIES:
+            found = index.lookup(text)
+            assert legacy_find(text, mapping) == (found[1] if found else (None, None))
+            legacy = measure(lambda t: legacy_find(t, mapping), text, args.iterations)
+            indexed = measure(index.lookup, text, args.iterations)
+            print(f"{label:<14}{legacy:>12.1f}{indexed:>12.1f}{legacy / indexed:>9.0f}x")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
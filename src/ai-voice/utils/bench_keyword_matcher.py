@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+키워드 감지 마이크로 벤치마크 (목록별 any(k in text) 선형 검사 vs Aho–Corasick 한 번 훑기)
+
+한 대화 턴에서 하던 키워드 검사(종료/Sleep 명령, 서보, LED, 슬픈 톤, 대화 상황,
+응답 감정)를 변경 전 방식과 KeywordMatcher로 각각 반복 실행해 턴당 소요 시간을 비교합니다.
+참고용으로 전체 키워드를 하나의 정규식 alternation으로 묶은 방식도 함께 측정합니다.
+(정규식은 겹치는 키워드를 하나만 찾으므로 카테고리가 빠질 수 있음)
+
+사용법: python3 utils/bench_keyword_matcher.py [--iterations 20000]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# 상위 디렉토리를 sys.path에 추가
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+import constants
+from utils.keyword_matcher import DEFAULT_CATEGORIES, KEYWORDS, KeywordMatcher
+
+# (사용자 발화, LLM 응답) 샘플
+SAMPLES = [
+    ("치피야 오늘 온도랑 습도 어때?", "지금 23도에 습도 45%야. 딱 좋아서 기분 최고야!"),
+    ("불 켜줘", "알겠어! 불 켰어. 밝아서 좋다~"),
+    ("요즘 너무 힘들어", "요즘 많이 힘들구나.. 내가 옆에 있을게."),
+    ("물 줄게", "와 고마워! 목말랐는데 정말 시원하다."),
+    ("화분 흔들어줘", "우와~ 신난다! 빙글빙글 춤추는 중이야."),
+    ("좋은 아침 잘 잤어?", "좋은 아침! 어제 물 줘서 오늘 컨디션 최고야. 오늘도 힘내!"),
+    ("지금 상태 어때", "온도 22도, 습도 50%라서 아주 편안해."),
+    ("그만", "안녕히 가세요!"),
+]
+
+
+def legacy_turn(user_text, reply):
+    """변경 전: 검사마다 소문자 변환 + 목록별 선형 검사"""
+    result = {}
+    result["exit"] = any(cmd in user_text.lower() for cmd in constants.EXIT_COMMANDS)
+    result["sleep"] = any(cmd in user_text.lower() for cmd in constants.SLEEP_COMMANDS)
+    text_lower = user_text.lower()
+    result["servo"] = any(k in text_lower for k in constants.SERVO_KEYWORDS)
+    text_lower = user_text.lower()
+    if any(k in text_lower for k in constants.LED_ON_KEYWORDS):
+        result["led"] = "on"
+    elif any(k in text_lower for k in constants.LED_OFF_KEYWORDS):
+        result["led"] = "off"
+    result["sad_tone"] = any(k in user_text for k in constants.SAD_TONE_KEYWORDS)
+
+    # ChipiBrain 대화 상황 감지
+    last_user_msg = user_text.lower()
+    for name in (
+        "WATER",
+        "GREETING",
+        "WELLBEING",
+        "TIRED",
+        "TEMPERATURE",
+        "HUMIDITY",
+        "TEMP_HUMIDITY",
+        "STATUS",
+    ):
+        keywords = getattr(constants, name + "_KEYWORDS")
+        result[name] = any(k in last_user_msg for k in keywords)
+    result["crisis"] = any(k in last_user_msg for k in constants.SAD_TONE_KEYWORDS)
+
+    # 응답 감정 감지 (우선순위대로)
+    reply_lower = reply.lower()
+    result["emotion"] = constants.EMOTION_DEFAULT
+    for emotion in constants.EMOTION_CHECK_ORDER:
+        if any(k in reply_lower for k in constants.EMOTION_KEYWORDS.get(emotion, [])):
+            result["emotion"] = emotion
+            break
+    return result
+
+
+def matcher_turn(user_text, reply):
+    """변경 후: 발화와 응답을 각각 한 번씩만 훑음"""
+    hits = KEYWORDS.match(user_text)
+    emotion = KeywordMatcher.first(
+        KEYWORDS.match(reply), constants.EMOTION_CHECK_ORDER, constants.EMOTION_DEFAULT
+    )
+    return hits, emotion
+
+
+# 참고: 단일 정규식 alternation (긴 키워드 우선)
+_ALL_KEYWORDS = sorted(
+    {k.lower() for keywords in DEFAULT_CATEGORIES.values() for k in keywords},
+    key=len,
+    reverse=True,
+)
+_REGEX = re.compile("|".join(re.escape(k) for k in _ALL_KEYWORDS))
+
+
+def regex_turn(user_text, reply):
+    return _REGEX.findall(user_text.lower()), _REGEX.findall(reply.lower())
+
+
+def measure(turn, iterations):
+    for user_text, reply in SAMPLES:
+        turn(user_text, reply)  # 워밍업
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for user_text, reply in SAMPLES:
+            turn(user_text, reply)
+    return (time.perf_counter() - started) / (iterations * len(SAMPLES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키워드 감지 방식별 마이크로 벤치마크")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    KeywordMatcher(DEFAULT_CATEGORIES)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results = [
+        ("선형 검사", measure(legacy_turn, args.iterations)),
+        ("Aho–Corasick", measure(matcher_turn, args.iterations)),
+        ("정규식(참고)", measure(regex_turn, args.iterations)),
+    ]
+
+    print("=" * 60)
+    print(
+        f"키워드 {len(_ALL_KEYWORDS)}개, 샘플 {len(SAMPLES)}개, "
+        f"반복 {args.iterations}회, 오토마톤 생성 {build_ms:.1f} ms"
+    )
+    print("-" * 60)
+    print(f"{'방식':<16}{'턴당 µs':>12}{'배율':>10}")
+    baseline = results[0][1]
+    for label, us in results:
+        print(f"{label:<16}{us:>12.1f}{baseline / us:>9.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+TTS 재생 시작 지연 벤치마크 (임시 파일 + 플레이어 실행 vs 메모리 디코딩 + AudioEngine)
+
+TTS 응답(WAV 바이트)을 받은 시점부터 첫 샘플이 출력에 넘어가는 시점까지를 비교합니다.
+- 임시 파일: 임시 파일 쓰기 → 플레이어 프로세스 실행 → 파일을 다시 열어 헤더/첫 구간 읽기
+  (aplay가 없으면 /bin/true 실행 시간으로 프로세스 실행 비용을 대신 측정)
+- 메모리: WAV 바이트를 메모리에서 디코딩 → AudioEngine이 첫 구간을 출력에 쓰는 시점
+  (기본은 출력 장치 없이 쓰기 시점만 기록, --device면 실제 AudioOutput 사용)
+
+SD 카드 영향을 보려면 --dir로 SD 카드의 디렉토리를 지정하세요 (예전 tts/temp_*.wav 위치).
+
+사용법: python3 utils/bench_tts_playback.py [--seconds 3] [--iterations 30] [--dir tts] [--device]
+"""
+
+import argparse
+import io
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+
+# 상위 디렉토리를 sys.path에 추가
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.audio_engine import AudioEngine
+from utils.audio_output import get_output, pcm_duration
+
+RATE = 24000  # SuperTone / Azure riff-24khz-16bit-mono-pcm
+
+
+class FirstWriteOutput:
+    """첫 write() 시각을 기록하는 출력 (inner가 없으면 실제로 재생하지 않음)"""
+
+    def __init__(self, inner=None):
+        self.inner = inner
+        self.first_write = None
+        self.written = threading.Event()
+
+    def reset(self):
+        self.first_write = None
+        self.written.clear()
+
+    def ahead(self):
+        return self.inner.ahead() if self.inner else 0.0
+
+    def write(self, pcm, fmt):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+            self.written.set()
+        if self.inner:
+            return self.inner.write(pcm, fmt)
+        return pcm_duration(len(pcm), fmt)
+
+
+def make_wav(seconds):
+    """테스트용 WAV 바이트 (작은 톱니파)"""
+    frames = bytearray()
+    for i in range(int(RATE * seconds)):
+        frames += ((i % 200 - 100) * 50).to_bytes(2, "little", signed=True)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+def legacy_once(audio_data, directory, player):
+    """변경 전: 임시 파일 쓰기 → 플레이어 실행 → 파일 읽기 (초)"""
+    started = time.perf_counter()
+    with tempfile.NamedTemporaryFile(suffix=".wav", dir=directory, delete=False) as f:
+        f.write(audio_data)
+        path = f.name
+    try:
+        subprocess.run(player, check=False)
+        with wave.open(path, "rb") as w:
+            w.readframes(int(w.getframerate() * 0.04))
+        return time.perf_counter() - started
+    finally:
+        os.unlink(path)
+
+
+def engine_once(audio_data, engine, output):
+    """변경 후: 메모리 디코딩 → AudioEngine 첫 쓰기 (초)"""
+    output.reset()
+    started = time.perf_counter()
+    playback = engine.play_wav(audio_data)
+    output.written.wait()
+    elapsed = output.first_write - started
+    engine.stop()
+    playback.wait()
+    return elapsed
+
+
+def summarize(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return statistics.median(ms), ms[int(len(ms) * 0.9) - 1], ms[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS 재생 시작 지연 벤치마크")
+    parser.add_argument("--seconds", type=float, default=3.0, help="테스트 음성 길이 (초)")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--dir", default=None, help="임시 파일 디렉토리 (기본: 시스템 임시 폴더)")
+    parser.add_argument("--device", action="store_true", help="실제 오디오 출력 사용")
+    args = parser.parse_args()
+
+    audio_data = make_wav(args.seconds)
+    aplay = shutil.which("aplay")
+    # aplay는 파일을 주면 재생까지 해 버리므로 실행 비용만 재기 위해 --version 사용
+    player = [aplay, "--version"] if aplay else ["true"]
+
+    output = FirstWriteOutput(get_output() if args.device else None)
+    engine = AudioEngine(output=output)
+
+    legacy_once(audio_data, args.dir, player)  # 워밍업
+    engine_once(audio_data, engine, output)
+    legacy = [legacy_once(audio_data, args.dir, player) for _ in range(args.iterations)]
+    memory = [engine_once(audio_data, engine, output) for _ in range(args.iterations)]
+
+    print("=" * 60)
+    print(
+        f"WAV {len(audio_data) / 1024:.0f} KB ({args.seconds:.1f}초), 반복 {args.iterations}회, "
+        f"임시 폴더 {args.dir or tempfile.gettempdir()}"
+    )
+    print(f"플레이어 실행: {' '.join(player)}" + ("" if aplay else " (aplay 없음)"))
+    print("-" * 60)
+    print(f"{'방식':<18}{'중앙값 ms':>12}{'p90 ms':>10}{'최대 ms':>10}")
+    for label, samples in (("임시 파일 + 실행", legacy), ("메모리 + 엔진", memory)):
+        median, p90, worst = summarize(samples)
+        print(f"{label:<18}{median:>12.2f}{p90:>10.2f}{worst:>10.2f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
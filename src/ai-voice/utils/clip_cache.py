@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+디코딩된 오디오 클립 메모리 캐시
+
+audio_mapping.json의 WAV 파일과 intro.wav를 시작할 때 한 번만 읽어 PCM으로 디코딩해 두고,
+재생할 때는 디스크를 읽거나 프로세스를 띄우지 않고 공유 재생 엔진(AudioEngine)에 바로 넣습니다.
+메모리 사용량은 CLIP_CACHE_MAX_MB로 제한하며, 넘으면 가장 오래 재생하지 않은 클립부터 제거합니다 (LRU).
+
+사용 예:
+    from utils.clip_cache import CLIP_CACHE
+
+    CLIP_CACHE.preload(paths)
+    CLIP_CACHE.play(path)  # 캐시에 없으면 읽어서 넣은 뒤 재생
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    from utils.audio_engine import get_engine
+    from utils.audio_output import decode_wav, pcm_duration
+except ImportError:
+    from audio_engine import get_engine
+    from audio_output import decode_wav, pcm_duration
+
+logger = logging.getLogger(__name__)
+
+# 클립 캐시 사용 여부 (false면 예전처럼 재생할 때마다 aplay/play_wav)
+CLIP_CACHE_ENABLED = os.environ.get("CLIP_CACHE", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+# 캐시 최대 크기 (MB, 디코딩된 PCM 기준)
+CLIP_CACHE_MAX_MB = float(os.environ.get("CLIP_CACHE_MAX_MB", "32"))
+
+
+class ClipCache:
+    """경로 → 디코딩된 클립 LRU 캐시"""
+
+    def __init__(self, max_bytes=None, engine=None):
+        """
+        Args:
+            max_bytes: 최대 PCM 바이트 수 (기본값: CLIP_CACHE_MAX_MB)
+            engine: AudioEngine (기본값: 프로세스 공유 엔진)
+        """
+        if max_bytes is None:
+            max_bytes = int(CLIP_CACHE_MAX_MB * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._engine = engine
+        self._clips = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = get_engine()
+        return self._engine
+
+    def __len__(self):
+        return len(self._clips)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._clips
+
+    @property
+    def size(self):
+        """캐시된 PCM 바이트 수"""
+        return self._size
+
+    def get(self, path):
+        """
+        클립 가져오기 (없으면 디코딩해서 캐시에 추가)
+
+        Returns:
+            Clip or None: 캐시 한도보다 큰 파일도 반환은 하지만 캐시에는 넣지 않음
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is not None:
+                self._clips.move_to_end(key)
+                return clip
+
+        clip = decode_wav(key)
+        size = len(clip.pcm)
+        if size > self.max_bytes:
+            logger.warning(f"클립이 캐시 한도보다 커서 캐시하지 않습니다: {key}")
+            return clip
+
+        with self._lock:
+            if key not in self._clips:
+                self._clips[key] = clip
+                self._size += size
+                while self._size > self.max_bytes:
+                    _, evicted = self._clips.popitem(last=False)
+                    self._size -= len(evicted.pcm)
+        return clip
+
+    def preload(self, paths):
+        """
+        여러 파일을 미리 디코딩 (실패한 파일은 건너뜀)
+
+        Returns:
+            int: 캐시된 클립 수
+        """
+        for path in dict.fromkeys(p for p in paths if p):
+            try:
+                self.get(path)
+            except Exception as e:
+                logger.warning(f"오디오 클립 미리 읽기 실패 ({path}): {e}")
+        logger.info(
+            f"오디오 클립 캐시: {len(self._clips)}개, {self._size / 1024 / 1024:.1f} MB"
+        )
+        return len(self._clips)
+
+    def play(self, path):
+        """
+        메모리의 PCM으로 재생 (끝날 때까지 블록)
+
+        Returns:
+            float: 재생 시간 (초)
+        """
+        clip = self.get(path)
+        self.engine.play(clip.pcm, clip.format).wait()
+        return pcm_duration(len(clip.pcm), clip.format)
+
+    def clear(self):
+        with self._lock:
+            self._clips.clear()
+            self._size = 0
+
+
+# 프로세스 전체에서 공유
+CLIP_CACHE = ClipCache()
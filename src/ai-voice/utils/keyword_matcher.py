@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+키워드 다중 매칭 (Aho–Corasick)
+
+constants.py의 키워드 목록 전체(감정, 서보, LED, 슬픈 톤, 종료/Sleep 명령, 대화 상황)를
+import 시점에 하나의 오토마톤으로 만들어 두고, 발화를 한 번만 훑어서
+매칭된 카테고리를 모두 반환합니다.
+
+사용 예:
+    from utils.keyword_matcher import KEYWORDS
+
+    hits = KEYWORDS.match("불 켜줘 너무 더워")
+    "led_on" in hits          # True
+    hits["temperature"]       # ["더워"]
+"""
+
+from collections import deque
+
+try:
+    import constants
+except ImportError:
+    import os
+    import sys
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    import constants
+
+
+class KeywordMatcher:
+    """여러 카테고리의 키워드를 한 번에 찾는 Aho–Corasick 오토마톤 (대소문자 무시)"""
+
+    def __init__(self, categories=None):
+        """
+        Args:
+            categories: {카테고리 이름: 키워드 목록}
+        """
+        self._goto = [{}]  # 상태별 전이 (글자 → 다음 상태)
+        self._fail = [0]
+        self._out = [()]  # 상태별 매칭 결과 ((카테고리, 키워드), ...)
+        self._built = False
+        for category, keywords in (categories or {}).items():
+            for keyword in keywords:
+                self.add(category, keyword)
+        self.build()
+
+    def add(self, category, keyword):
+        """키워드 추가 (추가한 뒤에는 build()를 다시 호출해야 함)"""
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if (category, keyword) not in self._out[state]:
+            self._out[state] += ((category, keyword),)
+        self._built = False
+
+    def build(self):
+        """실패 링크 계산 (BFS), 실패 링크를 따라가며 매칭 결과를 미리 합쳐 둠"""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+        self._built = True
+
+    def match(self, text):
+        """
+        텍스트를 한 번 훑어서 매칭된 키워드를 카테고리별로 반환
+
+        Args:
+            text: 검사할 텍스트
+
+        Returns:
+            dict: {카테고리: [매칭된 키워드, ...]} (텍스트에 나온 순서, 중복 없음)
+        """
+        if not self._built:
+            self.build()
+        hits = {}
+        if not text:
+            return hits
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for category, keyword in out[state]:
+                found = hits.setdefault(category, [])
+                if keyword not in found:
+                    found.append(keyword)
+        return hits
+
+    def categories(self, text):
+        """매칭된 카테고리 집합"""
+        return set(self.match(text))
+
+    @staticmethod
+    def first(hits, order, default=None):
+        """
+        우선순위 목록에서 처음으로 매칭된 카테고리
+
+        Args:
+            hits: match() 결과
+            order: 카테고리 우선순위 (예: EMOTION_CHECK_ORDER)
+            default: 없을 때 반환값
+        """
+        for category in order:
+            if category in hits:
+                return category
+        return default
+
+
+# 카테고리 이름 → constants.py 키워드 목록
+DEFAULT_CATEGORIES = {
+    "exit": constants.EXIT_COMMANDS,
+    "sleep": constants.SLEEP_COMMANDS,
+    "servo": constants.SERVO_KEYWORDS,
+    "led_on": constants.LED_ON_KEYWORDS,
+    "led_off": constants.LED_OFF_KEYWORDS,
+    "sad_tone": constants.SAD_TONE_KEYWORDS,
+    "water": constants.WATER_KEYWORDS,
+    "greeting": constants.GREETING_KEYWORDS,
+    "wellbeing": constants.WELLBEING_KEYWORDS,
+    "tired": constants.TIRED_KEYWORDS,
+    "temperature": constants.TEMPERATURE_KEYWORDS,
+    "humidity": constants.HUMIDITY_KEYWORDS,
+    "temp_humidity": constants.TEMP_HUMIDITY_KEYWORDS,
+    "status": constants.STATUS_KEYWORDS,
+}
+# 감정은 감정 상수("HAPPY" 등)를 카테고리 이름으로 사용
+DEFAULT_CATEGORIES.update(constants.EMOTION_KEYWORDS)
+
+# import 시점에 한 번만 생성
+KEYWORDS = KeywordMatcher(DEFAULT_CATEGORIES)
+
+
+def detect_emotion(text):
+    """EMOTION_CHECK_ORDER 우선순위로 감정 감지 (없으면 EMOTION_DEFAULT)"""
+    return KeywordMatcher.first(
+        KEYWORDS.match(text), constants.EMOTION_CHECK_ORDER, constants.EMOTION_DEFAULT
+    )
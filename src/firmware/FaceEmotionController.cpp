@@ -47,9 +47,16 @@ void FaceEmotionController::fetchAndApplyEmotion() {
   String url = String(serverBaseUrl) + emotionEndpoint + "/" + encodedDeviceId + "/lcd";
 
   http.begin(url);
+  const char* headerKeys[] = {"ETag"};
+  http.collectHeaders(headerKeys, 1);
+  if (lastEtag.length() > 0) {
+    http.addHeader("If-None-Match", lastEtag);
+  }
   int httpCode = http.GET();
 
+  // 304: 표정 변경 없음 (본문 없음)
   if (httpCode == HTTP_CODE_OK) {
+    lastEtag = http.header("ETag");
     String response = http.getString();
     String emotion = parseEmotionFromJson(response);
     
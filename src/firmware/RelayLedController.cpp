@@ -68,9 +68,16 @@ void RelayLedController::fetchAndApplyLedState() {
   String url = String(serverBaseUrl) + ledStateEndpoint + "/" + encodedDeviceId + "/led";
 
   http.begin(url);
+  const char* headerKeys[] = {"ETag"};
+  http.collectHeaders(headerKeys, 1);
+  if (lastEtag.length() > 0) {
+    http.addHeader("If-None-Match", lastEtag);
+  }
   int httpCode = http.GET();
 
+  // 304: 상태 변경 없음 (본문 없음)
   if (httpCode == HTTP_CODE_OK) {
+    lastEtag = http.header("ETag");
     String response = http.getString();
     int parsedState = parseLedStateFromJson(response);
     if (parsedState != -1) {
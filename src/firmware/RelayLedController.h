@@ -38,6 +38,9 @@ class RelayLedController {
   unsigned long lastCheckTime;
   unsigned long checkIntervalMs;
 
+  // 마지막 응답의 ETag (If-None-Match로 전달, 304면 변경 없음)
+  String lastEtag;
+
   String urlEncode(const String& raw) const;
   void ensurePinsInitialized();
   void fetchAndApplyLedState();
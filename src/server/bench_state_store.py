@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+상태 저장소 처리량 벤치마크 (워커 프로세스 수별)
+
+uvicorn 워커처럼 N개의 프로세스가 같은 저장소를 열고
+조회(GET /devices/{serial}/state)와 변경(PATCH)을 섞어서 수행한 처리량을 측정합니다.
+memory 저장소는 프로세스마다 따로 존재하므로(공유 안 됨) 비교 기준으로만 사용합니다.
+
+사용법: python bench_state_store.py [--stores memory,sqlite,shm] [--workers 1,2,4,8]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from state_store import (
+    HAS_SHARED_MEMORY,
+    MemoryStateStore,
+    SharedMemoryStateStore,
+    SQLiteStateStore,
+)
+
+
+def make_store(kind, db_path, shm_name):
+    if kind == "sqlite":
+        return SQLiteStateStore(db_path)
+    if kind == "shm":
+        return SharedMemoryStateStore(shm_name, slots=4096)
+    return MemoryStateStore()
+
+
+def worker(kind, db_path, shm_name, devices, write_ratio, duration, barrier, results):
+    store = make_store(kind, db_path, shm_name)
+    store.open()
+    serials = [f"BENCH-{i:05d}" for i in range(devices)]
+    rng = random.Random(os.getpid())
+    ops = 0
+    barrier.wait()
+    end_at = time.perf_counter() + duration
+    while time.perf_counter() < end_at:
+        # 100회 단위로 시간 확인 (perf_counter 호출 비용 제외)
+        for _ in range(100):
+            serial = rng.choice(serials)
+            if rng.random() < write_ratio:
+                store.update(serial, is_led_on=rng.random() < 0.5)
+            else:
+                store.get(serial)
+        ops += 100
+    store.close()
+    results.put(ops)
+
+
+def run(kind, workers, args, db_path, shm_name):
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(
+            target=worker,
+            args=(
+                kind,
+                db_path,
+                shm_name,
+                args.devices,
+                args.write_ratio,
+                args.duration,
+                barrier,
+                results,
+            ),
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    total = sum(results.get() for _ in procs)
+    for proc in procs:
+        proc.join()
+    return total / args.duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상태 저장소 처리량 벤치마크")
+    parser.add_argument("--stores", default="memory,sqlite,shm")
+    parser.add_argument("--workers", default="1,2,4,8", help="워커 프로세스 수 목록")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="변경 비율 (0~1)")
+    parser.add_argument("--duration", type=float, default=3.0, help="측정 시간 (초)")
+    args = parser.parse_args()
+
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    stores = [s.strip() for s in args.stores.split(",")]
+    if "shm" in stores and not HAS_SHARED_MEMORY:
+        print("⚠️ 이 환경에서는 shm 저장소를 사용할 수 없어 제외합니다.")
+        stores.remove("shm")
+
+    print("=" * 60)
+    print(
+        f"디바이스: {args.devices}대, 변경 비율: {args.write_ratio:.0%}, "
+        f"측정: {args.duration:.0f}초, CPU: {os.cpu_count()}개"
+    )
+    print("-" * 60)
+    print(f"{'store':<8}" + "".join(f"{n:>10} w" for n in worker_counts))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in stores:
+            db_path = os.path.join(tmp, f"{kind}.db")
+            shm_name = f"chytonpide_bench_{os.getpid()}"
+            if kind != "memory":
+                # 테이블/세그먼트를 미리 만들어 워커 간 생성 경쟁을 피함
+                store = make_store(kind, db_path, shm_name)
+                store.open()
+                store.close()
+            row = []
+            for workers in worker_counts:
+                row.append(run(kind, workers, args, db_path, shm_name))
+            if kind == "shm":
+                make_store(kind, db_path, shm_name).destroy()
+            label = kind if kind != "memory" else "memory*"
+            print(f"{label:<8}" + "".join(f"{ops:>10,.0f}/s" for ops in row))
+
+    print("-" * 60)
+    print("* memory는 워커 간 상태를 공유하지 않음 (단일 워커 전용, 비교 기준)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+디바이스 상태 변경 알림 (long-poll 지원)
+
+update_device가 상태 저장소(state_store)에 기록하면 저장소가 serial의 버전을 올리고,
+notify()가 GET /devices/{serial}/wait 로 대기 중인 요청을 즉시 깨웁니다.
+펌웨어는 1~2초마다 폴링하는 대신, 변경이 있을 때만 응답을 받습니다.
+
+상태 저장소(state_store)를 여러 워커가 공유하는 경우, 다른 워커에서 일어난 변경은
+이벤트로 전달되지 않으므로 프로세스당 하나의 폴링 태스크가 poll_interval마다
+대기 중인 serial의 버전을 한 번에 확인해 대기자를 깨웁니다.
+저장소 읽기는 이벤트 루프를 막지 않도록 스레드풀에서 실행합니다.
+"""
+
+import asyncio
+
+
+class DeviceStateNotifier:
+    """serial별 상태 버전 관리 및 변경 대기자(long-poll) 알림"""
+
+    def __init__(self, store, poll_interval=0.5):
+        """
+        Args:
+            store: 버전을 읽어 올 상태 저장소 (state_store.create_state_store())
+            poll_interval: 공유 저장소일 때 다른 워커의 변경을 확인하는 주기 (초)
+        """
+        self._store = store
+        self._cross_process = bool(store.shared)
+        self.poll_interval = poll_interval
+        # 대기 중인 serial → asyncio.Event (깨우면 제거되고 다음 대기자가 새로 만듦)
+        self._events = {}
+        # serial별 대기 중인 요청 수
+        self._waiters = {}
+        # 폴링 태스크가 마지막으로 확인한 serial별 버전
+        self._polled = {}
+        self._poller = None
+        # 대기자가 사용하는 이벤트 루프 (다른 스레드의 notify()에서 사용)
+        self._loop = None
+
+    def version(self, serial):
+        """현재 버전 (한 번도 변경되지 않았으면 0)"""
+        return self._store.version(serial)
+
+    async def _read_version(self, serial):
+        """이벤트 루프를 막지 않고 버전 읽기 (공유 저장소는 스레드풀에서 읽음)"""
+        if not self._cross_process:
+            return self.version(serial)
+        return await asyncio.get_running_loop().run_in_executor(None, self.version, serial)
+
+    def notify(self, serial):
+        """
+        serial을 기다리는 요청을 깨움 (버전은 저장소에서 이미 증가된 상태)
+
+        스레드풀에서 실행되는 요청 처리 함수에서도 호출할 수 있습니다.
+        """
+        loop = self._loop
+        if loop is None:
+            return  # 대기한 요청이 아직 없음
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake(serial)
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake, serial)
+        except RuntimeError:
+            pass  # 서버 종료로 루프가 닫힘
+
+    def _wake(self, serial):
+        event = self._events.pop(serial, None)
+        if event is not None:
+            # 깨어난 대기자들은 버전을 다시 확인함
+            event.set()
+
+    def waiter_count(self):
+        """대기 중인 요청 수 (모니터링용)"""
+        return sum(self._waiters.values())
+
+    def _start_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll())
+
+    def _read_versions(self, serials):
+        return {serial: self.version(serial) for serial in serials}
+
+    async def _poll(self):
+        """다른 워커의 변경 확인 (대기 중인 serial이 있는 동안만 실행)"""
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            await asyncio.sleep(self.poll_interval)
+            serials = list(self._waiters)
+            if not serials:
+                break
+            versions = await loop.run_in_executor(None, self._read_versions, serials)
+            for serial, version in versions.items():
+                if serial not in self._waiters:
+                    continue
+                if self._polled.get(serial) != version:
+                    self._polled[serial] = version
+                    self._wake(serial)
+
+    async def wait_for_change(self, serial, since_version, timeout):
+        """
+        serial의 버전이 since_version과 달라질 때까지 대기
+
+        Args:
+            serial: 디바이스 시리얼
+            since_version: 클라이언트가 마지막으로 받은 버전
+            timeout: 최대 대기 시간 (초)
+
+        Returns:
+            int: 현재 버전 (타임아웃이면 since_version과 같을 수 있음)
+        """
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        deadline = loop.time() + timeout
+        self._waiters[serial] = self._waiters.get(serial, 0) + 1
+        try:
+            while True:
+                # 버전을 읽는 동안 온 알림을 놓치지 않도록 이벤트를 먼저 준비
+                event = self._events.get(serial)
+                if event is None:
+                    event = asyncio.Event()
+                    self._events[serial] = event
+                # 버전이 다르면(새 변경 또는 서버 재시작) 바로 반환
+                current = await self._read_version(serial)
+                if current != since_version:
+                    return current
+                wait = deadline - loop.time()
+                if wait <= 0:
+                    return current
+                if self._cross_process:
+                    self._polled.setdefault(serial, current)
+                    self._start_poller()
+                try:
+                    await asyncio.wait_for(event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            remaining = self._waiters[serial] - 1
+            if remaining > 0:
+                self._waiters[serial] = remaining
+            else:
+                # 마지막 대기자가 끝나면 정리 (메모리 누수 방지)
+                del self._waiters[serial]
+                self._events.pop(serial, None)
+                self._polled.pop(serial, None)
@@ -1,17 +1,53 @@
-from datetime import datetime
-from typing import Optional
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
 
 import uvicorn
-from fastapi import FastAPI, Form, Path
+from fastapi import FastAPI, Form, HTTPException, Path, Query, Request, Response
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-app = FastAPI(title="Citonphyde Sensor Server", version="1.0.0")
+from device_events import DeviceStateNotifier
+from sensor_ingest import ROLLUP_RESOLUTIONS, create_ingest_queue
+from state_store import MAX_FACE_BYTES, MAX_SERIAL_BYTES, create_state_store
+from structured_logging import get_logger, logging_stats, setup_logging, shutdown_logging
 
-# LED 상태 저장 (serial별로 관리)
-led_states = {}
+logger = get_logger("server")
 
-# Face Emotion 상태 저장 (serial별로 관리)
-face_emotion_states = {}
+# 센서 데이터 수집 큐 (요청은 enqueue만 하고, 저장은 백그라운드에서 일괄 처리)
+sensor_queue = create_ingest_queue()
+
+# LED / Face Emotion 상태 저장소 (STATE_STORE: memory, sqlite, shm)
+state_store = create_state_store()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    state_store.open()
+    sensor_queue.start()
+    try:
+        yield
+    finally:
+        # 종료 시 남은 센서 데이터 flush
+        sensor_queue.stop()
+        state_store.close()
+        # 큐에 남은 로그 출력
+        shutdown_logging()
+
+
+app = FastAPI(title="Citonphyde Sensor Server", version="1.0.0", lifespan=lifespan)
+
+# long-poll 대기자 관리 (버전은 상태 저장소에서 읽음)
+device_notifier = DeviceStateNotifier(state_store)
+
+# long-poll 최대 대기 시간 (초)
+LONG_POLL_MAX_TIMEOUT = 60.0
+
+# 상태가 설정되지 않은 디바이스의 updated_at (매 요청마다 바뀌지 않도록 고정)
+SERVER_STARTED_AT = datetime.now().isoformat()
 
 
 @app.get("/")
@@ -22,8 +58,13 @@ async def root():
         "endpoints": {
             "POST /sensor_data": "Send sensor data (temperature, humidity, serial, illuminance)",
             "GET /health": "Health check",
+            "GET /sensor_data/:serial/latest": "Get latest sensor reading",
+            "GET /sensor_data/:serial/rollups": "Get sensor aggregates (1m, 1h, 1d)",
             "GET /devices/:serial/led": "Get LED state",
             "GET /devices/:serial/lcd": "Get LCD face emotion state",
+            "GET /devices/:serial/state": "Get LED + LCD state and version",
+            "GET /devices/:serial/wait": "Long-poll until LED/LCD state changes",
+            "PATCH /devices": "Update multiple devices (JSON list)",
             "PATCH /devices/:serial": "Update device (is_led_on, led_face)",
         },
     }
@@ -31,7 +72,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "sensor_ingest": sensor_queue.snapshot_stats(),
+        "state_store": state_store.name,
+        "logging": logging_stats(),
+    }
 
 
 @app.post("/sensor_data")
@@ -52,18 +99,25 @@ async def receive_sensor_data(
 
     Request Body (application/x-www-form-urlencoded):
     serial=ESP32-S3-001&temperature=25.5&humidity=60.0&illuminance=0
+
+    측정값은 수집 큐에 넣은 뒤 바로 응답하며, DB 기록은 백그라운드에서 일괄 처리됩니다.
     """
-    timestamp = datetime.now().isoformat()
+    received_at = datetime.now()
+    timestamp = received_at.isoformat()
 
-    # 로그 출력
-    print("=" * 50)
-    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 센서 데이터 수신")
-    print(f"  Serial/Device ID: {serial}")
-    print(f"  온도: {temperature:.2f} °C")
-    print(f"  습도: {humidity:.2f} %")
-    print(f"  조도: {illuminance}")
-    print(f"  Timestamp: {timestamp}")
-    print("=" * 50)
+    # 수집 큐에 추가 (블로킹 I/O 없음)
+    sensor_queue.enqueue(serial, temperature, humidity, illuminance, received_at)
+
+    # 로그 출력 (큐에 넣기만 하고 출력은 별도 스레드에서 처리)
+    logger.info(
+        "센서 데이터 수신",
+        extra={
+            "serial": serial,
+            "temperature": temperature,
+            "humidity": humidity,
+            "illuminance": illuminance,
+        },
+    )
 
     # 응답 반환
     return {
@@ -79,52 +133,349 @@ async def receive_sensor_data(
     }
 
 
+@app.get("/sensor_data/{serial}/latest")
+def get_latest_sensor_data(serial: str = Path(..., description="Device serial ID")):
+    """
+    serial의 최신 센서 측정값을 조회하는 엔드포인트
+
+    Path Parameters:
+    - serial: 디바이스 시리얼 ID
+
+    수집 큐가 enqueue 시 갱신하는 메모리 인덱스에서 응답하므로 DB를 거치지 않습니다.
+    (인덱스에 없을 때만 저장소를 조회하므로 async가 아닌 일반 함수로 정의)
+    """
+    reading = sensor_queue.latest(serial)
+    if reading is None:
+        raise HTTPException(status_code=404, detail="센서 데이터가 없습니다.")
+    return reading
+
+
+@app.get("/sensor_data/{serial}/rollups")
+def get_sensor_rollups(
+    serial: str = Path(..., description="Device serial ID"),
+    resolution: str = Query("1h", description="집계 단위 (1m, 1h, 1d)"),
+    limit: int = Query(24, ge=1, le=1000, description="조회할 구간 수"),
+):
+    """
+    센서 데이터 집계(rollup)를 조회하는 엔드포인트 (대시보드용)
+
+    Path Parameters:
+    - serial: 디바이스 시리얼 ID
+
+    Query Parameters:
+    - resolution: 집계 단위 ("1m", "1h", "1d")
+    - limit: 최신 구간부터 조회할 개수
+
+    원본 행을 훑지 않고 수집 시 미리 계산한 구간별 min/max/sum/count를 읽습니다.
+    (DB 조회가 블로킹이므로 async가 아닌 일반 함수로 정의해 스레드풀에서 실행)
+    """
+    resolutions = [name for name, _ in ROLLUP_RESOLUTIONS]
+    if resolution not in resolutions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"resolution은 {', '.join(resolutions)} 중 하나여야 합니다.",
+        )
+    return {
+        "serial": serial,
+        "resolution": resolution,
+        "rollups": sensor_queue.storage.read_rollups(serial, resolution, limit),
+    }
+
+
+def _http_date(iso_timestamp):
+    """ISO 8601 타임스탬프 → HTTP-date (Last-Modified 헤더용)"""
+    return format_datetime(
+        datetime.fromisoformat(iso_timestamp).astimezone(timezone.utc), usegmt=True
+    )
+
+
+def _is_not_modified(request, etag, updated_at):
+    """
+    조건부 GET 판단 (If-None-Match 우선, 없으면 If-Modified-Since)
+
+    Returns:
+        bool: 클라이언트 캐시가 최신이면 True (304 응답)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # weak 비교 (W/ 접두사 무시)
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == etag:
+                return True
+        return False
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = datetime.fromisoformat(updated_at).astimezone(timezone.utc)
+        # HTTP-date는 초 단위라서 Last-Modified와 같은 초 안에 다시 바뀌어도 값이 같음
+        # → 초 미만이 있으면 그 초가 since보다 확실히 이전일 때만 304
+        #   (변경 여부를 정확히 알려면 If-None-Match 사용)
+        if modified.microsecond:
+            return modified.replace(microsecond=0) < since
+        return modified <= since
+    return False
+
+
+def _conditional_response(request, response, version, body):
+    """
+    상태 버전으로 ETag/Last-Modified를 붙이고, 변경이 없으면 304 반환
+
+    Args:
+        version: 상태 저장소의 버전 (ETag)
+        body: updated_at을 포함한 응답 본문 (dict)
+    """
+    etag = f'"{version}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": _http_date(body["updated_at"]),
+        "Cache-Control": "no-cache",
+    }
+    if _is_not_modified(request, etag, body["updated_at"]):
+        # 본문/JSON 인코딩 없이 응답
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    body["version"] = version
+    return body
+
+
+def _utf8_length(value):
+    return len(value.encode("utf-8"))
+
+
+def _check_serial(serial):
+    """저장소에 담을 수 없는 길이의 serial은 없는 디바이스로 처리 (404)"""
+    if _utf8_length(serial) > MAX_SERIAL_BYTES:
+        raise HTTPException(status_code=404, detail="디바이스를 찾을 수 없습니다.")
+
+
+def _read_state(serial):
+    """
+    저장소에서 serial의 상태를 읽고, 설정되지 않은 값은 기본값으로 채움
+
+    updated_at 기본값은 서버 시작 시각으로 고정해 캐시 가능하게 함
+    """
+    _check_serial(serial)
+    record = state_store.get(serial) or {}
+    return {
+        "is_led_on": bool(record.get("is_led_on")),  # 기본값: 꺼짐
+        "led_updated_at": record.get("led_updated_at") or SERVER_STARTED_AT,
+        "face": record.get("face") or "NEUTRAL",  # 기본값
+        "face_updated_at": record.get("face_updated_at") or SERVER_STARTED_AT,
+        "version": record.get("version", 0),
+    }
+
+
 @app.get("/devices/{serial}/led")
-async def get_led_state(serial: str = Path(..., description="Device serial ID")):
+def get_led_state(
+    request: Request,
+    response: Response,
+    serial: str = Path(..., description="Device serial ID"),
+):
     """
     LED 상태를 조회하는 엔드포인트
 
     Path Parameters:
     - serial: 디바이스 시리얼 ID (예: "xJN2wsF850yqWQfBUkGP")
-    """
-    # LED 상태가 설정되지 않았으면 기본값(off) 반환
-    if serial not in led_states:
-        return {
-            "is_led_on": False,  # 기본값: 꺼짐
-            "updated_at": datetime.now().isoformat(),
-        }
 
-    state = led_states[serial]
-    return {
+    If-None-Match(ETag) 또는 If-Modified-Since 헤더가 최신이면 304를 반환합니다.
+    (저장소 조회가 블로킹이므로 async가 아닌 일반 함수로 정의해 스레드풀에서 실행)
+    """
+    state = _read_state(serial)
+    body = {
         "is_led_on": state["is_led_on"],
-        "updated_at": state["updated_at"],
+        "updated_at": state["led_updated_at"],
     }
+    return _conditional_response(request, response, state["version"], body)
 
 
 @app.get("/devices/{serial}/lcd")
-async def get_lcd_state(serial: str = Path(..., description="Device serial ID")):
+def get_lcd_state(
+    request: Request,
+    response: Response,
+    serial: str = Path(..., description="Device serial ID"),
+):
     """
     LCD Face Emotion 상태를 조회하는 엔드포인트
 
     Path Parameters:
     - serial: 디바이스 시리얼 ID (예: "xJN2wsF850yqWQfBUkGP")
+
+    If-None-Match(ETag) 또는 If-Modified-Since 헤더가 최신이면 304를 반환합니다.
+    (저장소 조회가 블로킹이므로 async가 아닌 일반 함수로 정의해 스레드풀에서 실행)
     """
-    # Face Emotion 상태가 설정되지 않았으면 기본값("NEUTRAL") 반환
-    if serial not in face_emotion_states:
-        return {
-            "face": "NEUTRAL",  # 기본값
-            "updated_at": datetime.now().isoformat(),
-        }
+    state = _read_state(serial)
+    body = {
+        "face": state["face"],
+        "updated_at": state["face_updated_at"],
+    }
+    return _conditional_response(request, response, state["version"], body)
+
 
-    state = face_emotion_states[serial]
+def _device_state(serial):
+    """serial의 LED + Face Emotion 상태와 버전"""
+    state = _read_state(serial)
     return {
+        "is_led_on": state["is_led_on"],
         "face": state["face"],
-        "updated_at": state["updated_at"],
+        "version": state["version"],
+        # 둘 중 더 최근에 바뀐 시각 (ISO 8601 문자열은 사전순 비교 가능)
+        "updated_at": max(state["led_updated_at"], state["face_updated_at"]),
+    }
+
+
+@app.get("/devices/{serial}/state")
+def get_device_state(
+    request: Request,
+    response: Response,
+    serial: str = Path(..., description="Device serial ID"),
+):
+    """
+    LED + Face Emotion 상태를 한 번에 조회하는 엔드포인트
+
+    Path Parameters:
+    - serial: 디바이스 시리얼 ID (예: "xJN2wsF850yqWQfBUkGP")
+
+    /led, /lcd 두 번의 요청 대신 사용할 수 있으며, 조건부 GET(304)을 지원합니다.
+    (저장소 조회가 블로킹이므로 async가 아닌 일반 함수로 정의해 스레드풀에서 실행)
+    """
+    body = _device_state(serial)
+    return _conditional_response(request, response, body["version"], body)
+
+
+@app.get("/devices/{serial}/wait")
+async def wait_device_state(
+    response: Response,
+    serial: str = Path(..., description="Device serial ID"),
+    version: int = Query(0, description="클라이언트가 마지막으로 받은 버전"),
+    timeout: float = Query(30.0, ge=0, description="최대 대기 시간 (초)"),
+):
+    """
+    디바이스 상태가 바뀔 때까지 대기하는 long-poll 엔드포인트
+
+    Path Parameters:
+    - serial: 디바이스 시리얼 ID (예: "xJN2wsF850yqWQfBUkGP")
+
+    Query Parameters:
+    - version: 마지막으로 받은 버전 (처음에는 0)
+    - timeout: 최대 대기 시간 (초, 최대 60)
+
+    버전이 바뀌면 즉시 상태를 반환하고, timeout 동안 변경이 없으면 304를 반환합니다.
+    (대기는 이벤트 루프에서, 저장소 조회는 스레드풀에서 실행)
+    """
+    _check_serial(serial)
+    current = await device_notifier.wait_for_change(
+        serial, version, min(timeout, LONG_POLL_MAX_TIMEOUT)
+    )
+    if current == version:
+        return Response(status_code=304, headers={"ETag": f'"{current}"'})
+
+    body = await run_in_threadpool(_device_state, serial)
+    response.headers["ETag"] = f'"{body["version"]}"'
+    return body
+
+
+class DeviceUpdate(BaseModel):
+    """PATCH /devices 요청의 디바이스별 변경 내용"""
+
+    serial: str
+    is_led_on: Optional[bool] = None
+    led_face: Optional[str] = None
+
+
+def _describe_update(is_led_on, led_face):
+    """변경된 필드 설명 (예: ["LED: ON", "Face: HAPPY"])"""
+    updated_fields = []
+    if is_led_on is not None:
+        updated_fields.append(f"LED: {'ON' if is_led_on else 'OFF'}")
+    if led_face is not None:
+        updated_fields.append(f"Face: {led_face}")
+    return updated_fields
+
+
+def _apply_device_updates(updates):
+    """
+    디바이스 상태를 저장소에 기록하고 long-poll 대기자를 깨움 (변경이 있는 것만)
+
+    Args:
+        updates: (serial, is_led_on, led_face) 튜플 리스트
+                 (is_led_on / led_face가 None이면 해당 값은 변경하지 않음)
+
+    Returns:
+        list: 디바이스별 변경된 필드 설명 (updates와 같은 순서)
+
+    Raises:
+        HTTPException: serial / led_face가 저장소 한도보다 길면 422 (아무것도 기록하지 않음)
+    """
+    for serial, _, led_face in updates:
+        if _utf8_length(serial) > MAX_SERIAL_BYTES:
+            raise HTTPException(
+                status_code=422,
+                detail=f"serial은 최대 {MAX_SERIAL_BYTES}바이트입니다: {serial}",
+            )
+        if led_face is not None and _utf8_length(led_face) > MAX_FACE_BYTES:
+            raise HTTPException(
+                status_code=422,
+                detail=f"led_face는 최대 {MAX_FACE_BYTES}바이트입니다: {led_face}",
+            )
+    results = [_describe_update(is_led_on, led_face) for _, is_led_on, led_face in updates]
+    changed = [update for update, fields in zip(updates, results) if fields]
+    if changed:
+        # 한 번의 잠금/트랜잭션으로 기록
+        state_store.update_many(changed)
+        # 스레드풀에서 호출되므로 notify()가 이벤트 루프로 넘겨서 깨움
+        for serial, _, _ in changed:
+            device_notifier.notify(serial)
+    return results
+
+
+@app.patch("/devices")
+def update_devices(updates: List[DeviceUpdate]):
+    """
+    여러 디바이스 상태를 한 번에 업데이트하는 엔드포인트
+
+    Request Body (application/json):
+    [
+        {"serial": "xJN2wsF850yqWQfBUkGP", "is_led_on": false},
+        {"serial": "0000541217D9B4DC", "is_led_on": false, "led_face": "TIRED"}
+    ]
+
+    예: "23시에 모든 조명 끄기"를 디바이스 수만큼의 요청 대신 한 번의 요청으로 처리
+    (저장소 기록이 블로킹이므로 async가 아닌 일반 함수로 정의해 스레드풀에서 실행)
+    """
+    applied = _apply_device_updates(
+        [(update.serial, update.is_led_on, update.led_face) for update in updates]
+    )
+    results = [
+        {"serial": update.serial, "updated_fields": updated_fields}
+        for update, updated_fields in zip(updates, applied)
+    ]
+
+    # 로그 출력 (디바이스별이 아닌 요약 1회)
+    changed = sum(1 for result in results if result["updated_fields"])
+    logger.info("디바이스 일괄 업데이트", extra={"changed": changed, "total": len(results)})
+
+    return {
+        "status": "success",
+        "message": "Devices updated",
+        "updated": changed,
+        "results": results,
     }
 
 
 @app.patch("/devices/{serial}")
-async def update_device(
+def update_device(
     serial: str = Path(..., description="Device serial ID"),
     is_led_on: Optional[str] = Form(None),
     led_face: Optional[str] = Form(None),
@@ -138,34 +489,21 @@ async def update_device(
     Form Data:
     - is_led_on: LED 상태 ("true" 또는 "false", 선택사항)
     - led_face: Face Emotion 상태 (예: "HAPPY", "SAD", "NEUTRAL", 선택사항)
-    """
-    updated_fields = []
 
-    # LED 상태 업데이트
+    (저장소 기록이 블로킹이므로 async가 아닌 일반 함수로 정의해 스레드풀에서 실행)
+    """
+    led_on_bool = None
     if is_led_on is not None:
         led_on_bool = is_led_on.lower() in ("true", "1", "on", "yes")
-        led_states[serial] = {
-            "is_led_on": led_on_bool,
-            "updated_at": datetime.now().isoformat(),
-        }
-        updated_fields.append(f"LED: {'ON' if led_on_bool else 'OFF'}")
 
-    # Face Emotion 상태 업데이트
-    if led_face is not None:
-        face_emotion_states[serial] = {
-            "face": led_face,
-            "updated_at": datetime.now().isoformat(),
-        }
-        updated_fields.append(f"Face: {led_face}")
+    updated_fields = _apply_device_updates([(serial, led_on_bool, led_face)])[0]
 
     # 로그 출력
     if updated_fields:
-        print("=" * 50)
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 디바이스 상태 업데이트")
-        print(f"  Serial: {serial}")
-        for field in updated_fields:
-            print(f"  {field}")
-        print("=" * 50)
+        logger.info(
+            "디바이스 상태 업데이트",
+            extra={"serial": serial, "updated_fields": updated_fields},
+        )
 
     return {
         "status": "success",
@@ -179,4 +517,14 @@ if __name__ == "__main__":
     print("Starting Citonphyde Sensor Server...")
     print("Server will be available at http://localhost:8000")
     print("API docs available at http://localhost:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    workers = int(os.environ.get("SERVER_WORKERS", "1"))
+    if workers > 1:
+        if not state_store.shared:
+            print(
+                "⚠️ STATE_STORE=memory는 워커 간에 상태를 공유하지 않습니다. "
+                "STATE_STORE=sqlite 또는 shm을 사용하세요."
+            )
+        # 여러 워커는 import 문자열로만 실행 가능
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,694 @@
+"""
+센서 데이터 수집(ingestion) 파이프라인
+
+POST /sensor_data 요청은 측정값을 메모리 큐에 넣기만 하고 바로 응답합니다.
+백그라운드 스레드가 큐를 모아 두었다가 개수(SENSOR_FLUSH_SIZE) 또는
+시간(SENSOR_FLUSH_INTERVAL) 임계값에 도달하면 저장소에 한 번에 기록합니다.
+
+저장소(backend)는 교체 가능합니다:
+- sqlite   : 로컬 파일 (기본값, 추가 의존성 없음)
+- postgres : PostgreSQL (COPY 또는 multi-row INSERT)
+
+원본 측정값과 함께 serial별 1분/1시간/1일 집계(sensor_data_rollups)를 같은 트랜잭션에서
+증분 갱신합니다. 추세/대시보드 조회는 원본 행 대신 집계 행을 읽습니다.
+"""
+
+import io
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from structured_logging import get_logger
+
+# psycopg2는 postgres 저장소를 사용할 때만 필요
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    HAS_PSYCOPG2 = True
+except (ImportError, OSError):
+    HAS_PSYCOPG2 = False
+
+logger = get_logger("sensor_ingest")
+
+# ============================================================================
+# 설정 (환경 변수)
+# ============================================================================
+
+SENSOR_STORAGE = os.environ.get("SENSOR_STORAGE", "sqlite")
+SENSOR_DB_PATH = os.environ.get(
+    "SENSOR_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sensor_data.db"),
+)
+SENSOR_FLUSH_SIZE = int(os.environ.get("SENSOR_FLUSH_SIZE", "500"))
+SENSOR_FLUSH_INTERVAL = float(os.environ.get("SENSOR_FLUSH_INTERVAL", "1.0"))
+SENSOR_QUEUE_MAX = int(os.environ.get("SENSOR_QUEUE_MAX", "100000"))
+# 메모리에 최신 측정값을 보관할 최대 serial 수 (넘으면 가장 오래 안 쓴 serial부터 제거)
+SENSOR_LATEST_MAX = int(os.environ.get("SENSOR_LATEST_MAX", "10000"))
+SENSOR_PG_USE_COPY = os.environ.get("SENSOR_PG_USE_COPY", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+SENSOR_ROLLUPS = os.environ.get("SENSOR_ROLLUPS", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+
+# ============================================================================
+# 집계 (Rollups)
+# ============================================================================
+
+# 집계 단위: (resolution, 구간 시작 시각 계산)
+ROLLUP_RESOLUTIONS = (
+    ("1m", lambda ts: ts.replace(second=0, microsecond=0)),
+    ("1h", lambda ts: ts.replace(minute=0, second=0, microsecond=0)),
+    ("1d", lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)),
+)
+
+ROLLUP_COLUMNS = (
+    "serial",
+    "resolution",
+    "bucket_start",
+    "count",
+    "temperature_min",
+    "temperature_max",
+    "temperature_sum",
+    "humidity_min",
+    "humidity_max",
+    "humidity_sum",
+)
+
+
+def aggregate_rollups(rows):
+    """
+    배치를 (serial, resolution, bucket_start)별로 미리 집계
+    (저장소에는 측정값 수가 아니라 구간 수만큼만 upsert)
+
+    Args:
+        rows: (serial, temperature, humidity, illuminance, timestamp) 튜플 리스트
+
+    Returns:
+        list: ROLLUP_COLUMNS 순서의 튜플 리스트
+    """
+    buckets = {}
+    for serial, temperature, humidity, _illuminance, ts in rows:
+        for resolution, truncate in ROLLUP_RESOLUTIONS:
+            key = (serial, resolution, truncate(ts))
+            agg = buckets.get(key)
+            if agg is None:
+                buckets[key] = [
+                    1,
+                    temperature,
+                    temperature,
+                    temperature,
+                    humidity,
+                    humidity,
+                    humidity,
+                ]
+                continue
+            agg[0] += 1
+            agg[1] = min(agg[1], temperature)
+            agg[2] = max(agg[2], temperature)
+            agg[3] += temperature
+            agg[4] = min(agg[4], humidity)
+            agg[5] = max(agg[5], humidity)
+            agg[6] += humidity
+    return [key + tuple(agg) for key, agg in buckets.items()]
+
+
+def _rollup_row(row):
+    """조회한 집계 행 → dict (평균 포함)"""
+    rollup = dict(zip(ROLLUP_COLUMNS[1:], row))
+    count = rollup["count"] or 0
+    rollup["temperature_avg"] = rollup["temperature_sum"] / count if count else None
+    rollup["humidity_avg"] = rollup["humidity_sum"] / count if count else None
+    return rollup
+
+
+# ============================================================================
+# 저장소 (Storage backends)
+# ============================================================================
+
+
+class SQLiteSensorStorage:
+    """SQLite 로컬 파일 저장소 (기본값)"""
+
+    COLUMNS = (
+        "serial",
+        "temperature",
+        "humidity",
+        "illuminance",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self, path=None, rollups=None):
+        """
+        Args:
+            path: SQLite 파일 경로 (기본값: env의 SENSOR_DB_PATH)
+            rollups: 집계 테이블 갱신 여부 (기본값: env의 SENSOR_ROLLUPS)
+        """
+        self.path = path or SENSOR_DB_PATH
+        self.rollups = SENSOR_ROLLUPS if rollups is None else rollups
+        self.conn = None
+        # 대시보드 조회용 (flush 스레드의 쓰기 연결과 분리)
+        self._read_conn = None
+        self._read_lock = threading.Lock()
+
+    def open(self):
+        """DB 파일 열기 및 테이블 생성"""
+        # flush 스레드에서만 사용하지만 open/close는 메인 스레드에서 호출됨
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL: 쓰기 중에도 읽기 가능, fsync 횟수 감소
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sensor_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                serial TEXT NOT NULL,
+                temperature REAL,
+                humidity REAL,
+                illuminance TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sensor_data_serial_created "
+            "ON sensor_data (serial, created_at)"
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sensor_data_rollups (
+                serial TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                bucket_start TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                temperature_min REAL,
+                temperature_max REAL,
+                temperature_sum REAL,
+                humidity_min REAL,
+                humidity_max REAL,
+                humidity_sum REAL,
+                PRIMARY KEY (serial, resolution, bucket_start)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def write_batch(self, rows):
+        """
+        여러 측정값을 하나의 트랜잭션으로 기록
+
+        Args:
+            rows: (serial, temperature, humidity, illuminance, timestamp) 튜플 리스트
+        """
+        params = [
+            (serial, temperature, humidity, illuminance, ts.isoformat(), ts.isoformat())
+            for serial, temperature, humidity, illuminance, ts in rows
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO sensor_data "
+                "(serial, temperature, humidity, illuminance, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                params,
+            )
+            if self.rollups:
+                self.conn.executemany(
+                    """
+                    INSERT INTO sensor_data_rollups
+                        (serial, resolution, bucket_start, count,
+                         temperature_min, temperature_max, temperature_sum,
+                         humidity_min, humidity_max, humidity_sum)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (serial, resolution, bucket_start) DO UPDATE SET
+                        count = count + excluded.count,
+                        temperature_min = MIN(temperature_min, excluded.temperature_min),
+                        temperature_max = MAX(temperature_max, excluded.temperature_max),
+                        temperature_sum = temperature_sum + excluded.temperature_sum,
+                        humidity_min = MIN(humidity_min, excluded.humidity_min),
+                        humidity_max = MAX(humidity_max, excluded.humidity_max),
+                        humidity_sum = humidity_sum + excluded.humidity_sum
+                    """,
+                    [
+                        (rollup[0], rollup[1], rollup[2].isoformat()) + rollup[3:]
+                        for rollup in aggregate_rollups(rows)
+                    ],
+                )
+
+    def read_rollups(self, serial, resolution, limit):
+        """
+        집계 조회 (최신 구간부터)
+
+        Returns:
+            list: 구간별 dict (bucket_start, count, *_min, *_max, *_sum, *_avg)
+        """
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = sqlite3.connect(self.path, check_same_thread=False)
+            rows = self._read_conn.execute(
+                f"SELECT {', '.join(ROLLUP_COLUMNS[1:])} FROM sensor_data_rollups "
+                "WHERE serial = ? AND resolution = ? "
+                "ORDER BY bucket_start DESC LIMIT ?",
+                (serial, resolution, limit),
+            ).fetchall()
+        return [_rollup_row(row) for row in rows]
+
+    def read_latest(self, serial):
+        """
+        serial의 가장 최근 측정값 (없으면 None)
+
+        Returns:
+            tuple: (serial, temperature, humidity, illuminance, timestamp)
+        """
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = sqlite3.connect(self.path, check_same_thread=False)
+            row = self._read_conn.execute(
+                "SELECT serial, temperature, humidity, illuminance, created_at "
+                "FROM sensor_data WHERE serial = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (serial,),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[:4] + (datetime.fromisoformat(row[4]),)
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+        with self._read_lock:
+            if self._read_conn:
+                self._read_conn.close()
+                self._read_conn = None
+
+
+class PostgresSensorStorage:
+    """PostgreSQL 저장소 (COPY 또는 multi-row INSERT)"""
+
+    # 운영 DB의 sensor_data 스키마에 맞춤 (ai-voice DatabaseManager가 조회하는 컬럼)
+    COLUMNS = ("serial", "temperature", "humidity", "created_at", "updated_at")
+
+    def __init__(self, use_copy=None, rollups=None):
+        """
+        Args:
+            use_copy: True면 COPY FROM STDIN, False면 multi-row INSERT
+                      (기본값: env의 SENSOR_PG_USE_COPY)
+            rollups: 집계 테이블 갱신 여부 (기본값: env의 SENSOR_ROLLUPS)
+        """
+        if not HAS_PSYCOPG2:
+            raise ImportError(
+                "psycopg2가 설치되지 않았습니다. "
+                "postgres 저장소를 사용하려면: pip install psycopg2-binary"
+            )
+        self.use_copy = SENSOR_PG_USE_COPY if use_copy is None else use_copy
+        self.rollups = SENSOR_ROLLUPS if rollups is None else rollups
+        self.host = os.environ.get("DB_HOST")
+        self.port = os.environ.get("DB_PORT", "5432")
+        self.database = os.environ.get("DB_NAME", "chytonpide_production")
+        self.user = os.environ.get("DB_USER", "postgres")
+        self.password = os.environ.get("DB_PASSWORD")
+        if not self.host:
+            raise ValueError("DB_HOST가 설정되지 않았습니다.")
+        self.conn = None
+        # 대시보드 조회용 (flush 스레드의 쓰기 연결과 분리)
+        self._read_conn = None
+        self._read_lock = threading.Lock()
+
+    def _connect(self):
+        return psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            connect_timeout=5,
+        )
+
+    def open(self):
+        self.conn = self._connect()
+        if self.rollups:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS sensor_data_rollups (
+                        serial VARCHAR NOT NULL,
+                        resolution VARCHAR(4) NOT NULL,
+                        bucket_start TIMESTAMP NOT NULL,
+                        count INTEGER NOT NULL,
+                        temperature_min DOUBLE PRECISION,
+                        temperature_max DOUBLE PRECISION,
+                        temperature_sum DOUBLE PRECISION,
+                        humidity_min DOUBLE PRECISION,
+                        humidity_max DOUBLE PRECISION,
+                        humidity_sum DOUBLE PRECISION,
+                        PRIMARY KEY (serial, resolution, bucket_start)
+                    )
+                    """
+                )
+            self.conn.commit()
+
+    def _ensure_connection(self):
+        if self.conn is None or self.conn.closed:
+            self.open()
+
+    @staticmethod
+    def _copy_value(value):
+        """COPY text 포맷 값 이스케이프"""
+        if value is None:
+            return "\\N"
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return (
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+
+    def write_batch(self, rows):
+        """
+        여러 측정값을 한 번의 왕복으로 기록
+
+        Args:
+            rows: (serial, temperature, humidity, illuminance, timestamp) 튜플 리스트
+        """
+        self._ensure_connection()
+        records = [
+            (serial, temperature, humidity, ts, ts)
+            for serial, temperature, humidity, _illuminance, ts in rows
+        ]
+        columns = ", ".join(self.COLUMNS)
+        try:
+            with self.conn.cursor() as cur:
+                if self.use_copy:
+                    buf = io.StringIO()
+                    for record in records:
+                        buf.write("\t".join(self._copy_value(v) for v in record))
+                        buf.write("\n")
+                    buf.seek(0)
+                    cur.copy_expert(
+                        f"COPY sensor_data ({columns}) FROM STDIN", buf
+                    )
+                else:
+                    execute_values(
+                        cur,
+                        f"INSERT INTO sensor_data ({columns}) VALUES %s",
+                        records,
+                        page_size=len(records),
+                    )
+                if self.rollups:
+                    rollups = aggregate_rollups(rows)
+                    execute_values(
+                        cur,
+                        f"""
+                        INSERT INTO sensor_data_rollups AS r ({", ".join(ROLLUP_COLUMNS)})
+                        VALUES %s
+                        ON CONFLICT (serial, resolution, bucket_start) DO UPDATE SET
+                            count = r.count + EXCLUDED.count,
+                            temperature_min = LEAST(r.temperature_min, EXCLUDED.temperature_min),
+                            temperature_max = GREATEST(r.temperature_max, EXCLUDED.temperature_max),
+                            temperature_sum = r.temperature_sum + EXCLUDED.temperature_sum,
+                            humidity_min = LEAST(r.humidity_min, EXCLUDED.humidity_min),
+                            humidity_max = GREATEST(r.humidity_max, EXCLUDED.humidity_max),
+                            humidity_sum = r.humidity_sum + EXCLUDED.humidity_sum
+                        """,
+                        rollups,
+                        page_size=len(rollups),
+                    )
+            self.conn.commit()
+        except Exception:
+            # 연결이 끊겼을 수 있으므로 다음 flush에서 다시 연결
+            try:
+                self.conn.rollback()
+            except Exception:
+                self.conn = None
+            raise
+
+    def _read_cursor(self):
+        """조회용 연결의 커서 (호출자가 _read_lock을 잡고 있어야 함)"""
+        if self._read_conn is None or self._read_conn.closed:
+            self._read_conn = self._connect()
+            # 조회만 하므로 트랜잭션을 열어 두지 않음
+            self._read_conn.autocommit = True
+        return self._read_conn.cursor()
+
+    def read_rollups(self, serial, resolution, limit):
+        """집계 조회 (SQLiteSensorStorage.read_rollups 참고)"""
+        with self._read_lock:
+            with self._read_cursor() as cur:
+                cur.execute(
+                    f"SELECT {', '.join(ROLLUP_COLUMNS[1:])} FROM sensor_data_rollups "
+                    "WHERE serial = %s AND resolution = %s "
+                    "ORDER BY bucket_start DESC LIMIT %s",
+                    (serial, resolution, limit),
+                )
+                rows = cur.fetchall()
+        return [_rollup_row(row) for row in rows]
+
+    def read_latest(self, serial):
+        """가장 최근 측정값 (SQLiteSensorStorage.read_latest 참고, 조도는 저장하지 않음)"""
+        with self._read_lock:
+            with self._read_cursor() as cur:
+                cur.execute(
+                    "SELECT serial, temperature, humidity, created_at "
+                    "FROM sensor_data WHERE serial = %s "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (serial,),
+                )
+                row = cur.fetchone()
+        if row is None:
+            return None
+        serial, temperature, humidity, created_at = row
+        return (serial, temperature, humidity, None, created_at)
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+        with self._read_lock:
+            if self._read_conn:
+                self._read_conn.close()
+                self._read_conn = None
+
+
+def create_sensor_storage(kind=None):
+    """
+    저장소 인스턴스 생성
+
+    Args:
+        kind: "sqlite" 또는 "postgres" (기본값: env의 SENSOR_STORAGE)
+    """
+    kind = (kind or SENSOR_STORAGE).lower()
+    if kind == "sqlite":
+        return SQLiteSensorStorage()
+    if kind in ("postgres", "postgresql"):
+        return PostgresSensorStorage()
+    raise ValueError(f"지원하지 않는 SENSOR_STORAGE입니다: {kind}")
+
+
+# ============================================================================
+# 수집 큐 (배치 flush)
+# ============================================================================
+
+
+class SensorIngestQueue:
+    """센서 측정값을 메모리에 모아 두었다가 저장소에 일괄 기록하는 큐"""
+
+    def __init__(
+        self,
+        storage,
+        flush_size=None,
+        flush_interval=None,
+        max_queue=None,
+        max_latest=None,
+    ):
+        """
+        Args:
+            storage: write_batch(rows)를 제공하는 저장소 객체
+            flush_size: 이 개수 이상 쌓이면 즉시 flush (기본값: env의 SENSOR_FLUSH_SIZE)
+            flush_interval: 최대 flush 주기, 초 (기본값: env의 SENSOR_FLUSH_INTERVAL)
+            max_queue: 큐 최대 길이, 초과 시 가장 오래된 값부터 버림
+                       (기본값: env의 SENSOR_QUEUE_MAX)
+            max_latest: 최신 측정값 인덱스의 최대 serial 수, 초과 시 가장 오래 안 쓴 것부터 제거
+                        (기본값: env의 SENSOR_LATEST_MAX, 제거된 serial은 저장소에서 다시 읽음)
+        """
+        self.storage = storage
+        self.flush_size = flush_size or SENSOR_FLUSH_SIZE
+        self.flush_interval = flush_interval or SENSOR_FLUSH_INTERVAL
+        self.max_queue = max_queue or SENSOR_QUEUE_MAX
+        self.max_latest = max_latest or SENSOR_LATEST_MAX
+
+        self._buffer = deque(maxlen=self.max_queue)
+        # serial별 최신 측정값 (enqueue 시 갱신, DB 조회 없이 응답용, LRU)
+        self._latest = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+        }
+
+    def start(self):
+        """저장소를 열고 flush 스레드 시작"""
+        self.storage.open()
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sensor-ingest", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """남은 데이터를 모두 기록하고 종료"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.storage.close()
+
+    def enqueue(self, serial, temperature, humidity, illuminance="0", timestamp=None):
+        """
+        측정값을 큐에 추가 (I/O 없음, 즉시 반환)
+
+        Returns:
+            int: 현재 큐 길이
+        """
+        row = (serial, temperature, humidity, illuminance, timestamp or datetime.now())
+        with self._lock:
+            if len(self._buffer) == self.max_queue:
+                # deque(maxlen)이 가장 오래된 값을 밀어냄
+                self.stats["dropped"] += 1
+            self._buffer.append(row)
+            self._remember_latest(serial, row)
+            self.stats["enqueued"] += 1
+            pending = len(self._buffer)
+
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        return pending
+
+    def _remember_latest(self, serial, row):
+        """최신 측정값 인덱스 갱신 (_lock 안에서 호출)"""
+        self._latest[serial] = row
+        self._latest.move_to_end(serial)
+        while len(self._latest) > self.max_latest:
+            self._latest.popitem(last=False)
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def latest(self, serial):
+        """
+        serial의 최신 측정값
+
+        이 프로세스가 받은 값이 있으면 메모리에서 바로 반환하고,
+        없으면(재시작 직후 등) 저장소에서 한 번 읽어 인덱스에 채워 둡니다.
+
+        Returns:
+            dict: serial, temperature, humidity, illuminance, created_at (없으면 None)
+        """
+        with self._lock:
+            row = self._latest.get(serial)
+            if row is not None:
+                self._latest.move_to_end(serial)
+        if row is None:
+            row = self.storage.read_latest(serial)
+            if row is None:
+                return None
+            with self._lock:
+                # 그 사이 새 측정값이 들어왔으면 그 값을 유지
+                row = self._latest.get(serial, row)
+                self._remember_latest(serial, row)
+        serial, temperature, humidity, illuminance, ts = row
+        return {
+            "serial": serial,
+            "temperature": temperature,
+            "humidity": humidity,
+            "illuminance": illuminance,
+            "created_at": ts.isoformat(),
+        }
+
+    def snapshot_stats(self):
+        """/health 등에서 사용할 통계"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._buffer)
+            stats["indexed_serials"] = len(self._latest)
+        return stats
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(len(self._buffer), self.flush_size)
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _requeue(self, batch):
+        """실패한 배치를 큐 앞쪽에 되돌림 (순서 유지)"""
+        with self._lock:
+            room = self.max_queue - len(self._buffer)
+            if room < len(batch):
+                self.stats["dropped"] += len(batch) - room
+                batch = batch[len(batch) - room :] if room > 0 else []
+            self._buffer.extendleft(reversed(batch))
+
+    def flush(self):
+        """
+        큐에 쌓인 값을 flush_size 단위로 저장소에 기록
+
+        Returns:
+            int: 기록한 행 수
+        """
+        written = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                break
+            try:
+                self.storage.write_batch(batch)
+            except Exception as e:
+                self._requeue(batch)
+                with self._lock:
+                    self.stats["failed_flushes"] += 1
+                logger.error(
+                    "센서 데이터 저장 실패 (재시도 예정)",
+                    extra={"rows": len(batch), "error": str(e)},
+                )
+                break
+            written += len(batch)
+            with self._lock:
+                self.stats["written"] += len(batch)
+                self.stats["flushes"] += 1
+        return written
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self.flush() == 0 and self.pending():
+                # 저장 실패 시 저장소를 두드리지 않도록 잠시 대기
+                time.sleep(min(self.flush_interval, 1.0))
+        # 종료 시 남은 데이터 기록
+        self.flush()
+
+
+def create_ingest_queue(kind=None):
+    """환경 변수 설정으로 수집 큐 생성 (start()는 호출하지 않음)"""
+    return SensorIngestQueue(create_sensor_storage(kind))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+디바이스 폴링 vs long-poll 요청량 시뮬레이션
+
+펌웨어의 현재 방식(RelayLedController: /led 1초, FaceEmotionController: /lcd 2초 폴링)과
+GET /devices/{serial}/wait long-poll 방식의 요청 수를 비교합니다.
+long-poll 쪽은 서버와 같은 상태 저장소(MemoryStateStore) + DeviceStateNotifier를 사용해
+실제로 기록/대기/알림을 수행하며, 시간은 --time-scale 배로 압축해서 실행합니다.
+
+사용법: python simulate_device_polling.py [--devices 1000] [--duration 600]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from device_events import DeviceStateNotifier
+from state_store import MemoryStateStore
+
+# 펌웨어 폴링 주기 (초)
+LED_POLL_INTERVAL = 1.0
+LCD_POLL_INTERVAL = 2.0
+
+
+def count_polling_requests(devices, duration):
+    """고정 주기 폴링 방식의 요청 수 (상태 변경과 무관)"""
+    per_device = int(duration / LED_POLL_INTERVAL) + int(duration / LCD_POLL_INTERVAL)
+    return per_device * devices
+
+
+async def run_long_poll(devices, duration, updates_per_hour, poll_timeout, time_scale):
+    """
+    long-poll 방식 시뮬레이션
+
+    Returns:
+        dict: 요청 수, 변경 수, 전달 지연(시뮬레이션 시간 기준, 초)
+    """
+    loop = asyncio.get_running_loop()
+    store = MemoryStateStore()
+    notifier = DeviceStateNotifier(store)
+    serials = [f"SIM-{i:05d}" for i in range(devices)]
+    end_at = loop.time() + duration / time_scale
+    changed_at = {}
+    stats = {"requests": 0, "not_modified": 0, "updates": 0, "latencies": []}
+
+    async def device(serial):
+        version = 0
+        while True:
+            remaining = end_at - loop.time()
+            if remaining <= 0:
+                break
+            stats["requests"] += 1
+            new_version = await notifier.wait_for_change(
+                serial, version, min(poll_timeout / time_scale, remaining)
+            )
+            if new_version == version:
+                stats["not_modified"] += 1
+                continue
+            if version and serial in changed_at:
+                stats["latencies"].append(
+                    (loop.time() - changed_at.pop(serial)) * time_scale
+                )
+            version = new_version
+
+    async def operator():
+        # 전체 기간 동안 무작위 시점에 상태 변경 (앱/음성 명령에 의한 PATCH)
+        total = int(devices * updates_per_hour * duration / 3600)
+        moments = sorted(random.uniform(0, duration) for _ in range(total))
+        start = loop.time()
+        for moment in moments:
+            delay = start + moment / time_scale - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            serial = random.choice(serials)
+            changed_at.setdefault(serial, loop.time())
+            # 서버의 PATCH /devices/{serial}와 같은 순서: 저장소 기록 → 대기자 깨우기
+            store.update(serial, is_led_on=random.random() < 0.5)
+            notifier.notify(serial)
+            stats["updates"] += 1
+
+    # 첫 요청(version=0)은 현재 상태를 받기 위해 바로 반환되도록 초기 버전 설정
+    for serial in serials:
+        store.update(serial, is_led_on=False)
+
+    await asyncio.gather(operator(), *(device(s) for s in serials))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="폴링 vs long-poll 요청량 비교")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=600.0, help="시뮬레이션 시간 (초)")
+    parser.add_argument(
+        "--updates-per-hour", type=float, default=4.0, help="디바이스당 시간당 상태 변경 수"
+    )
+    parser.add_argument("--poll-timeout", type=float, default=55.0, help="long-poll timeout (초)")
+    # 지연 값에는 압축된 이벤트 루프 스케줄링 오차가 time_scale배로 포함됨
+    parser.add_argument("--time-scale", type=float, default=30.0, help="시간 압축 배율")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    polling = count_polling_requests(args.devices, args.duration)
+
+    started = time.perf_counter()
+    stats = asyncio.run(
+        run_long_poll(
+            args.devices,
+            args.duration,
+            args.updates_per_hour,
+            args.poll_timeout,
+            args.time_scale,
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    long_poll = stats["requests"]
+    latencies = sorted(stats["latencies"])
+
+    print("=" * 50)
+    print(f"디바이스: {args.devices}대, 시뮬레이션: {args.duration:.0f}초 (실행 {elapsed:.1f}초)")
+    print(f"상태 변경: {stats['updates']}회")
+    print("-" * 50)
+    print(f"폴링 (/led 1초 + /lcd 2초): {polling:,} 요청 ({polling / args.duration:.1f} req/s)")
+    print(
+        f"long-poll (/wait, timeout {args.poll_timeout:.0f}초): {long_poll:,} 요청 "
+        f"({long_poll / args.duration:.1f} req/s, 304: {stats['not_modified']:,})"
+    )
+    print(f"요청 감소: {polling / max(long_poll, 1):.1f}배")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"변경 전달 지연: p50 {p50 * 1000:.0f}ms, p99 {p99 * 1000:.0f}ms (폴링: 평균 500ms~1s)")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""
+디바이스 상태 저장소 (LED / Face Emotion)
+
+serial별 LED 상태, Face Emotion 상태, 상태 버전을 저장합니다.
+저장소(backend)는 교체 가능합니다:
+- memory : 프로세스 내부 dict (기본값, 워커 1개 전용, 재시작 시 초기화)
+- sqlite : 로컬 파일 (WAL, 여러 워커 공유, 재시작 후에도 유지)
+- shm    : 공유 메모리 (여러 워커 공유, 재부팅 전까지 유지)
+
+모든 저장소는 같은 레코드 형식을 반환합니다:
+    {
+        "is_led_on": bool 또는 None (설정된 적 없음),
+        "led_updated_at": ISO 8601 문자열 또는 None,
+        "face": str 또는 None (설정된 적 없음),
+        "face_updated_at": ISO 8601 문자열 또는 None,
+        "version": int,
+    }
+"""
+
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+
+# shm 저장소는 Unix(fcntl)에서만 사용 가능
+try:
+    import fcntl
+
+    HAS_SHARED_MEMORY = True
+except ImportError:
+    HAS_SHARED_MEMORY = False
+
+# ============================================================================
+# 설정 (환경 변수)
+# ============================================================================
+
+STATE_STORE = os.environ.get("STATE_STORE", "memory")
+STATE_DB_PATH = os.environ.get(
+    "STATE_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "device_state.db"),
+)
+STATE_SHM_NAME = os.environ.get("STATE_SHM_NAME", "chytonpide_device_state")
+# tmpfs(/dev/shm)의 파일을 mmap해서 공유 (디스크 I/O 없음)
+STATE_SHM_DIR = os.environ.get(
+    "STATE_SHM_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+)
+STATE_SHM_SLOTS = int(os.environ.get("STATE_SHM_SLOTS", "4096"))
+
+# serial / face 최대 길이 (UTF-8 바이트, shm 슬롯 크기, API에서 요청을 받을 때 먼저 확인)
+MAX_SERIAL_BYTES = 64
+MAX_FACE_BYTES = 32
+
+
+def _next_version(last_version):
+    """
+    다음 상태 버전
+
+    서버 재시작 후에도 버전이 뒤로 가지 않도록 현재 시각(ms) 이상으로 증가시킴
+    """
+    return max(last_version + 1, int(time.time() * 1000))
+
+
+def _empty_record():
+    return {
+        "is_led_on": None,
+        "led_updated_at": None,
+        "face": None,
+        "face_updated_at": None,
+        "version": 0,
+    }
+
+
+# ============================================================================
+# 저장소 (Storage backends)
+# ============================================================================
+
+
+class MemoryStateStore:
+    """프로세스 내부 dict 저장소 (기본값)"""
+
+    name = "memory"
+    # 다른 프로세스와 상태를 공유하지 않음
+    shared = False
+
+    def __init__(self):
+        self._records = {}
+        self._last_version = 0
+        self._lock = threading.Lock()
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get(self, serial):
+        """
+        serial의 상태 레코드 (없으면 None)
+        """
+        with self._lock:
+            record = self._records.get(serial)
+            return dict(record) if record else None
+
+    def version(self, serial):
+        """현재 버전 (한 번도 변경되지 않았으면 0)"""
+        record = self._records.get(serial)
+        return record["version"] if record else 0
+
+    def update_many(self, updates):
+        """
+        여러 디바이스 상태를 한 번에 변경하고 버전 증가
+
+        Args:
+            updates: (serial, is_led_on, face) 튜플 리스트
+                     (is_led_on / face가 None이면 해당 값은 변경하지 않음)
+
+        Returns:
+            list: 디바이스별 새 버전 (updates와 같은 순서)
+        """
+        now = datetime.now().isoformat()
+        versions = []
+        with self._lock:
+            for serial, is_led_on, face in updates:
+                record = self._records.setdefault(serial, _empty_record())
+                if is_led_on is not None:
+                    record["is_led_on"] = is_led_on
+                    record["led_updated_at"] = now
+                if face is not None:
+                    record["face"] = face
+                    record["face_updated_at"] = now
+                self._last_version = _next_version(self._last_version)
+                record["version"] = self._last_version
+                versions.append(self._last_version)
+        return versions
+
+    def update(self, serial, is_led_on=None, face=None):
+        """
+        디바이스 상태를 변경하고 버전 증가
+
+        Returns:
+            int: 새 버전
+        """
+        return self.update_many([(serial, is_led_on, face)])[0]
+
+
+class SQLiteStateStore:
+    """SQLite 로컬 파일 저장소 (여러 워커 프로세스가 같은 파일을 공유)"""
+
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: SQLite 파일 경로 (기본값: env의 STATE_DB_PATH)
+        """
+        self.path = path or STATE_DB_PATH
+        self.conn = None
+        # 하나의 연결을 이벤트 루프/스레드풀에서 함께 사용
+        self._lock = threading.Lock()
+
+    def open(self):
+        """DB 파일 열기 및 테이블 생성"""
+        # isolation_level=None: 트랜잭션을 BEGIN IMMEDIATE로 직접 관리
+        self.conn = sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        # WAL: 다른 워커가 쓰는 중에도 읽기 가능
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS device_state (
+                serial TEXT PRIMARY KEY,
+                is_led_on INTEGER,
+                led_updated_at TEXT,
+                face TEXT,
+                face_updated_at TEXT,
+                version INTEGER NOT NULL
+            )
+            """
+        )
+        # 모든 워커가 공유하는 마지막 버전 (버전이 워커 간에 겹치지 않도록)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS device_state_meta (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                last_version INTEGER NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "INSERT OR IGNORE INTO device_state_meta (id, last_version) VALUES (0, 0)"
+        )
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def get(self, serial):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT is_led_on, led_updated_at, face, face_updated_at, version "
+                "FROM device_state WHERE serial = ?",
+                (serial,),
+            ).fetchone()
+        if row is None:
+            return None
+        is_led_on, led_updated_at, face, face_updated_at, version = row
+        return {
+            "is_led_on": None if is_led_on is None else bool(is_led_on),
+            "led_updated_at": led_updated_at,
+            "face": face,
+            "face_updated_at": face_updated_at,
+            "version": version,
+        }
+
+    def version(self, serial):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT version FROM device_state WHERE serial = ?", (serial,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def update_many(self, updates):
+        """여러 디바이스 상태를 하나의 트랜잭션으로 변경 (MemoryStateStore.update_many 참고)"""
+        now = datetime.now().isoformat()
+        versions = []
+        with self._lock:
+            # 쓰기 잠금을 먼저 잡아 다른 워커와 버전이 겹치지 않게 함
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                last_version = self.conn.execute(
+                    "SELECT last_version FROM device_state_meta WHERE id = 0"
+                ).fetchone()[0]
+                for serial, is_led_on, face in updates:
+                    last_version = _next_version(last_version)
+                    led_updated_at = now if is_led_on is not None else None
+                    face_updated_at = now if face is not None else None
+                    self.conn.execute(
+                        """
+                        INSERT INTO device_state
+                            (serial, is_led_on, led_updated_at, face, face_updated_at, version)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (serial) DO UPDATE SET
+                            is_led_on = COALESCE(excluded.is_led_on, is_led_on),
+                            led_updated_at = COALESCE(excluded.led_updated_at, led_updated_at),
+                            face = COALESCE(excluded.face, face),
+                            face_updated_at = COALESCE(excluded.face_updated_at, face_updated_at),
+                            version = excluded.version
+                        """,
+                        (
+                            serial,
+                            None if is_led_on is None else int(is_led_on),
+                            led_updated_at,
+                            face,
+                            face_updated_at,
+                            last_version,
+                        ),
+                    )
+                    versions.append(last_version)
+                self.conn.execute(
+                    "UPDATE device_state_meta SET last_version = ? WHERE id = 0",
+                    (last_version,),
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return versions
+
+    def update(self, serial, is_led_on=None, face=None):
+        return self.update_many([(serial, is_led_on, face)])[0]
+
+
+class SharedMemoryStateStore:
+    """
+    공유 메모리 저장소 (고정 크기 해시 테이블)
+
+    STATE_SHM_DIR(기본값: /dev/shm)의 파일을 여러 워커 프로세스가 mmap으로 함께 사용하며,
+    잠금은 같은 파일에 대한 fcntl.flock(읽기: 공유, 쓰기: 배타)으로 처리합니다.
+    파일은 워커가 종료되어도 남아 있으므로 재부팅 전까지 상태가 유지됩니다.
+    """
+
+    name = "shm"
+    shared = True
+
+    # 헤더: last_version, slot 수
+    HEADER = struct.Struct("<qI4x")
+    # 슬롯: serial, flags, face, led_updated_at(us), face_updated_at(us), version
+    SLOT = struct.Struct(f"<{MAX_SERIAL_BYTES}sB{MAX_FACE_BYTES}sqqq")
+    # 슬롯 앞부분 (탐사할 때 serial, flags만 읽음)
+    SLOT_KEY = struct.Struct(f"<{MAX_SERIAL_BYTES}sB")
+
+    FLAG_USED = 0x01
+    FLAG_LED_SET = 0x02
+    FLAG_LED_ON = 0x04
+    FLAG_FACE_SET = 0x08
+
+    def __init__(self, name=None, slots=None):
+        """
+        Args:
+            name: 공유 메모리 파일 이름 (기본값: env의 STATE_SHM_NAME)
+            slots: 최대 디바이스 수 (기본값: env의 STATE_SHM_SLOTS,
+                   이미 만들어진 파일이 있으면 그 크기를 따름)
+        """
+        if not HAS_SHARED_MEMORY:
+            raise ImportError("shm 저장소는 Unix 환경(fcntl)에서만 사용할 수 있습니다.")
+        self.path = os.path.join(STATE_SHM_DIR, name or STATE_SHM_NAME)
+        self.slots = slots or STATE_SHM_SLOTS
+        self.buf = None
+        self._file = None
+        # flock은 같은 프로세스의 스레드끼리는 배제하지 않음
+        self._thread_lock = threading.Lock()
+
+    def _flock(self, exclusive):
+        fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _funlock(self):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def open(self):
+        """공유 메모리 파일 생성 또는 기존 파일에 연결"""
+        self._file = open(self.path, "a+b")
+        fd = self._file.fileno()
+        # 크기 설정(ftruncate) 도중 다른 워커가 연결하지 않도록 배타 잠금 안에서 처리
+        self._flock(True)
+        try:
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, self.HEADER.size + self.SLOT.size * self.slots)
+                self.buf = mmap.mmap(fd, 0)
+                self.HEADER.pack_into(self.buf, 0, 0, self.slots)
+            else:
+                self.buf = mmap.mmap(fd, 0)
+                _last_version, self.slots = self.HEADER.unpack_from(self.buf, 0)
+        finally:
+            self._funlock()
+
+    def close(self):
+        if self.buf:
+            self.buf.close()
+            self.buf = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def destroy(self):
+        """공유 메모리 파일 삭제 (벤치마크/초기화용, 모든 워커의 상태가 사라짐)"""
+        self.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _offset(self, index):
+        return self.HEADER.size + self.SLOT.size * index
+
+    def _find(self, key, insert=False):
+        """
+        serial 키의 슬롯 번호 (선형 탐사)
+
+        Returns:
+            int 또는 None: insert=True면 빈 슬롯까지 포함
+        """
+        # 프로세스마다 다른 hash() 대신 crc32 사용
+        start = zlib.crc32(key) % self.slots
+        for step in range(self.slots):
+            index = (start + step) % self.slots
+            slot_key, flags = self.SLOT_KEY.unpack_from(self.buf, self._offset(index))
+            if not flags & self.FLAG_USED:
+                return index if insert else None
+            if slot_key.rstrip(b"\0") == key:
+                return index
+        if insert:
+            raise self._full_error()
+        return None
+
+    def _full_error(self):
+        return RuntimeError(
+            f"공유 메모리 상태 저장소가 가득 찼습니다 (STATE_SHM_SLOTS={self.slots})"
+        )
+
+    def _check_room(self, keys):
+        """새로 추가할 serial을 모두 넣을 빈 슬롯이 있는지 확인 (없으면 RuntimeError)"""
+        new_keys = {key for key in keys if self._find(key) is None}
+        if not new_keys:
+            return
+        # 선형 탐사는 테이블 전체를 돌므로 빈 슬롯 수만 충분하면 모두 들어감
+        free = 0
+        for index in range(self.slots):
+            _key, flags = self.SLOT_KEY.unpack_from(self.buf, self._offset(index))
+            if not flags & self.FLAG_USED:
+                free += 1
+        if free < len(new_keys):
+            raise self._full_error()
+
+    @staticmethod
+    def _encode(value, size, label):
+        encoded = value.encode("utf-8")
+        if len(encoded) > size:
+            raise ValueError(f"{label}이(가) 너무 깁니다 (최대 {size}바이트): {value}")
+        return encoded
+
+    @staticmethod
+    def _to_us(dt):
+        return int(dt.timestamp() * 1_000_000)
+
+    @staticmethod
+    def _from_us(us):
+        return datetime.fromtimestamp(us / 1_000_000).isoformat()
+
+    def get(self, serial):
+        key = self._encode(serial, MAX_SERIAL_BYTES, "serial")
+        with self._thread_lock:
+            self._flock(False)
+            try:
+                index = self._find(key)
+                if index is None:
+                    return None
+                _key, flags, face, led_us, face_us, version = self.SLOT.unpack_from(
+                    self.buf, self._offset(index)
+                )
+            finally:
+                self._funlock()
+        return {
+            "is_led_on": bool(flags & self.FLAG_LED_ON) if flags & self.FLAG_LED_SET else None,
+            "led_updated_at": self._from_us(led_us) if flags & self.FLAG_LED_SET else None,
+            "face": face.rstrip(b"\0").decode("utf-8") if flags & self.FLAG_FACE_SET else None,
+            "face_updated_at": self._from_us(face_us) if flags & self.FLAG_FACE_SET else None,
+            "version": version,
+        }
+
+    def version(self, serial):
+        record = self.get(serial)
+        return record["version"] if record else 0
+
+    def update_many(self, updates):
+        """여러 디바이스 상태를 한 번의 잠금으로 변경 (MemoryStateStore.update_many 참고)"""
+        now_us = self._to_us(datetime.now())
+        encoded = [
+            (
+                self._encode(serial, MAX_SERIAL_BYTES, "serial"),
+                is_led_on,
+                None if face is None else self._encode(face, MAX_FACE_BYTES, "face"),
+            )
+            for serial, is_led_on, face in updates
+        ]
+        versions = []
+        with self._thread_lock:
+            self._flock(True)
+            try:
+                # 일부만 기록되고 실패하는 일이 없도록 쓰기 전에 자리부터 확인
+                self._check_room(key for key, _, _ in encoded)
+                last_version, _slots = self.HEADER.unpack_from(self.buf, 0)
+                for key, is_led_on, face in encoded:
+                    index = self._find(key, insert=True)
+                    offset = self._offset(index)
+                    _key, flags, old_face, led_us, face_us, _version = self.SLOT.unpack_from(
+                        self.buf, offset
+                    )
+                    flags |= self.FLAG_USED
+                    if is_led_on is not None:
+                        flags |= self.FLAG_LED_SET
+                        if is_led_on:
+                            flags |= self.FLAG_LED_ON
+                        else:
+                            flags &= ~self.FLAG_LED_ON
+                        led_us = now_us
+                    if face is not None:
+                        flags |= self.FLAG_FACE_SET
+                        old_face = face
+                        face_us = now_us
+                    last_version = _next_version(last_version)
+                    self.SLOT.pack_into(
+                        self.buf, offset, key, flags, old_face, led_us, face_us, last_version
+                    )
+                    versions.append(last_version)
+                self.HEADER.pack_into(self.buf, 0, last_version, self.slots)
+            finally:
+                self._funlock()
+        return versions
+
+    def update(self, serial, is_led_on=None, face=None):
+        return self.update_many([(serial, is_led_on, face)])[0]
+
+
+def create_state_store(kind=None):
+    """
+    상태 저장소 인스턴스 생성 (open()은 호출하지 않음)
+
+    Args:
+        kind: "memory", "sqlite" 또는 "shm" (기본값: env의 STATE_STORE)
+    """
+    kind = (kind or STATE_STORE).lower()
+    if kind == "memory":
+        return MemoryStateStore()
+    if kind == "sqlite":
+        return SQLiteStateStore()
+    if kind in ("shm", "shared_memory"):
+        return SharedMemoryStateStore()
+    raise ValueError(f"지원하지 않는 STATE_STORE입니다: {kind}")
@@ -0,0 +1,211 @@
+"""
+구조화 로깅 (JSON lines, 비동기 출력)
+
+요청 처리 스레드는 로그 레코드를 메모리 큐에 넣기만 하고,
+별도 스레드(QueueListener)가 포맷팅과 stdout 출력을 담당합니다.
+큐가 가득 차면 기다리지 않고 버리므로, 로그 출력 때문에 요청이 막히지 않습니다.
+
+사용 예:
+    logger = get_logger("sensor")
+    logger.info("센서 데이터 수신", extra={"serial": serial, "temperature": 25.5})
+
+출력 (LOG_FORMAT=json):
+    {"ts": "...", "level": "INFO", "logger": "chytonpide.sensor",
+     "msg": "센서 데이터 수신", "serial": "...", "temperature": 25.5}
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime
+
+# ============================================================================
+# 설정 (환경 변수)
+# ============================================================================
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()
+# INFO 이하 로그를 남길 비율 (0~1, WARNING 이상은 항상 남김)
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))
+LOG_QUEUE_MAX = int(os.environ.get("LOG_QUEUE_MAX", "10000"))
+
+ROOT_LOGGER = "chytonpide"
+
+# extra로 넘긴 필드를 구분하기 위한 LogRecord 기본 속성
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+def _exception_text(formatter, record):
+    """
+    레코드의 예외 traceback 문자열 (없으면 None)
+
+    큐를 거친 레코드는 exc_info 대신 NonBlockingQueueHandler.prepare()가 만든 exc_text를 가짐
+    """
+    if record.exc_info:
+        return formatter.formatException(record.exc_info)
+    return record.exc_text
+
+
+class JsonFormatter(logging.Formatter):
+    """LogRecord → JSON 한 줄 (extra 필드 포함)"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        exc = _exception_text(self, record)
+        if exc:
+            entry["exc"] = exc
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """사람이 읽기 쉬운 한 줄 포맷 (로컬 개발용, LOG_FORMAT=text)"""
+
+    def format(self, record):
+        fields = " ".join(
+            f"{key}={value}"
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS
+        )
+        line = (
+            f"[{datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')}] "
+            f"{record.levelname:<7} {record.getMessage()}"
+        )
+        if fields:
+            line = f"{line}  {fields}"
+        exc = _exception_text(self, record)
+        if exc:
+            line = f"{line}\n{exc}"
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """INFO 이하 로그를 rate 비율만 통과시킴 (WARNING 이상은 항상 통과)"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        if random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 레코드를 버리는 QueueHandler"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        """
+        큐에 넣을 레코드 준비 (요청 스레드에서 실행)
+
+        기본 QueueHandler.prepare()는 traceback을 메시지 뒤에 붙이고 exc_info를 지우므로,
+        메시지만 완성하고 traceback은 exc_text에 담아 출력 포맷터가 "exc" 필드로 내보내게 함
+        (extra 필드는 그대로 유지)
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            # traceback 객체는 다른 스레드로 넘기지 않음
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_handler = None
+_sampler = None
+_listener = None
+
+
+def setup_logging(level=None, fmt=None, sample_rate=None):
+    """
+    chytonpide 로거에 큐 핸들러를 연결하고 출력 스레드 시작 (여러 번 호출해도 한 번만 설정)
+
+    Args:
+        level: 로그 레벨 (기본값: env의 LOG_LEVEL)
+        fmt: "json" 또는 "text" (기본값: env의 LOG_FORMAT)
+        sample_rate: INFO 이하 로그 샘플링 비율 (기본값: env의 LOG_SAMPLE_RATE)
+    """
+    global _handler, _sampler, _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(
+            TextFormatter() if (fmt or LOG_FORMAT) == "text" else JsonFormatter()
+        )
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+        _handler = NonBlockingQueueHandler(log_queue)
+        _sampler = SamplingFilter(LOG_SAMPLE_RATE if sample_rate is None else sample_rate)
+        # 샘플링은 요청 스레드에서 큐에 넣기 전에 적용 (버릴 레코드는 복사/포맷하지 않음)
+        _handler.addFilter(_sampler)
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel(level or LOG_LEVEL)
+        logger.addHandler(_handler)
+        # uvicorn 등 루트 로거 설정과 중복 출력되지 않도록 전파 차단
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+
+
+def shutdown_logging():
+    """큐에 남은 로그를 모두 출력하고 출력 스레드 종료"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+
+
+def get_logger(name):
+    """chytonpide.<name> 로거"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def logging_stats():
+    """/health 등에서 사용할 통계"""
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "sampled_out": _sampler.sampled_out if _sampler else 0,
+    }